@@ -18,10 +18,12 @@ limitations under the License.
 
 from __future__ import annotations
 
+import asyncio
 from datetime import timedelta
+from functools import partial
+from pathlib import Path
 from typing import TYPE_CHECKING
 
-from enovates_modbus.base import RegisterMap
 from enovates_modbus.eno_one import (
     APIVersion,
     CurrentOffered,
@@ -33,23 +35,53 @@ from enovates_modbus.eno_one import (
     State,
     TransactionToken,
 )
-from homeassistant.const import CONF_HOST, CONF_PORT, Platform
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.update_coordinator import UpdateFailed
+from homeassistant.const import CONF_HOST, CONF_PORT, EVENT_HOMEASSISTANT_STOP, Platform
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.importlib import async_import_module
 from homeassistant.loader import async_get_loaded_integration
-from pymodbus import ModbusException
 
-from .const import CONF_DUAL_PORT, CONF_EMS_CONTROL, DOMAIN, LOGGER
-from .coordinator import EnovatesDUCoordinator
+from .const import (
+    CONF_ARCHIVE_DAYS,
+    CONF_CAPTURE,
+    CONF_DAEMON_SOCKET,
+    CONF_DUAL_PORT,
+    CONF_EMS_CONTROL,
+    CONF_FLIGHT_RECORDER,
+    CONF_IO_THREAD,
+    CONF_MAIN_FUSE,
+    CONF_METRICS,
+    CONF_STALENESS_BUDGET,
+    CONF_STATISTICS,
+    CONF_SURPLUS_SENSOR,
+    CONF_TICK_BUDGET,
+    DEFAULT_STALENESS_BUDGET,
+    DEFAULT_TICK_BUDGET,
+    DOMAIN,
+    LOGGER,
+)
+from .coordinator import EnovatesDUCoordinator, EnovatesRegisterMapView, PollingSchedule, RetryPolicy, TickBatch
 from .data import EnovatesData
+from .ems_limit import EMSLimitArbiter
+from .profiler import async_setup_services
+from .schedule import DATA_SCHEDULE_ENGINE, async_setup_schedules
+from .totals import SIGNALS, Totals, async_get_site_totals
+from .watchdog import LoopWatchdog, WatchdogPolicy
+from .websocket_api import async_setup as async_setup_websocket_api
 
 if TYPE_CHECKING:
-    from collections.abc import Awaitable, Callable
+    from collections.abc import Callable
+    from types import ModuleType
 
-    from homeassistant.core import HomeAssistant
+    from enovates_modbus.base import RegisterMap
+    from homeassistant.core import Event, HomeAssistant
+    from homeassistant.helpers.typing import ConfigType
 
+    from .daemon_client import DaemonConnection
     from .data import EnovatesConfigEntry
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
 
 PLATFORMS: list[Platform] = [
     Platform.SENSOR,
@@ -69,76 +101,249 @@ REFRESH_FREQUENCY: dict[type[RegisterMap], timedelta] = {
     CurrentOffered: timedelta(seconds=1),
 }
 
+# High-rate register maps are superseded by the next tick, so a failed read is not retried.
+# Static register maps would otherwise wait a full refresh interval, so they are retried with backoff until they succeed.
+SKIP_TO_NEXT_TICK = RetryPolicy()
+PERSISTENT_BACKOFF = RetryPolicy(backoff=timedelta(seconds=10), max_backoff=timedelta(minutes=15))
 
-async def async_setup_entry(hass: HomeAssistant, entry: EnovatesConfigEntry) -> bool:
-    """Set up Enovates config entry for Home Assistant using the UI."""
+# Update in docs if changed!
+RETRY_POLICY: dict[type[RegisterMap], RetryPolicy] = {
+    APIVersion: PERSISTENT_BACKOFF,
+    Diagnostics: PERSISTENT_BACKOFF,
+    TransactionToken: SKIP_TO_NEXT_TICK,
+    Mode3Details: SKIP_TO_NEXT_TICK,
+    State: SKIP_TO_NEXT_TICK,
+    EMSLimit: SKIP_TO_NEXT_TICK,
+    Measurements: SKIP_TO_NEXT_TICK,
+    CurrentOffered: SKIP_TO_NEXT_TICK,
+}
 
-    def update_method[T: RegisterMap](device_id: int, rm_type: type[T]) -> Callable[[], Awaitable[T]]:
-        # Capture the device_id and register map in the closure
-        async def update() -> T:
-            try:
-                return await entry.runtime_data.clients[device_id].fetch(rm_type)
-            except (ConnectionError, ModbusException) as e:
-                raise UpdateFailed(
-                    translation_domain=DOMAIN,
-                    translation_key="update_failed",
-                    translation_placeholders={
-                        "port": device_id,
-                        "rm_type": rm_type.__name__,
-                        "e": repr(e),
-                    },
-                ) from e
-
-        return update
+# Register maps that are always acquired together, so they are coherent within a PortSnapshot.
+# They must share the same refresh frequency.
+SNAPSHOT_REGISTER_MAPS: tuple[type[RegisterMap], ...] = (
+    State,
+    Measurements,
+    Mode3Details,
+    CurrentOffered,
+)
 
-    device_ids = (1, 2) if entry.data[CONF_DUAL_PORT] else (1,)
 
+def _platforms(*, ems_control: bool) -> list[Platform]:
+    """Platforms that have entities for an entry, the number platform is only used for EMS control."""
+    return [platform for platform in PLATFORMS if platform is not Platform.NUMBER or ems_control]
+
+
+async def _async_import(hass: HomeAssistant, name: str) -> ModuleType:
+    """Import the module of an optional feature in the executor, only when it is enabled."""
+    return await async_import_module(hass, f"{__package__}.{name}")
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:  # noqa: ARG001 Unused function argument: `config`
+    """Set up the Enovates integration."""
+    async_setup_websocket_api(hass)
+    async_setup_services(hass)
+    await async_setup_schedules(hass)
+    return True
+
+
+async def async_setup_entry(hass: HomeAssistant, entry: EnovatesConfigEntry) -> bool:
+    """Set up Enovates config entry for Home Assistant using the UI."""
+    client_factory = partial(
+        EnoOneClient,
+        host=entry.data[CONF_HOST],
+        port=entry.data[CONF_PORT],
+        # Retries are handled per register map, see RETRY_POLICY.
+        mb_retries=0,
+        mb_timeout=3,
+    )
+    clients, coordinator_factory, daemon_connection = await _async_setup_clients(hass, entry, client_factory)
     ed = EnovatesData(
         ems_control=entry.data[CONF_EMS_CONTROL],
         integration=async_get_loaded_integration(hass, entry.domain),
-        clients={
-            i: EnoOneClient(
-                host=entry.data[CONF_HOST],
-                port=entry.data[CONF_PORT],
-                device_id=i,
-                mb_retries=3,
-                mb_timeout=3,
-            )
-            for i in device_ids
-        },
-        coordinators={
-            (i, rm_type): EnovatesDUCoordinator(
-                hass=hass,
-                logger=LOGGER,
-                name=DOMAIN,
-                config_entry=entry,
-                update_interval=interval,
-                update_method=update_method(i, rm_type),
-                always_update=False,
-            )
-            for rm_type, interval in REFRESH_FREQUENCY.items()
-            if (entry.data[CONF_EMS_CONTROL] or not issubclass(rm_type, TransactionToken))
-            for i in device_ids
-        },
+        clients=clients,
+        coordinators={},
+        platforms=_platforms(ems_control=entry.data[CONF_EMS_CONTROL]),
     )
+    tick_batch = _setup_coordinators(hass, entry, ed, coordinator_factory)
     entry.runtime_data = ed
+    if daemon_connection is not None:
+        entry.async_on_unload(daemon_connection.async_start())
     for c in ed.coordinators.values():
         await c.async_config_entry_first_refresh()
 
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    _setup_totals(hass, entry, tick_batch)
+    await _async_setup_recording(hass, entry, tick_batch)
+
+    if entry.data[CONF_EMS_CONTROL]:
+        await _async_setup_ems_control(hass, entry, client_factory)
+
+    await hass.config_entries.async_forward_entry_setups(entry, ed.platforms)
     entry.async_on_unload(entry.add_update_listener(async_reload_entry))
 
+    @callback
+    def _close_on_stop(_event: Event) -> None:
+        # The coordinators cancel their reads on stop, the entry is not unloaded.
+        _close_clients(ed)
+
+    entry.async_on_unload(hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _close_on_stop))
+
     return True
 
 
+async def _async_setup_clients(
+    hass: HomeAssistant, entry: EnovatesConfigEntry, client_factory: Callable[..., EnoOneClient]
+) -> tuple[dict[int, EnoOneClient], Callable[..., EnovatesDUCoordinator], DaemonConnection | None]:
+    """Create the clients of the ports, and the coordinator type that polls them."""
+    device_ids = (1, 2) if entry.data[CONF_DUAL_PORT] else (1,)
+    coordinator_factory: Callable[..., EnovatesDUCoordinator] = EnovatesDUCoordinator
+    daemon_connection: DaemonConnection | None = None
+    if daemon_socket := entry.options.get(CONF_DAEMON_SOCKET):
+        daemon_client = await _async_import(hass, "daemon_client")
+        daemon_connection = daemon_client.DaemonConnection(hass, daemon_socket)
+        clients = {i: daemon_client.DaemonClient(daemon_connection, (entry.data[CONF_HOST], entry.data[CONF_PORT], i)) for i in device_ids}
+        coordinator_factory = partial(daemon_client.EnovatesDaemonCoordinator, connection=daemon_connection)
+    elif entry.options.get(CONF_IO_THREAD):
+        io_thread_module = await _async_import(hass, "io_thread")
+        io_thread, release_io_thread = io_thread_module.async_acquire_io_thread(hass)
+        entry.async_on_unload(release_io_thread)
+        clients = {i: io_thread_module.ThreadedClient(io_thread, partial(client_factory, device_id=i), i) for i in device_ids}
+    else:
+        clients = {i: client_factory(device_id=i) for i in device_ids}
+
+    if entry.options.get(CONF_CAPTURE):
+        capture = await _async_import(hass, "capture")
+        recorder = capture.TrafficRecorder(hass, capture.capture_path(hass, entry.entry_id))
+        clients = {i: recorder.wrap(i, client) for i, client in clients.items()}
+        entry.async_on_unload(recorder.async_start())
+    return clients, coordinator_factory, daemon_connection
+
+
+def _setup_coordinators(
+    hass: HomeAssistant,
+    entry: EnovatesConfigEntry,
+    ed: EnovatesData,
+    coordinator_factory: Callable[..., EnovatesDUCoordinator],
+) -> TickBatch:
+    """Create a coordinator (and its register map views) per port, sharing a tick batch that is watched by the watchdog."""
+    refresh_frequency = {
+        rm_type: interval
+        for rm_type, interval in REFRESH_FREQUENCY.items()
+        if (entry.data[CONF_EMS_CONTROL] or not issubclass(rm_type, TransactionToken))
+    }
+    # A failed read keeps the last value until it is older than the budget, instead of making the entities flap.
+    # Register maps that are read less often than the budget get at least two refresh intervals.
+    staleness = timedelta(seconds=entry.options.get(CONF_STALENESS_BUDGET, DEFAULT_STALENESS_BUDGET))
+    schedule = PollingSchedule(
+        refresh_frequency=refresh_frequency,
+        retry_policy=RETRY_POLICY,
+        groups=[SNAPSHOT_REGISTER_MAPS],
+        staleness_budget={rm_type: max(staleness, 2 * interval) for rm_type, interval in refresh_frequency.items()},
+    )
+    tick_batch = TickBatch(hass)
+    entry.async_on_unload(tick_batch.async_cancel)
+    ed.watchdog = LoopWatchdog(
+        hass, entry, tick_batch, WatchdogPolicy(budget=entry.options.get(CONF_TICK_BUDGET, DEFAULT_TICK_BUDGET) / 1000)
+    )
+    entry.async_on_unload(ed.watchdog.async_start())
+    for i, client in ed.clients.items():
+        c = coordinator_factory(
+            hass=hass,
+            logger=LOGGER,
+            name=DOMAIN,
+            config_entry=entry,
+            device_id=i,
+            client=client,
+            schedule=schedule,
+            tick_batch=tick_batch,
+            # Every tick produces a new snapshot, the register map views filter out unchanged data for their entities.
+            always_update=True,
+        )
+        ed.coordinators[i] = c
+        ed.views.update({(i, rm_type): EnovatesRegisterMapView(c, rm_type) for rm_type in refresh_frequency})
+    return tick_batch
+
+
+def _setup_totals(hass: HomeAssistant, entry: EnovatesConfigEntry, tick_batch: TickBatch) -> None:
+    """Register the ports with the charger and site totals, computed from the latest snapshots without extra reads."""
+    ed = entry.runtime_data
+    if len(ed.coordinators) > 1:
+        ed.totals = totals = Totals(SIGNALS)
+        entry.async_on_unload(totals.async_add_source(entry.entry_id, ed.coordinators.values()))
+        # The charger totals are recomputed at the end of each tick of its ports, the site totals at their own interval.
+        entry.async_on_unload(tick_batch.async_add_tick_listener(lambda _costs: totals.async_update()))
+    entry.async_on_unload(async_get_site_totals(hass).async_add_source(entry.entry_id, ed.coordinators.values()))
+
+
+async def _async_setup_recording(hass: HomeAssistant, entry: EnovatesConfigEntry, tick_batch: TickBatch) -> None:
+    """Start the enabled features that record or export the polled data."""
+    ed = entry.runtime_data
+    if entry.options.get(CONF_FLIGHT_RECORDER):
+        flight_recorder_module = await _async_import(hass, "flight_recorder")
+        directory = Path(hass.config.path(DOMAIN, entry.entry_id))
+        for i, c in ed.coordinators.items():
+            ed.flight_recorders[i] = flight_recorder = flight_recorder_module.FlightRecorder(hass, c, directory)
+            entry.async_on_unload(flight_recorder.async_start())
+
+    if archive_days := entry.options.get(CONF_ARCHIVE_DAYS):
+        archive = await _async_import(hass, "archive")
+        for i, c in ed.coordinators.items():
+            directory = archive.archive_path(hass, entry.entry_id, i)
+            entry.async_on_unload(archive.TelemetryArchive(hass, c, directory, keep_days=int(archive_days)).async_start())
+
+    if entry.options.get(CONF_STATISTICS):
+        if "recorder" in hass.config.components:
+            hourly_statistics = await _async_import(hass, "hourly_statistics")
+            statistics = hourly_statistics.HourlyStatistics(hass, entry, tick_batch)
+            await statistics.async_load()
+            entry.async_on_unload(statistics.async_start())
+        else:
+            LOGGER.warning("Hourly statistics of %s require the recorder", entry.title)
+
+    if entry.options.get(CONF_METRICS):
+        (await _async_import(hass, "metrics")).async_register_view(hass)
+
+
+async def _async_setup_ems_control(hass: HomeAssistant, entry: EnovatesConfigEntry, client_factory: Callable[..., EnoOneClient]) -> None:
+    """Start the enabled features that write the EMS limit, which requires EMS control."""
+    entry.runtime_data.ems_limits = EMSLimitArbiter(entry)
+    entry.async_on_unload(hass.data[DATA_SCHEDULE_ENGINE].async_add_entry(entry))
+    if surplus_sensor := entry.options.get(CONF_SURPLUS_SENSOR):
+        solar = await _async_import(hass, "solar")
+        entry.async_on_unload(solar.SurplusController(hass, entry, surplus_sensor).async_start())
+    # The fuse protection talks to the device directly, on its own connections, so not through the polling daemon.
+    if (main_fuse := entry.options.get(CONF_MAIN_FUSE)) and not entry.options.get(CONF_DAEMON_SOCKET):
+        protection = await _async_import(hass, "protection")
+        protection_clients = {i: client_factory(device_id=i, mb_timeout=1) for i in entry.runtime_data.clients}
+        entry.async_on_unload(protection.FuseProtection(hass, entry, protection_clients, rating=int(main_fuse * 1000)).async_start())
+
+
+@callback
+def _close_clients(ed: EnovatesData) -> None:
+    for client in ed.clients.values():
+        client.client.close()
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: EnovatesConfigEntry) -> bool:
     """Handle removal of an entry."""
-    if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        for client in entry.runtime_data.clients.values():
-            client.client.close()
+    start = hass.loop.time()
+    ed = entry.runtime_data
+    # Stop polling first, reads in progress are cancelled (within SHUTDOWN_TIMEOUT) instead of waiting for a slow charger.
+    await asyncio.gather(*(c.async_shutdown() for c in ed.coordinators.values()))
+    try:
+        # The platforms that were set up, the entry data may have changed since (e.g. by a reconfigure).
+        unload_ok = await hass.config_entries.async_unload_platforms(entry, ed.platforms)
+    finally:
+        # Nothing uses the clients anymore, also if (some of) the platforms failed to unload.
+        _close_clients(ed)
+    LOGGER.debug("Unloaded %s in %.3f seconds (success: %s)", entry.title, hass.loop.time() - start, unload_ok)
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: EnovatesConfigEntry) -> None:
+    """Handle removal of an entry, forgetting its schedule."""
+    await hass.data[DATA_SCHEDULE_ENGINE].async_remove_schedule(entry.entry_id)
+
+
 async def async_reload_entry(hass: HomeAssistant, entry: EnovatesConfigEntry) -> None:
     """Reload config entry."""
     await hass.config_entries.async_reload(entry.entry_id)
@@ -0,0 +1,253 @@
+"""High-resolution telemetry archive of Enovates ports, outside of the recorder."""
+
+from __future__ import annotations
+
+import asyncio
+import mmap
+import struct
+import time
+import zlib
+from datetime import UTC, date, datetime, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from enovates_modbus.eno_one import Measurements, Mode3Details, Mode3State
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import callback
+
+from .const import DOMAIN, LOGGER
+
+if TYPE_CHECKING:
+    from enovates_modbus.base import RegisterMap
+    from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant
+
+    from .coordinator import EnovatesDUCoordinator
+
+MAGIC = b"ENOARC1\n"
+
+# Update in docs if changed! Changing the fields requires a new MAGIC.
+ARCHIVED_FIELDS: tuple[tuple[type[RegisterMap], str], ...] = (
+    (Measurements, "current_l1"),
+    (Measurements, "current_l2"),
+    (Measurements, "current_l3"),
+    (Measurements, "voltage_l1"),
+    (Measurements, "voltage_l2"),
+    (Measurements, "voltage_l3"),
+    (Measurements, "charger_active_power_total"),
+    (Measurements, "charger_active_power_l1"),
+    (Measurements, "charger_active_power_l2"),
+    (Measurements, "charger_active_power_l3"),
+    (Measurements, "installation_current_l1"),
+    (Measurements, "installation_current_l2"),
+    (Measurements, "installation_current_l3"),
+    (Measurements, "active_energy_import_total"),
+    (Mode3Details, "state_num"),
+    (Mode3Details, "pwm_amp"),
+    (Mode3Details, "pwm"),
+    (Mode3Details, "pp"),
+    (Mode3Details, "CP_pos"),
+    (Mode3Details, "CP_neg"),
+)
+FIELDS: tuple[str, ...] = ("time", *(field for _, field in ARCHIVED_FIELDS))
+"""Fields of a record, the time in ms since the epoch."""
+
+MODE3_STATES = list(Mode3State)
+MODE3_STATE_INDEX = {state: i for i, state in enumerate(MODE3_STATES)}
+
+# A record is the difference with the previous record of its chunk (the first one with zeros), so slow-changing values compress well.
+RECORD = struct.Struct(f"<{len(FIELDS)}q")
+# Index entry per chunk: time of its first and last record, and its offset and length in the data file.
+INDEX_ENTRY = struct.Struct("<qqQI")
+
+CHUNK_RECORDS = 600
+MAX_QUERY_RECORDS = 100_000
+
+
+type Record = tuple[int, ...]
+
+
+def archive_path(hass: HomeAssistant, entry_id: str, port: int) -> Path:
+    """Directory of the archive of a port."""
+    return Path(hass.config.path(DOMAIN, "archive", entry_id, f"port{port}"))
+
+
+def encode_chunk(records: list[Record]) -> bytes:
+    """Delta encode and compress records."""
+    previous: Record = (0,) * len(FIELDS)
+    raw = bytearray()
+    for record in records:
+        raw += RECORD.pack(*(value - last for value, last in zip(record, previous, strict=True)))
+        previous = record
+    return zlib.compress(raw)
+
+
+def decode_chunk(data: bytes) -> list[Record]:
+    """Decompress and decode the records of a chunk."""
+    records: list[Record] = []
+    values: Record = (0,) * len(FIELDS)
+    for deltas in RECORD.iter_unpack(zlib.decompress(data)):
+        values = tuple(value + delta for value, delta in zip(values, deltas, strict=True))
+        records.append(values)
+    return records
+
+
+def _day_paths(directory: Path, day: date) -> tuple[Path, Path]:
+    return directory / f"{day.isoformat()}.dat", directory / f"{day.isoformat()}.idx"
+
+
+def _day(timestamp_ms: int) -> date:
+    return datetime.fromtimestamp(timestamp_ms / 1000, UTC).date()
+
+
+def write_chunk(directory: Path, records: list[Record], keep_days: int) -> None:
+    """Append records to the daily files (blocking), and remove the files older than `keep_days`."""
+    by_day: dict[date, list[Record]] = {}
+    for record in records:
+        by_day.setdefault(_day(record[0]), []).append(record)
+    directory.mkdir(parents=True, exist_ok=True)
+    for day, day_records in by_day.items():
+        data_path, index_path = _day_paths(directory, day)
+        chunk = encode_chunk(day_records)
+        with data_path.open("ab") as data:
+            if data.tell() == 0:
+                data.write(MAGIC)
+            offset = data.tell()
+            data.write(chunk)
+        # The index is written last, so it only refers to complete chunks.
+        with index_path.open("ab") as index:
+            index.write(INDEX_ENTRY.pack(day_records[0][0], day_records[-1][0], offset, len(chunk)))
+
+    oldest = (datetime.now(UTC) - timedelta(days=keep_days)).date().isoformat()
+    for path in directory.iterdir():
+        if path.suffix in {".dat", ".idx"} and path.stem < oldest:
+            path.unlink()
+
+
+def read_archive(directory: Path, start: float, end: float, limit: int = MAX_QUERY_RECORDS) -> tuple[list[Record], bool]:
+    """
+    Read the records between `start` and `end` (unix timestamps, inclusive) of a port (blocking), at most `limit`.
+
+    The index and data files are memory mapped, only the chunks that overlap the range are read and decompressed.
+    Returns the records and whether they were truncated to `limit`.
+    """
+    start_ms, end_ms = int(start * 1000), int(end * 1000)
+    records: list[Record] = []
+    day, last_day = _day(start_ms), _day(end_ms)
+    while day <= last_day:
+        data_path, index_path = _day_paths(directory, day)
+        day += timedelta(days=1)
+        if not index_path.exists() or index_path.stat().st_size < INDEX_ENTRY.size:
+            continue
+        with (
+            index_path.open("rb") as index_file,
+            mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ) as index,
+            data_path.open("rb") as data_file,
+            mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ) as data,
+        ):
+            entries = len(index) // INDEX_ENTRY.size
+            # Chunks are in time order, find the first one that ends at or after the start.
+            low, high = 0, entries
+            while low < high:
+                middle = (low + high) // 2
+                if INDEX_ENTRY.unpack_from(index, middle * INDEX_ENTRY.size)[1] < start_ms:
+                    low = middle + 1
+                else:
+                    high = middle
+            for i in range(low, entries):
+                first, _last, offset, length = INDEX_ENTRY.unpack_from(index, i * INDEX_ENTRY.size)
+                if first > end_ms:
+                    break
+                for record in decode_chunk(data[offset : offset + length]):
+                    if start_ms <= record[0] <= end_ms:
+                        if len(records) >= limit:
+                            return records, True
+                        records.append(record)
+    return records, False
+
+
+class TelemetryArchive:
+    """
+    Archives every Measurements and Mode 3 Details sample of a port, in daily files of compressed chunks.
+
+    Records are fixed width, delta encoded and buffered in memory, a chunk of CHUNK_RECORDS (10 minutes) is compressed and
+    written in the executor, and the remaining records when stopped or Home Assistant stops. Writes are serialized, so chunks
+    are appended in order. Each daily data file has an index file with a fixed-width
+    entry per chunk, so a time range can be read without reading whole files, see `read_archive`.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        coordinator: EnovatesDUCoordinator,
+        directory: Path,
+        keep_days: int,
+        chunk_records: int = CHUNK_RECORDS,
+    ) -> None:
+        """Initialize the archive."""
+        self.hass = hass
+        self.coordinator = coordinator
+        self.directory = directory
+        self.keep_days = keep_days
+        self.chunk_records = chunk_records
+        self._buffer: list[Record] = []
+        self._last_sample_time: float | None = None
+        self._write_lock = asyncio.Lock()
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Start archiving, returns a callback that stops and writes the remaining records."""
+        unsub = self.coordinator.async_add_listener(self._handle_coordinator_update)
+
+        @callback
+        def _flush_on_stop(_event: Event) -> None:
+            # The entry is not unloaded on stop.
+            self._async_flush()
+
+        unsub_stop = self.hass.bus.async_listen(EVENT_HOMEASSISTANT_STOP, _flush_on_stop)
+
+        @callback
+        def _stop() -> None:
+            unsub()
+            unsub_stop()
+            self._async_flush()
+
+        return _stop
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        snapshot = self.coordinator.data
+        if snapshot is None or snapshot.failed & {Measurements, Mode3Details}:
+            return
+        sample_time = snapshot.sample_times[Measurements]
+        if sample_time == self._last_sample_time:
+            return
+        self._last_sample_time = sample_time
+        # Sample times are on the event loop clock, records have unix timestamps.
+        timestamp = round((sample_time + time.time() - self.hass.loop.time()) * 1000)
+        values = [getattr(snapshot.get(rm_type), field) for rm_type, field in ARCHIVED_FIELDS]
+        self._buffer.append((timestamp, *(MODE3_STATE_INDEX[v] if isinstance(v, Mode3State) else int(v) for v in values)))
+        if len(self._buffer) >= self.chunk_records:
+            self._async_flush()
+
+    @callback
+    def _async_flush(self) -> None:
+        if not self._buffer:
+            return
+        records, self._buffer = self._buffer, []
+        self.hass.async_create_task(self._async_write(records))
+
+    async def _async_write(self, records: list[Record]) -> None:
+        try:
+            async with self._write_lock:
+                await self.hass.async_add_executor_job(write_chunk, self.directory, records, self.keep_days)
+        except OSError:
+            LOGGER.exception("Failed to write %s records to the telemetry archive at %s", len(records), self.directory)
+
+
+def serialize(record: Record, fields: list[str]) -> list[Any]:
+    """Values of the selected fields of a record, with the time as unix timestamp and the Mode 3 state as its value."""
+    values: dict[str, Any] = dict(zip(FIELDS, record, strict=True))
+    values["time"] /= 1000
+    if "state_num" in fields:
+        values["state_num"] = MODE3_STATES[values["state_num"]].value
+    return [values[field] for field in fields]
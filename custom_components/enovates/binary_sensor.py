@@ -20,18 +20,16 @@ from homeassistant.components.binary_sensor import (
     BinarySensorEntityDescription,
 )
 from homeassistant.const import EntityCategory
-from homeassistant.helpers.device_registry import DeviceInfo
 
-from .const import DOMAIN
-from .entity import EnovatesEntity, transform_entity_descriptions_per_port
+from .entity import EnovatesEntity, charger_device_info, transform_entity_descriptions_per_port
 
 if TYPE_CHECKING:
     from collections.abc import Callable
 
     from homeassistant.core import HomeAssistant
     from homeassistant.helpers.entity_platform import AddEntitiesCallback
-    from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
+    from .coordinator import EnovatesRegisterMapView
     from .data import EnovatesConfigEntry
 
 
@@ -156,7 +154,7 @@ class EnovatesBinarySensor[T: RegisterMap](EnovatesEntity, BinarySensorEntity):
     def __init__(
         self,
         diagnostics: Diagnostics,
-        coordinator: DataUpdateCoordinator[T],
+        coordinator: EnovatesRegisterMapView[T],
         entity_description: EnovatesBinarySensorEntityDescription,
     ) -> None:
         """Initialize the binary sensor class."""
@@ -164,17 +162,9 @@ class EnovatesBinarySensor[T: RegisterMap](EnovatesEntity, BinarySensorEntity):
         self.entity_description = entity_description
         self._device_id = diagnostics.serial_nr
         self._attr_unique_id = f"{diagnostics.serial_nr}_{entity_description.key}"
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, diagnostics.serial_nr)},
-            manufacturer=diagnostics.manufacturer,
-            model="ENO one",
-            name="ENO one",
-            model_id=diagnostics.model_id,
-            serial_number=diagnostics.serial_nr,
-            sw_version=diagnostics.firmware_version,
-        )
+        self._attr_device_info = charger_device_info(diagnostics)
 
     @property
     def is_on(self) -> bool:
         """Return true if the binary_sensor is on."""
-        return self.entity_description.value_fn(self.coordinator.data)
+        return self._evaluate(self.entity_description.value_fn)
@@ -0,0 +1,264 @@
+"""Record and replay of Enovates Modbus traffic."""
+
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import gzip
+import struct
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from datetime import timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, BinaryIO
+
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_track_time_interval
+
+from . import codec
+from .const import DEVICE_METHODS, DOMAIN, LOGGER
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from datetime import datetime
+
+    from enovates_modbus.eno_one import EnoOneClient
+    from homeassistant.core import CALLBACK_TYPE, HomeAssistant
+
+MAGIC = b"ENOCAP1\n"
+_LENGTH = struct.Struct("<I")
+
+# Update in docs if changed!
+MAX_CAPTURE_BYTES = 100 * 1024 * 1024
+
+
+@dataclass(frozen=True, kw_only=True)
+class CaptureRecord:
+    """One request and its response (or exception)."""
+
+    time: float
+    """Start of the request, in seconds since the start of the capture."""
+    duration: float
+    device_id: int
+    method: str
+    args: tuple[Any, ...]
+    result: Any = None
+    exception: BaseException | None = None
+
+
+def _encode(record: CaptureRecord) -> bytes:
+    payload = codec.dumps({field.name: getattr(record, field.name) for field in dataclasses.fields(record)})
+    return _LENGTH.pack(len(payload)) + payload
+
+
+def _decode(payload: bytes) -> CaptureRecord:
+    fields = codec.loads(payload)
+    try:
+        return CaptureRecord(**fields)
+    except TypeError as e:
+        msg = f"Invalid capture record: {e}"
+        raise codec.DecodeError(msg) from e
+
+
+def read_capture(path: Path) -> list[CaptureRecord]:
+    """Read all records of a capture file (blocking), raises ValueError if it is not a valid capture."""
+    records: list[CaptureRecord] = []
+    with gzip.open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            msg = f"{path} is not an Enovates capture"
+            raise ValueError(msg)
+        while header := f.read(_LENGTH.size):
+            (length,) = _LENGTH.unpack(header)
+            records.append(_decode(f.read(length)))
+    return records
+
+
+class TrafficRecorder:
+    """
+    Records the traffic of clients to a gzipped log of length-prefixed records, encoded with codec.py.
+
+    Records are buffered in memory and written in the executor every `flush_interval`, and when stopped.
+    Flushes are serialized, so the final flush never writes to the file while a periodic flush still does.
+    Recording stops once the (compressed) file reaches `max_bytes`, so a forgotten capture can't fill the disk.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, path: Path, flush_interval: timedelta = timedelta(seconds=10), max_bytes: int = MAX_CAPTURE_BYTES
+    ) -> None:
+        """Initialize the recorder."""
+        self.hass = hass
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.start = hass.loop.time()
+        self._buffer: list[CaptureRecord] = []
+        self._file: BinaryIO | None = None
+        self._flush_lock = asyncio.Lock()
+        self._closed = False
+
+    def wrap(self, device_id: int, client: EnoOneClient) -> RecordingClient:
+        """Wrap the client of a port so its traffic is recorded."""
+        return RecordingClient(self, device_id, client)
+
+    @callback
+    def record(self, record: CaptureRecord) -> None:
+        """Buffer a record, unless the capture is closed."""
+        if not self._closed:
+            self._buffer.append(record)
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Start flushing periodically, returns a callback that stops and flushes the remaining records."""
+        unsub = async_track_time_interval(self.hass, self._async_flush, self.flush_interval)
+
+        @callback
+        def _stop() -> None:
+            unsub()
+            self.hass.async_create_task(self._async_flush(close=True))
+
+        return _stop
+
+    async def _async_flush(self, _now: datetime | None = None, *, close: bool = False) -> None:
+        async with self._flush_lock:
+            if self._closed:
+                return
+            buffer, self._buffer = self._buffer, []
+            self._closed = await self.hass.async_add_executor_job(self._write, buffer, close)
+
+    def _write(self, records: list[CaptureRecord], close: bool) -> bool:  # noqa: FBT001
+        """Write records to the file, returns whether it is closed."""
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = gzip.open(self.path, "wb")  # noqa: SIM115 Kept open between flushes
+            self._file.write(MAGIC)
+        self._file.writelines(_encode(record) for record in records)
+        self._file.flush()
+        if not close and self.path.stat().st_size >= self.max_bytes:
+            LOGGER.warning("Modbus capture %s reached %s bytes, recording stopped", self.path, self.max_bytes)
+            close = True
+        if close:
+            self._file.close()
+            self._file = None
+            LOGGER.info("Modbus capture saved to %s", self.path)
+        return close
+
+
+class RecordingClient:
+    """Proxy for EnoOneClient that records the calls that talk to the device."""
+
+    def __init__(self, recorder: TrafficRecorder, device_id: int, client: EnoOneClient) -> None:
+        """Initialize the proxy."""
+        self._recorder = recorder
+        self._device_id = device_id
+        self._client = client
+
+    def __getattr__(self, name: str) -> Any:
+        """Proxy the attribute, wrapping the device methods."""
+        attr = getattr(self._client, name)
+        if name not in DEVICE_METHODS:
+            return attr
+
+        async def _recorded(*args: Any) -> Any:
+            loop = self._recorder.hass.loop
+            start = loop.time()
+
+            def _record(**kwargs: Any) -> None:
+                self._recorder.record(
+                    CaptureRecord(
+                        time=start - self._recorder.start,
+                        duration=loop.time() - start,
+                        device_id=self._device_id,
+                        method=name,
+                        args=args,
+                        **kwargs,
+                    )
+                )
+
+            try:
+                result = await attr(*args)
+            except Exception as e:
+                _record(exception=e)
+                raise
+            _record(result=result)
+            return result
+
+        return _recorded
+
+
+class _ReplayTransport:
+    """Stand-in for the pymodbus client, which is closed on unload."""
+
+    def close(self) -> None:
+        """Nothing to close."""
+
+
+class ReplayClient:
+    """
+    EnoOneClient replacement that answers with the recorded responses.
+
+    Responses are returned in the recorded order per method and arguments, after the recorded duration divided by `speed`.
+    A `speed` of 0 returns immediately. Calls beyond the end of the capture raise a ConnectionError, like an offline device.
+    """
+
+    def __init__(self, device_id: int, records: list[CaptureRecord], speed: float) -> None:
+        """Initialize the replay client."""
+        self.device_id = device_id
+        self.speed = speed
+        self.client = _ReplayTransport()
+        self._responses: dict[tuple[str, tuple[Any, ...]], deque[CaptureRecord]] = defaultdict(deque)
+        for record in records:
+            self._responses[(record.method, record.args)].append(record)
+
+    def remaining(self) -> int:
+        """Return the number of responses that have not been replayed yet."""
+        return sum(len(responses) for responses in self._responses.values())
+
+    def __getattr__(self, name: str) -> Any:
+        """Replay a device method."""
+        if name not in DEVICE_METHODS:
+            raise AttributeError(name)
+
+        async def _replayed(*args: Any) -> Any:
+            responses = self._responses.get((name, args))
+            if not responses:
+                msg = f"Replay of port {self.device_id} has no more responses for {name}{args}"
+                raise ConnectionError(msg)
+            record = responses.popleft()
+            if self.speed:
+                await asyncio.sleep(record.duration / self.speed)
+            if record.exception is not None:
+                raise record.exception
+            return record.result
+
+        return _replayed
+
+
+class ReplayLog:
+    """A loaded capture, that creates replay clients in place of EnoOneClient."""
+
+    def __init__(self, records: list[CaptureRecord]) -> None:
+        """Initialize the log."""
+        self.records = records
+        self.clients: dict[int, ReplayClient] = {}
+
+    @classmethod
+    def load(cls, path: Path) -> ReplayLog:
+        """Load a capture file (blocking)."""
+        return cls(read_capture(path))
+
+    def client_factory(self, speed: float = 1) -> Callable[..., ReplayClient]:
+        """Return a callable with the signature of EnoOneClient that creates (and keeps) replay clients."""
+
+        def _create(*_args: Any, device_id: int, **_kwargs: Any) -> ReplayClient:
+            self.clients[device_id] = client = ReplayClient(
+                device_id, [record for record in self.records if record.device_id == device_id], speed
+            )
+            return client
+
+        return _create
+
+
+def capture_path(hass: HomeAssistant, entry_id: str) -> Path:
+    """Return a new capture file path for a config entry."""
+    return Path(hass.config.path(DOMAIN, f"capture-{entry_id}-{time.strftime('%Y%m%dT%H%M%S')}.bin.gz"))
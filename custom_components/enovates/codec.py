@@ -0,0 +1,122 @@
+"""
+Encoding of the values in captures and polling daemon messages, without pickle.
+
+Values are encoded as JSON, with tags for what JSON can't represent. Decoding only creates the register maps and enums
+of enovates-modbus and a fixed set of exception types, looked up by their exact name, so it never imports or calls
+anything else. Exceptions of other types are encoded as their closest allowed base class.
+
+This module only depends on the standard library, enovates-modbus and pymodbus, so the daemon can use it outside
+Home Assistant, see daemon.py.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import enum
+import json
+from typing import Any
+
+from enovates_modbus.base import RegisterMap
+from enovates_modbus.eno_one import EnoOneClient, LEDColor, LockState, Mode3State
+from pymodbus import ModbusException
+
+REGISTER_MAPS: dict[str, type[RegisterMap]] = {rm_type.__name__: rm_type for rm_type in EnoOneClient.REGISTER_MAPS}
+ENUMS: dict[str, type[enum.Enum]] = {enum_type.__name__: enum_type for enum_type in (LockState, LEDColor, Mode3State)}
+# Ordered from specific to generic, every exception is an Exception.
+EXCEPTIONS: dict[str, type[Exception]] = {
+    exception.__name__: exception
+    for exception in (ModbusException, ConnectionError, TimeoutError, OSError, AttributeError, ValueError, Exception)
+}
+
+
+class DecodeError(ValueError):
+    """Data that is not a valid encoding, or names a type that is not allowed."""
+
+
+def _encode(value: Any) -> Any:  # noqa: PLR0911 One return per type
+    if value is None or isinstance(value, bool | str):
+        return value
+    if isinstance(value, enum.Enum) and ENUMS.get(type(value).__name__) is type(value):
+        return {"enum": [type(value).__name__, value.value]}
+    if isinstance(value, int | float):
+        return value
+    if isinstance(value, list):
+        return [_encode(item) for item in value]
+    if isinstance(value, tuple):
+        return {"tuple": [_encode(item) for item in value]}
+    if isinstance(value, set | frozenset):
+        return {"frozenset": [_encode(item) for item in value]}
+    if isinstance(value, dict):
+        return {"dict": [[_encode(key), _encode(item)] for key, item in value.items()]}
+    if isinstance(value, type) and REGISTER_MAPS.get(value.__name__) is value:
+        return {"register_map_type": value.__name__}
+    if isinstance(value, RegisterMap) and REGISTER_MAPS.get(type(value).__name__) is type(value):
+        fields = {field.name: _encode(getattr(value, field.name)) for field in dataclasses.fields(value)}
+        return {"register_map": [type(value).__name__, fields]}
+    if isinstance(value, Exception):
+        name = next(name for name, exception in EXCEPTIONS.items() if isinstance(value, exception))
+        return {"exception": [name, [_encode_exception_arg(arg) for arg in value.args]]}
+    msg = f"{type(value).__name__} can't be encoded"
+    raise TypeError(msg)
+
+
+def _encode_exception_arg(arg: Any) -> Any:
+    try:
+        return _encode(arg)
+    except TypeError:
+        return str(arg)
+
+
+def _decode(data: Any) -> Any:  # noqa: PLR0911 One return per tag
+    if isinstance(data, list):
+        return [_decode(item) for item in data]
+    if not isinstance(data, dict):
+        return data
+    if len(data) != 1:
+        msg = f"Invalid tagged value {data!r}"
+        raise DecodeError(msg)
+    ((tag, value),) = data.items()
+    match tag:
+        case "tuple":
+            return tuple(_decode(item) for item in value)
+        case "frozenset":
+            return frozenset(_decode(item) for item in value)
+        case "dict":
+            return {_decode(key): _decode(item) for key, item in value}
+        case "enum":
+            name, enum_value = value
+            return _lookup(ENUMS, name)(enum_value)
+        case "register_map_type":
+            return _lookup(REGISTER_MAPS, value)
+        case "register_map":
+            name, fields = value
+            return _lookup(REGISTER_MAPS, name)(**{field: _decode(item) for field, item in fields.items()})
+        case "exception":
+            name, args = value
+            return _lookup(EXCEPTIONS, name)(*_decode(args))
+    msg = f"Unknown tag {tag!r}"
+    raise DecodeError(msg)
+
+
+def _lookup[T](allowed: dict[str, T], name: str) -> T:
+    if not isinstance(name, str) or name not in allowed:
+        msg = f"{name!r} is not allowed"
+        raise DecodeError(msg)
+    return allowed[name]
+
+
+def dumps(value: Any) -> bytes:
+    """Encode a value, raises TypeError if it contains a value that can't be encoded."""
+    return json.dumps(_encode(value), separators=(",", ":")).encode()
+
+
+def loads(data: bytes) -> Any:
+    """Decode a value, raises DecodeError if it is invalid."""
+    try:
+        return _decode(json.loads(data))
+    except DecodeError:
+        raise
+    except (ValueError, TypeError, AttributeError) as e:
+        # Malformed JSON, or a tagged value with the wrong shape or fields.
+        msg = f"Invalid encoding: {e!r}"
+        raise DecodeError(msg) from e
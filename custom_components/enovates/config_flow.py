@@ -6,13 +6,72 @@ from typing import Any
 
 import voluptuous as vol
 from enovates_modbus.eno_one import EnoOneClient
-from homeassistant.config_entries import ConfigFlow, ConfigFlowResult
-from homeassistant.const import CONF_HOST, CONF_PORT
+from homeassistant.components.sensor import SensorDeviceClass
+from homeassistant.config_entries import ConfigEntry, ConfigFlow, ConfigFlowResult, OptionsFlow
+from homeassistant.const import CONF_HOST, CONF_PORT, Platform
+from homeassistant.core import callback
 from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers import selector
 from pymodbus.exceptions import ModbusException
 
-from .const import CONF_DUAL_PORT, CONF_EMS_CONTROL, DOMAIN, LOGGER
+from .const import (
+    AGGREGATE_WINDOWS,
+    CONF_AGGREGATE_WINDOW,
+    CONF_ARCHIVE_DAYS,
+    CONF_CAPTURE,
+    CONF_DAEMON_SOCKET,
+    CONF_DUAL_PORT,
+    CONF_EMS_CONTROL,
+    CONF_FLIGHT_RECORDER,
+    CONF_IO_THREAD,
+    CONF_MAIN_FUSE,
+    CONF_METRICS,
+    CONF_PHASE_ENERGY,
+    CONF_SITE_TOTALS,
+    CONF_STALENESS_BUDGET,
+    CONF_STATISTICS,
+    CONF_SURPLUS_SENSOR,
+    CONF_TICK_BUDGET,
+    DEFAULT_STALENESS_BUDGET,
+    DEFAULT_TICK_BUDGET,
+    DOMAIN,
+    LOGGER,
+)
+
+OPTIONS_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_AGGREGATE_WINDOW, default=AGGREGATE_WINDOWS[0]): selector.SelectSelector(
+            selector.SelectSelectorConfig(
+                options=AGGREGATE_WINDOWS,
+                translation_key=CONF_AGGREGATE_WINDOW,
+                mode=selector.SelectSelectorMode.DROPDOWN,
+            ),
+        ),
+        vol.Required(CONF_PHASE_ENERGY, default=False): selector.BooleanSelector(),
+        vol.Required(CONF_STATISTICS, default=False): selector.BooleanSelector(),
+        vol.Required(CONF_STALENESS_BUDGET, default=DEFAULT_STALENESS_BUDGET): selector.NumberSelector(
+            selector.NumberSelectorConfig(min=1, max=3600, step=1, unit_of_measurement="s", mode=selector.NumberSelectorMode.BOX),
+        ),
+        vol.Required(CONF_SITE_TOTALS, default=False): selector.BooleanSelector(),
+        vol.Optional(CONF_SURPLUS_SENSOR): selector.EntitySelector(
+            selector.EntitySelectorConfig(domain=Platform.SENSOR, device_class=SensorDeviceClass.POWER),
+        ),
+        vol.Optional(CONF_MAIN_FUSE): selector.NumberSelector(
+            selector.NumberSelectorConfig(min=6, max=400, step=1, unit_of_measurement="A", mode=selector.NumberSelectorMode.BOX),
+        ),
+        vol.Required(CONF_METRICS, default=False): selector.BooleanSelector(),
+        vol.Required(CONF_CAPTURE, default=False): selector.BooleanSelector(),
+        vol.Required(CONF_FLIGHT_RECORDER, default=False): selector.BooleanSelector(),
+        vol.Required(CONF_ARCHIVE_DAYS, default=0): selector.NumberSelector(
+            selector.NumberSelectorConfig(min=0, max=365, step=1, unit_of_measurement="d", mode=selector.NumberSelectorMode.BOX),
+        ),
+        vol.Required(CONF_IO_THREAD, default=False): selector.BooleanSelector(),
+        vol.Optional(CONF_DAEMON_SOCKET): selector.TextSelector(),
+        vol.Required(CONF_TICK_BUDGET, default=DEFAULT_TICK_BUDGET): selector.NumberSelector(
+            selector.NumberSelectorConfig(min=1, max=1000, step=1, unit_of_measurement="ms", mode=selector.NumberSelectorMode.BOX),
+        ),
+    },
+)
 
 
 class EnovatesFlowHandler(ConfigFlow, domain=DOMAIN):
@@ -20,34 +79,44 @@ class EnovatesFlowHandler(ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: ConfigEntry) -> EnovatesOptionsFlow:  # noqa: ARG004
+        """Get the options flow for this handler."""
+        return EnovatesOptionsFlow()
+
     async def async_step_reconfigure(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
         """Handle reconfiguration of the integration."""
         errors: dict[str, str] = {}
         if user_input:
             client = EnoOneClient(user_input[CONF_HOST], user_input[CONF_PORT], 1, mb_timeout=1, mb_retries=10)
             try:
-                await client.check_version()
-            except (ConnectionError, ModbusException) as exception:
-                LOGGER.error(exception)
-                errors["base"] = "connection"
-            except Exception as exception:  # noqa: BLE001
-                LOGGER.exception(exception)
-                errors["base"] = "unknown"
-            else:
-                diag = await client.get_diagnostics()
-                await self.async_set_unique_id(diag.serial_nr)
-
-                self._abort_if_unique_id_mismatch(reason="wrong_device")
-
-                if user_input[CONF_EMS_CONTROL]:
-                    try:
-                        await client.get_transaction_token()
-                    except (ConnectionError, ModbusException) as exception:
-                        LOGGER.error(exception)
-                        errors["base"] = "ems_control_disabled"
-                    except Exception as exception:  # noqa: BLE001
-                        LOGGER.exception(exception)
-                        errors["base"] = "unknown"
+                try:
+                    await client.check_version()
+                except (ConnectionError, ModbusException) as exception:
+                    LOGGER.error(exception)
+                    errors["base"] = "connection"
+                except Exception as exception:  # noqa: BLE001
+                    LOGGER.exception(exception)
+                    errors["base"] = "unknown"
+                else:
+                    diag = await client.get_diagnostics()
+                    await self.async_set_unique_id(diag.serial_nr)
+
+                    self._abort_if_unique_id_mismatch(reason="wrong_device")
+
+                    if user_input[CONF_EMS_CONTROL]:
+                        try:
+                            await client.get_transaction_token()
+                        except (ConnectionError, ModbusException) as exception:
+                            LOGGER.error(exception)
+                            errors["base"] = "ems_control_disabled"
+                        except Exception as exception:  # noqa: BLE001
+                            LOGGER.exception(exception)
+                            errors["base"] = "unknown"
+            finally:
+                # The probe client is only used for validation, the entry creates its own clients.
+                client.client.close()
 
             if not errors:
                 return self.async_update_reload_and_abort(
@@ -90,28 +159,32 @@ class EnovatesFlowHandler(ConfigFlow, domain=DOMAIN):
         if user_input is not None:
             client = EnoOneClient(user_input[CONF_HOST], user_input[CONF_PORT], 1, mb_timeout=1, mb_retries=10)
             try:
-                await client.check_version()
-            except (ConnectionError, ModbusException) as exception:
-                LOGGER.error(exception)
-                errors["base"] = "connection"
-            except Exception as exception:  # noqa: BLE001
-                LOGGER.exception(exception)
-                errors["base"] = "unknown"
-            else:
-                diag = await client.get_diagnostics()
-                await self.async_set_unique_id(diag.serial_nr)
-
-                self._abort_if_unique_id_configured()
-
-                if user_input[CONF_EMS_CONTROL]:
-                    try:
-                        await client.get_transaction_token()
-                    except (ConnectionError, ModbusException) as exception:
-                        LOGGER.error(exception)
-                        errors["base"] = "ems_control_disabled"
-                    except Exception as exception:  # noqa: BLE001
-                        LOGGER.exception(exception)
-                        errors["base"] = "unknown"
+                try:
+                    await client.check_version()
+                except (ConnectionError, ModbusException) as exception:
+                    LOGGER.error(exception)
+                    errors["base"] = "connection"
+                except Exception as exception:  # noqa: BLE001
+                    LOGGER.exception(exception)
+                    errors["base"] = "unknown"
+                else:
+                    diag = await client.get_diagnostics()
+                    await self.async_set_unique_id(diag.serial_nr)
+
+                    self._abort_if_unique_id_configured()
+
+                    if user_input[CONF_EMS_CONTROL]:
+                        try:
+                            await client.get_transaction_token()
+                        except (ConnectionError, ModbusException) as exception:
+                            LOGGER.error(exception)
+                            errors["base"] = "ems_control_disabled"
+                        except Exception as exception:  # noqa: BLE001
+                            LOGGER.exception(exception)
+                            errors["base"] = "unknown"
+            finally:
+                # The probe client is only used for validation, the entry creates its own clients.
+                client.client.close()
 
             if not errors:
                 return self.async_create_entry(
@@ -147,3 +220,27 @@ class EnovatesFlowHandler(ConfigFlow, domain=DOMAIN):
             ),
             errors=errors,
         )
+
+
+class EnovatesOptionsFlow(OptionsFlow):
+    """Options flow for Enovates."""
+
+    async def async_step_init(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
+        """Manage the options."""
+        errors: dict[str, str] = {}
+        if user_input is not None:
+            # The site totals are shared by all entries, a single entry provides their entities.
+            if user_input[CONF_SITE_TOTALS] and any(
+                entry.options.get(CONF_SITE_TOTALS)
+                for entry in self.hass.config_entries.async_entries(DOMAIN)
+                if entry.entry_id != self.config_entry.entry_id
+            ):
+                errors[CONF_SITE_TOTALS] = "site_totals_provided"
+            else:
+                return self.async_create_entry(data=user_input)
+
+        return self.async_show_form(
+            step_id="init",
+            data_schema=self.add_suggested_values_to_schema(OPTIONS_SCHEMA, user_input or self.config_entry.options),
+            errors=errors,
+        )
@@ -6,5 +6,35 @@ LOGGER: Logger = getLogger(__package__)
 
 DOMAIN = "enovates"
 
+# Methods of EnoOneClient that talk to the device, for client proxies.
+DEVICE_METHODS = frozenset(
+    {
+        "fetch",
+        "check_version",
+        "get_diagnostics",
+        "get_transaction_token",
+        "get_ems_limit",
+        "set_ems_limit",
+    }
+)
+
 CONF_DUAL_PORT = "dual_port"
 CONF_EMS_CONTROL = "ems_control"
+
+CONF_AGGREGATE_WINDOW = "aggregate_window"
+AGGREGATE_WINDOWS = ["0", "1", "5", "15"]  # minutes, 0 is disabled
+CONF_METRICS = "metrics"
+CONF_CAPTURE = "capture"
+CONF_FLIGHT_RECORDER = "flight_recorder"
+CONF_IO_THREAD = "io_thread"
+CONF_DAEMON_SOCKET = "daemon_socket"
+CONF_TICK_BUDGET = "tick_budget"
+DEFAULT_TICK_BUDGET = 50  # ms
+CONF_STALENESS_BUDGET = "staleness_budget"
+DEFAULT_STALENESS_BUDGET = 10  # s
+CONF_SITE_TOTALS = "site_totals"
+CONF_PHASE_ENERGY = "phase_energy"
+CONF_SURPLUS_SENSOR = "surplus_sensor"
+CONF_MAIN_FUSE = "main_fuse"
+CONF_STATISTICS = "statistics"
+CONF_ARCHIVE_DAYS = "archive_days"
@@ -1,12 +1,535 @@
 """Helpers for Enovates integration."""
 
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
 from enovates_modbus.base import RegisterMap
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from pymodbus import ModbusException
+
+from .const import DOMAIN
+from .data import PortSnapshot
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Iterable, Iterator, Mapping
+    from datetime import timedelta
+
+    from enovates_modbus.eno_one import EnoOneClient
+    from homeassistant.core import CALLBACK_TYPE, HomeAssistant
+    from homeassistant.helpers.entity import Entity
+
+    from .data import EnovatesConfigEntry
+
+
+# Time a cancelled refresh gets to finish on shutdown, so a slow or offline charger can't stall an unload or restart.
+SHUTDOWN_TIMEOUT = 2
+
+
+@dataclass(frozen=True, kw_only=True)
+class RetryPolicy:
+    """
+    Retry policy for a register map.
+
+    `retries` are immediate extra attempts within the same tick.
+    If `backoff` is set, a failed read is retried after that delay, doubling per consecutive failure (up to `max_backoff`),
+    until the read succeeds and the regular refresh frequency is restored.
+    Without `backoff`, a failed read is left for its next regular tick.
+    """
+
+    retries: int = 0
+    backoff: timedelta | None = None
+    max_backoff: timedelta | None = None
+
+
+@dataclass(frozen=True, kw_only=True)
+class PollingSchedule:
+    """
+    Register maps read from a port, and how.
+
+    `groups` are register maps that are always read together, they must share the same refresh frequency.
+    A failed read keeps the last value of a register map until it is older than its `staleness_budget`.
+    """
+
+    refresh_frequency: Mapping[type[RegisterMap], timedelta]
+    retry_policy: Mapping[type[RegisterMap], RetryPolicy]
+    groups: Iterable[tuple[type[RegisterMap], ...]] = ()
+    staleness_budget: Mapping[type[RegisterMap], timedelta] = field(default_factory=dict)
+
+
+async def async_retry[R](policy: RetryPolicy, call: Callable[[], Awaitable[R]]) -> R:
+    """Call `call`, retrying Modbus and connection errors up to `policy.retries` times."""
+    attempt = 0
+    while True:
+        try:
+            return await call()
+        except (ConnectionError, ModbusException):
+            if attempt >= policy.retries:
+                raise
+            attempt += 1
+
+
+@dataclass(kw_only=True)
+class ReadStats:
+    """Cumulative read statistics of a register map."""
+
+    reads: int = 0
+    errors: int = 0
+    latency: float = 0
+    """Total duration of all reads (including failed reads), in seconds."""
 
 
-class EnovatesDUCoordinator[T: RegisterMap](DataUpdateCoordinator[T]):
+class TickCost:
     """
-    Enovates Data Update Coordinator.
+    Event loop time spent by the integration in the current tick, per category.
 
-    Exists for correct typing constraints only.
+    + update: processing in the coordinators, excluding the Modbus I/O.
+    + listeners: listener fan-out after an update.
+    + state_writes: the batched entity state writes.
+    + value_fn: evaluation of the entity value functions, part of the listeners and state_writes.
     """
+
+    def __init__(self) -> None:
+        """Initialize the cost meter."""
+        self.current: defaultdict[str, float] = defaultdict(float)
+
+    def add(self, category: str, seconds: float) -> None:
+        """Add time to a category."""
+        self.current[category] += seconds
+
+    @contextmanager
+    def measure(self, category: str) -> Iterator[None]:
+        """Add the duration of the block to a category."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.current[category] += time.perf_counter() - start
+
+    def end_tick(self) -> dict[str, float]:
+        """Return the costs of the tick, and start a new one."""
+        costs, self.current = dict(self.current), defaultdict(float)
+        return costs
+
+
+class TickBatch:
+    """
+    Tick-aligned batching of entity state writes for all ports of a charger.
+
+    The ports share the same scheduling grid, so their ticks coincide.
+    State writes requested while any of them is refreshing are deferred and flushed together (once per entity)
+    when the last one finishes, or after `max_delay` seconds so a slow port can't hold back the others.
+    """
+
+    def __init__(self, hass: HomeAssistant, max_delay: float = 0.5) -> None:
+        """Initialize the batch."""
+        self.hass = hass
+        self.max_delay = max_delay
+        self.grid_anchor: float | None = None
+        self._in_flight: set[object] = set()
+        self._pending: dict[Entity, None] = {}
+        self._unsub_flush: CALLBACK_TYPE | None = None
+        self.cost = TickCost()
+        self._tick_listeners: list[Callable[[dict[str, float]], None]] = []
+
+    @callback
+    def async_add_tick_listener(self, tick_callback: Callable[[dict[str, float]], None]) -> CALLBACK_TYPE:
+        """Listen for the end of ticks, with the tick's costs in seconds per category."""
+        self._tick_listeners.append(tick_callback)
+        return lambda: self._tick_listeners.remove(tick_callback)
+
+    @callback
+    def async_start(self, key: object) -> None:
+        """Mark the start of a refresh."""
+        self._in_flight.add(key)
+
+    @callback
+    def async_finish(self, key: object) -> None:
+        """Mark the end of a refresh, flush if it was the last one."""
+        self._in_flight.discard(key)
+        if not self._in_flight:
+            with self.cost.measure("state_writes"):
+                self.async_flush()
+            costs = self.cost.end_tick()
+            for tick_callback in list(self._tick_listeners):
+                tick_callback(costs)
+
+    @callback
+    def async_schedule_write(self, entity: Entity) -> None:
+        """Write the entity state at the end of the tick, or immediately if no refresh is in progress."""
+        if not self._in_flight:
+            entity.async_write_ha_state()
+            return
+        self._pending[entity] = None
+        if self._unsub_flush is None:
+            self._unsub_flush = self.hass.loop.call_later(self.max_delay, self.async_flush).cancel
+
+    @callback
+    def async_flush(self) -> None:
+        """Write all deferred entity states."""
+        self.async_cancel()
+        pending, self._pending = self._pending, {}
+        for entity in pending:
+            entity.async_write_ha_state()
+
+    @callback
+    def async_cancel(self) -> None:
+        """Cancel the delayed flush."""
+        if self._unsub_flush is not None:
+            self._unsub_flush()
+            self._unsub_flush = None
+
+
+class EnovatesDUCoordinator(DataUpdateCoordinator[PortSnapshot]):
+    """
+    Enovates Data Update Coordinator, one per port.
+
+    Every tick, the register maps that are due are read and merged into a new PortSnapshot.
+    Each register map is read at its own refresh frequency and handled according to its own retry policy.
+    Register maps in the same group are read back to back, and only updated together.
+    A register map that fails keeps its last value and is marked as failed in the snapshot,
+    only a failure during the first refresh fails the whole coordinator.
+    The last value of a failed register map is used until it is older than its staleness budget.
+
+    Ticks are scheduled on a fixed-rate grid instead of relative to the end of the previous refresh,
+    so the polling rate does not drift with the Modbus latency.
+    Grid ticks that pass while a read is still running are skipped (and counted in `skipped_ticks`), not queued.
+    Coordinators sharing a TickBatch share the grid, and the entity state writes of their ticks are batched.
+    """
+
+    sample_time: float | None = None
+    """Monotonic (event loop clock) acquisition time of `data`, the midpoint of the tick's reads."""
+
+    skipped_ticks: int = 0
+    """Number of scheduled ticks skipped because the previous read overran them."""
+
+    refreshes: int = 0
+    """Number of completed refreshes (ticks), regardless of their outcome."""
+
+    def __init__(
+        self,
+        *args: Any,
+        device_id: int,
+        client: EnoOneClient,
+        schedule: PollingSchedule,
+        tick_batch: TickBatch | None = None,
+        **kwargs: Any,
+    ) -> None:
+        """Initialize the coordinator."""
+        refresh_frequency = schedule.refresh_frequency
+        super().__init__(*args, update_interval=min(refresh_frequency.values()), **kwargs)
+        self.tick_batch = tick_batch or TickBatch(self.hass)
+        self.device_id = device_id
+        self.client = client
+        self.refresh_frequency = refresh_frequency
+        self.retry_policy = schedule.retry_policy
+        self.staleness_budget = schedule.staleness_budget
+
+        groups = [group for group in schedule.groups if group[0] in refresh_frequency]
+        grouped = {rm_type for group in groups for rm_type in group}
+        self._units: list[tuple[type[RegisterMap], ...]] = [
+            *groups,
+            *((rm_type,) for rm_type in refresh_frequency if rm_type not in grouped),
+        ]
+        self.next_due: dict[type[RegisterMap], float] = dict.fromkeys(refresh_frequency, -math.inf)
+        """Monotonic (event loop clock) time a register map is due to be read again."""
+        self.stats: dict[type[RegisterMap], ReadStats] = {rm_type: ReadStats() for rm_type in refresh_frequency}
+        """Read statistics per register map, register maps in a group are counted per group read."""
+
+        self.boost: dict[type[RegisterMap], timedelta] = {}
+        """Temporary refresh frequencies, see `async_boost`."""
+        self._failures: dict[type[RegisterMap], int] = dict.fromkeys(refresh_frequency, 0)
+        self._version = 0
+        self._scheduled = False
+        self._grid_anchor: float | None = None
+        self._grid_interval: float | None = None
+        self._last_tick: float | None = None
+        self._refresh_task: asyncio.Task[Any] | None = None
+
+    def age(self, rm_type: type[RegisterMap]) -> float | None:
+        """Age of the latest value of a register map in seconds, None if it was never read."""
+        if self.data is None or (sample_time := self.data.sample_times.get(rm_type)) is None:
+            return None
+        return self.hass.loop.time() - sample_time
+
+    def is_stale(self, rm_type: type[RegisterMap]) -> bool:
+        """Whether the latest value of a register map is older than its staleness budget (or was never read)."""
+        if (age := self.age(rm_type)) is None:
+            return True
+        budget = self.staleness_budget.get(rm_type)
+        return budget is None or age > budget.total_seconds()
+
+    def _unit_interval(self, unit: tuple[type[RegisterMap], ...]) -> timedelta:
+        return min(self.boost.get(rm_type, self.refresh_frequency[rm_type]) for rm_type in unit)
+
+    @callback
+    def async_boost(self, register_maps: Iterable[type[RegisterMap]], interval: timedelta) -> CALLBACK_TYPE:
+        """
+        Temporarily read register maps at (at least) `interval`, returns a callback to restore their refresh frequency.
+
+        A boosted register map that is part of a group speeds up the whole group.
+        """
+        register_maps = [rm_type for rm_type in register_maps if rm_type in self.refresh_frequency]
+        self.boost.update(dict.fromkeys(register_maps, interval))
+        # Don't wait for the regular refresh to start the faster reads.
+        now = self.hass.loop.time()
+        for unit in self._units:
+            if not set(unit).isdisjoint(register_maps):
+                self.next_due.update({rm_type: min(self.next_due[rm_type], now) for rm_type in unit})
+        self._async_apply_boost()
+
+        @callback
+        def _restore() -> None:
+            for rm_type in register_maps:
+                self.boost.pop(rm_type, None)
+            self._async_apply_boost()
+
+        return _restore
+
+    @callback
+    def _async_apply_boost(self) -> None:
+        self.update_interval = min(self._unit_interval(unit) for unit in self._units)
+        # Reschedule now if waiting for the next tick. A refresh in progress reschedules with the new interval when it's done.
+        if self._unsub_refresh is not None:
+            self._schedule_refresh()
+
+    @callback
+    def _schedule_refresh(self) -> None:
+        if self.update_interval is None:
+            return
+
+        if self.config_entry and self.config_entry.pref_disable_polling:
+            return
+
+        self._async_unsub_refresh()
+
+        now = self.hass.loop.time()
+        interval = self.update_interval.total_seconds()
+        if self._grid_anchor is None or self._grid_interval != interval:
+            if self.tick_batch.grid_anchor is None:
+                self.tick_batch.grid_anchor = now
+            self._grid_anchor = self.tick_batch.grid_anchor
+            self._grid_interval = interval
+            self._last_tick = None
+
+        next_tick = self._grid_anchor + (math.floor((now - self._grid_anchor) / interval) + 1) * interval
+        if self._last_tick is not None:
+            self.skipped_ticks += max(0, round((next_tick - self._last_tick) / interval) - 1)
+            self._last_tick = None
+
+        self._unsub_refresh = self.hass.loop.call_at(next_tick, self._handle_tick, next_tick).cancel
+
+    @callback
+    def _handle_tick(self, tick: float) -> None:
+        self._last_tick = tick
+        self._scheduled = True
+        if self.config_entry:
+            self.config_entry.async_create_background_task(
+                self.hass,
+                self._handle_refresh_interval(),
+                name=f"{self.name} - {self.config_entry.title} - refresh",
+                eager_start=True,
+            )
+        else:
+            self.hass.async_create_background_task(
+                self._handle_refresh_interval(),
+                name=f"{self.name} - refresh",
+                eager_start=True,
+            )
+
+    async def _async_refresh(self, *args: Any, **kwargs: Any) -> None:
+        self._refresh_task = asyncio.current_task()
+        self.tick_batch.async_start(self)
+        try:
+            await super()._async_refresh(*args, **kwargs)
+        finally:
+            self._refresh_task = None
+            self.tick_batch.async_finish(self)
+
+    async def async_shutdown(self) -> None:
+        """Stop refreshing, and cancel a refresh in progress instead of waiting for its reads (and retries) to time out."""
+        await super().async_shutdown()
+        task = self._refresh_task
+        if task is None or task is asyncio.current_task():
+            return
+        task.cancel()
+        _, pending = await asyncio.wait({task}, timeout=SHUTDOWN_TIMEOUT)
+        if pending:
+            self.logger.warning("Port %s: refresh did not stop within %s seconds of being cancelled", self.device_id, SHUTDOWN_TIMEOUT)
+
+    def _retry_delay(self, rm_type: type[RegisterMap]) -> float:
+        interval = self.refresh_frequency[rm_type]
+        policy = self.retry_policy[rm_type]
+        if policy.backoff is None:
+            return interval.total_seconds()
+        delay = policy.backoff * 2 ** min(self._failures[rm_type] - 1, 16)
+        if policy.max_backoff is not None:
+            delay = min(delay, policy.max_backoff)
+        return min(delay, interval).total_seconds()
+
+    async def _async_fetch_unit(self, unit: tuple[type[RegisterMap], ...]) -> dict[type[RegisterMap], RegisterMap]:
+        values: dict[type[RegisterMap], RegisterMap] = {}
+        for rm_type in unit:
+            try:
+                values[rm_type] = await async_retry(self.retry_policy[rm_type], lambda rm_type=rm_type: self.client.fetch(rm_type))
+            except (ConnectionError, ModbusException) as e:
+                raise UpdateFailed(
+                    translation_domain=DOMAIN,
+                    translation_key="update_failed",
+                    translation_placeholders={
+                        "port": self.device_id,
+                        "rm_type": rm_type.__name__,
+                        "e": repr(e),
+                    },
+                ) from e
+        return values
+
+    def _record_read(self, unit: tuple[type[RegisterMap], ...], start: float, *, error: bool) -> None:
+        latency = self.hass.loop.time() - start
+        for rm_type in unit:
+            stats = self.stats[rm_type]
+            stats.reads += 1
+            stats.errors += error
+            stats.latency += latency
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update all registered listeners, accounting the cost to the tick."""
+        with self.tick_batch.cost.measure("listeners"):
+            super().async_update_listeners()
+
+    async def _async_update_data(self) -> PortSnapshot:
+        # Scheduled ticks only read what is due, a first or requested refresh reads everything.
+        scheduled, self._scheduled = self._scheduled, False
+        start = self.hass.loop.time()
+        cpu_start = time.perf_counter()
+        io_time = 0.0
+        tolerance = self.update_interval.total_seconds() / 2 if self.update_interval else 0
+
+        previous = self.data
+        register_maps = dict(previous.register_maps) if previous else {}
+        sample_times = dict(previous.sample_times) if previous else {}
+        failed = set(previous.failed) if previous else set()
+        first_error: UpdateFailed | None = None
+
+        for unit in self._units:
+            if scheduled and self.next_due[unit[0]] > start + tolerance:
+                continue
+
+            unit_start = self.hass.loop.time()
+            io_start = time.perf_counter()
+            try:
+                values = await self._async_fetch_unit(unit)
+            except UpdateFailed as e:
+                io_time += time.perf_counter() - io_start
+                self._record_read(unit, unit_start, error=True)
+                first_error = first_error or e
+                self._failures[unit[0]] += 1
+                next_due = unit_start + self._retry_delay(unit[0])
+                if not failed.issuperset(unit):
+                    self.logger.info("%s", e)
+                failed.update(unit)
+            else:
+                io_time += time.perf_counter() - io_start
+                self._record_read(unit, unit_start, error=False)
+                sample_time = (unit_start + self.hass.loop.time()) / 2
+                register_maps.update(values)
+                sample_times.update(dict.fromkeys(unit, sample_time))
+                if failed.intersection(unit):
+                    self.logger.info("Port %s: %s register block(s) recovered", self.device_id, ", ".join(t.__name__ for t in unit))
+                failed.difference_update(unit)
+                self._failures[unit[0]] = 0
+                next_due = start + self._unit_interval(unit).total_seconds()
+            self.next_due.update(dict.fromkeys(unit, next_due))
+
+        self.refreshes += 1
+        self.tick_batch.cost.add("update", time.perf_counter() - cpu_start - io_time)
+        if previous is None and first_error is not None:
+            raise first_error
+
+        self._version += 1
+        self.sample_time = (start + self.hass.loop.time()) / 2
+        return PortSnapshot(
+            version=self._version,
+            sample_time=self.sample_time,
+            register_maps=register_maps,
+            sample_times=sample_times,
+            failed=frozenset(failed),
+        )
+
+
+class EnovatesRegisterMapView[T: RegisterMap]:
+    """
+    Typed view on one Register Map of a port coordinator.
+
+    Quacks like a coordinator for `CoordinatorEntity`, but only calls its listeners when its own Register Map
+    (or the availability) changed, like `always_update=False` would for a dedicated coordinator.
+    """
+
+    def __init__(self, coordinator: EnovatesDUCoordinator, rm_type: type[T]) -> None:
+        """Initialize the view."""
+        self.coordinator = coordinator
+        self.rm_type = rm_type
+
+    @property
+    def config_entry(self) -> EnovatesConfigEntry:
+        """Config entry of the underlying coordinator."""
+        return self.coordinator.config_entry
+
+    @property
+    def data(self) -> T:
+        """Register Map from the latest snapshot."""
+        return self.coordinator.data.get(self.rm_type)
+
+    @property
+    def sample_time(self) -> float | None:
+        """Monotonic (event loop clock) acquisition time of the Register Map."""
+        snapshot = self.coordinator.data
+        return snapshot.sample_times.get(self.rm_type) if snapshot is not None else None
+
+    @property
+    def age(self) -> float | None:
+        """Age of the Register Map in seconds."""
+        return self.coordinator.age(self.rm_type)
+
+    @property
+    def last_update_success(self) -> bool:
+        """Whether the latest read of the Register Map succeeded, or the failed read(s) are within the staleness budget."""
+        snapshot = self.coordinator.data
+        if not self.coordinator.last_update_success or snapshot is None:
+            return False
+        return self.rm_type not in snapshot.failed or not self.coordinator.is_stale(self.rm_type)
+
+    @property
+    def last_exception(self) -> Exception | None:
+        """Last exception of the underlying coordinator."""
+        return self.coordinator.last_exception
+
+    async def async_request_refresh(self) -> None:
+        """Request a refresh of the port."""
+        await self.coordinator.async_request_refresh()
+
+    @callback
+    def async_add_listener(self, update_callback: CALLBACK_TYPE, context: Any = None) -> CALLBACK_TYPE:
+        """Listen for changes of this Register Map."""
+        last = self._state()
+
+        @callback
+        def _filtered() -> None:
+            nonlocal last
+            if (current := self._state()) != last:
+                last = current
+                update_callback()
+
+        return self.coordinator.async_add_listener(_filtered, context)
+
+    def _state(self) -> tuple[bool, T | None]:
+        snapshot = self.coordinator.data
+        return self.last_update_success, snapshot.get(self.rm_type) if snapshot is not None else None
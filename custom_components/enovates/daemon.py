@@ -0,0 +1,314 @@
+"""
+Out-of-process polling daemon for Enovates chargers.
+
+The daemon owns the Modbus connections and the polling schedule, and publishes the decoded register maps
+to the integration over a Unix socket. Pollers outlive their subscribers for a while, so Home Assistant can restart
+without gaps: a subscriber that reconnects gets the snapshots it missed replayed from a ring buffer.
+
+This module only depends on the standard library, enovates-modbus and pymodbus (like codec.py), so it can run outside
+Home Assistant:
+
+    python custom_components/enovates/daemon.py --socket /run/enovates.sock
+
+Messages in both directions are length-prefixed tuples, encoded with codec.py:
+
++ `("subscribe", key, refresh_frequency, groups, backoff, last_seq)` Start receiving snapshots of a port.
+  `key` is `(host, port, device_id)`, `refresh_frequency` maps register map names to seconds.
+  `backoff` maps the names of register maps that are retried with backoff to the initial and maximum delay in seconds.
++ `("replayed", key)` Sent after the snapshots that are replayed on subscribe, so they can be handled as one batch.
++ `("call", call_id, key, method, args)` Call a device method, answered with `("result", call_id, result, exception)`.
++ `("snapshot", key, seq, sample_time, register_maps, sample_times, failed)` Published after every poll.
+  `register_maps` maps register maps to their latest value, `sample_times` to the (unix) time they were read,
+  `failed` holds the ones that failed on their latest read.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import logging
+import math
+import struct
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any
+
+from enovates_modbus.eno_one import EnoOneClient
+from pymodbus import ModbusException
+
+try:
+    from .codec import REGISTER_MAPS, DecodeError, dumps, loads
+except ImportError:  # Run as a script
+    from codec import REGISTER_MAPS, DecodeError, dumps, loads  # type: ignore[no-redef]
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from enovates_modbus.base import RegisterMap
+
+LOGGER = logging.getLogger(__name__)
+
+_LENGTH = struct.Struct("<I")
+
+type PortKey = tuple[str, int, int]
+
+# Methods of EnoOneClient that can be called through the daemon, same as const.DEVICE_METHODS.
+CALLABLE_METHODS = frozenset({"fetch", "check_version", "get_diagnostics", "get_transaction_token", "get_ems_limit", "set_ems_limit"})
+
+
+async def read_message(reader: asyncio.StreamReader) -> tuple[Any, ...]:
+    """Read one message, raises IncompleteReadError when the connection is closed and DecodeError if it is invalid."""
+    (length,) = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))
+    message = loads(await reader.readexactly(length))
+    if not isinstance(message, tuple) or not message:
+        msg = f"Invalid message {message!r}"
+        raise DecodeError(msg)
+    return message
+
+
+def encode_message(*message: Any) -> bytes:
+    """Encode one message."""
+    payload = dumps(message)
+    return _LENGTH.pack(len(payload)) + payload
+
+
+def _register_map(name: str) -> type[RegisterMap]:
+    if (rm_type := REGISTER_MAPS.get(name)) is None:
+        msg = f"{name!r} is not a register map"
+        raise DecodeError(msg)
+    return rm_type
+
+
+class Poller:
+    """
+    Polls one port on a fixed-rate grid, and publishes a snapshot after every poll.
+
+    Register maps in a group are read back to back and only updated together.
+    A failed register map keeps its last value. It is retried after its backoff delay, doubling per consecutive failure
+    up to the maximum, or without backoff at its next regular read.
+    """
+
+    def __init__(
+        self,
+        key: PortKey,
+        refresh_frequency: dict[type[RegisterMap], float],
+        groups: Iterable[tuple[type[RegisterMap], ...]],
+        backoff: dict[type[RegisterMap], tuple[float, float | None]],
+        history: int,
+    ) -> None:
+        """Initialize the poller."""
+        self.key = key
+        host, port, device_id = key
+        self.client = EnoOneClient(host=host, port=port, device_id=device_id, mb_retries=0, mb_timeout=3)
+        self.refresh_frequency = refresh_frequency
+        self.backoff = backoff
+        self.interval = min(refresh_frequency.values())
+        grouped = {rm_type for group in groups for rm_type in group}
+        self.units: list[tuple[type[RegisterMap], ...]] = [
+            *(group for group in groups if group[0] in refresh_frequency),
+            *((rm_type,) for rm_type in refresh_frequency if rm_type not in grouped),
+        ]
+        self.next_due: dict[tuple[type[RegisterMap], ...], float] = dict.fromkeys(self.units, -math.inf)
+        self.failures: dict[tuple[type[RegisterMap], ...], int] = dict.fromkeys(self.units, 0)
+        self.register_maps: dict[type[RegisterMap], RegisterMap] = {}
+        self.sample_times: dict[type[RegisterMap], float] = {}
+        self.failed: set[type[RegisterMap]] = set()
+        self.seq = 0
+        self.history: deque[bytes] = deque(maxlen=history)
+        self.subscribers: set[asyncio.StreamWriter] = set()
+        self.idle_since: float | None = time.monotonic()
+        self.task: asyncio.Task[None] | None = None
+
+    def replay(self, writer: asyncio.StreamWriter, last_seq: int | None) -> None:
+        """Send the snapshots after `last_seq`, or only the latest if `last_seq` is None."""
+        if last_seq is None or last_seq > self.seq:
+            # New subscriber, or the daemon restarted since.
+            messages = list(self.history)[-1:]
+        else:
+            # Seq of the oldest snapshot in the history.
+            first = self.seq - len(self.history) + 1
+            messages = list(self.history)[max(0, last_seq + 1 - first) :]
+        for message in messages:
+            writer.write(message)
+        writer.write(encode_message("replayed", self.key))
+
+    async def run(self) -> None:
+        """Poll until cancelled."""
+        loop = asyncio.get_running_loop()
+        anchor = loop.time()
+        while True:
+            await self.poll(loop.time())
+            # Skip ticks that passed while polling.
+            tick = anchor + (math.floor((loop.time() - anchor) / self.interval) + 1) * self.interval
+            await asyncio.sleep(tick - loop.time())
+
+    def retry_delay(self, unit: tuple[type[RegisterMap], ...]) -> float:
+        """Delay before a failed unit is read again, same as the coordinator for its retry policy."""
+        interval = self.refresh_frequency[unit[0]]
+        if unit[0] not in self.backoff:
+            return interval
+        backoff, max_backoff = self.backoff[unit[0]]
+        delay = backoff * 2 ** min(self.failures[unit] - 1, 16)
+        if max_backoff is not None:
+            delay = min(delay, max_backoff)
+        return min(delay, interval)
+
+    async def poll(self, now: float) -> None:
+        """Read the due register maps and publish a snapshot."""
+        start = time.time()
+        for unit in self.units:
+            if self.next_due[unit] > now + self.interval / 2:
+                continue
+            unit_start = time.time()
+            try:
+                values = {rm_type: await self.client.fetch(rm_type) for rm_type in unit}
+            except (ConnectionError, ModbusException) as e:
+                if not self.failed.issuperset(unit):
+                    LOGGER.info("%s: reading %s failed: %r", self.key, ", ".join(t.__name__ for t in unit), e)
+                self.failed.update(unit)
+                self.failures[unit] += 1
+                self.next_due[unit] = now + self.retry_delay(unit)
+            else:
+                self.failures[unit] = 0
+                self.next_due[unit] = now + self.refresh_frequency[unit[0]]
+                self.register_maps.update(values)
+                self.sample_times.update(dict.fromkeys(unit, (unit_start + time.time()) / 2))
+                self.failed.difference_update(unit)
+
+        if not self.register_maps:
+            return
+        self.seq += 1
+        message = encode_message(
+            "snapshot",
+            self.key,
+            self.seq,
+            (start + time.time()) / 2,
+            dict(self.register_maps),
+            dict(self.sample_times),
+            frozenset(self.failed),
+        )
+        self.history.append(message)
+        for writer in list(self.subscribers):
+            if writer.is_closing():
+                self.subscribers.discard(writer)
+            else:
+                writer.write(message)
+
+
+class PollingDaemon:
+    """Serves subscribers on a Unix socket, with one poller per port."""
+
+    def __init__(self, socket_path: str, *, history: int = 3600, linger: float = 600) -> None:
+        """Initialize the daemon, `history` is the number of snapshots kept per port, `linger` how long a poller outlives its subscribers."""
+        self.socket_path = socket_path
+        self.history = history
+        self.linger = linger
+        self.pollers: dict[PortKey, Poller] = {}
+
+    async def serve(self) -> None:
+        """Serve until cancelled."""
+        server = await asyncio.start_unix_server(self._handle_connection, path=self.socket_path)
+        reaper = asyncio.create_task(self._reap())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            reaper.cancel()
+            for poller in self.pollers.values():
+                if poller.task is not None:
+                    poller.task.cancel()
+                poller.client.client.close()
+
+    async def _reap(self) -> None:
+        while True:
+            await asyncio.sleep(self.linger / 10)
+            now = time.monotonic()
+            for key, poller in list(self.pollers.items()):
+                if poller.idle_since is not None and now - poller.idle_since > self.linger:
+                    LOGGER.info("%s: no subscribers, stopping", key)
+                    if poller.task is not None:
+                        poller.task.cancel()
+                    poller.client.client.close()
+                    del self.pollers[key]
+
+    def _subscribe(self, writer: asyncio.StreamWriter, message: tuple[Any, ...]) -> Poller:
+        _, key, refresh_frequency, groups, backoff, last_seq = message
+        key = (str(key[0]), int(key[1]), int(key[2]))
+        if (poller := self.pollers.get(key)) is None:
+            self.pollers[key] = poller = Poller(
+                key,
+                {_register_map(name): float(seconds) for name, seconds in refresh_frequency.items()},
+                [tuple(_register_map(name) for name in group) for group in groups],
+                {
+                    _register_map(name): (float(initial), None if maximum is None else float(maximum))
+                    for name, (initial, maximum) in backoff.items()
+                },
+                self.history,
+            )
+            poller.task = asyncio.create_task(poller.run())
+            LOGGER.info("%s: started polling", key)
+        poller.replay(writer, last_seq)
+        poller.subscribers.add(writer)
+        poller.idle_since = None
+        return poller
+
+    async def _call(self, writer: asyncio.StreamWriter, message: tuple[Any, ...]) -> None:
+        _, call_id, key, method, args = message
+        result: Any = None
+        exception: Exception | None = None
+        try:
+            if method not in CALLABLE_METHODS:
+                raise AttributeError(method)  # noqa: TRY301
+            poller = self.pollers.get(tuple(key))
+            if poller is None:
+                raise ConnectionError(f"{key} is not subscribed")  # noqa: TRY301
+            result = await getattr(poller.client, method)(*args)
+        except Exception as e:  # noqa: BLE001 Passed on to the caller
+            exception = e
+        if not writer.is_closing():
+            writer.write(encode_message("result", call_id, result, exception))
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        subscribed: list[Poller] = []
+        calls: set[asyncio.Task[None]] = set()
+        try:
+            while True:
+                message = await read_message(reader)
+                if message[0] == "subscribe":
+                    subscribed.append(self._subscribe(writer, message))
+                elif message[0] == "call":
+                    task = asyncio.create_task(self._call(writer, message))
+                    calls.add(task)
+                    task.add_done_callback(calls.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except (ValueError, TypeError):  # A DecodeError, or a message with invalid fields
+            LOGGER.exception("Invalid message, closing connection")
+        finally:
+            for task in calls:
+                task.cancel()
+            for poller in subscribed:
+                poller.subscribers.discard(writer)
+                if not poller.subscribers:
+                    poller.idle_since = time.monotonic()
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+
+def main() -> None:
+    """Run the daemon."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--socket", required=True, help="Path of the Unix socket to listen on.")
+    parser.add_argument("--history", type=int, default=3600, help="Number of snapshots kept per port, for subscribers that reconnect.")
+    parser.add_argument("--linger", type=float, default=600, help="Seconds a port keeps being polled without subscribers.")
+    parser.add_argument("--debug", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.INFO)
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(PollingDaemon(args.socket, history=args.history, linger=args.linger).serve())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""Subscriber side of the Enovates polling daemon, see daemon.py."""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import time
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import UpdateFailed
+
+from .codec import DecodeError
+from .const import DEVICE_METHODS, DOMAIN, LOGGER
+from .coordinator import EnovatesDUCoordinator
+from .daemon import encode_message, read_message
+from .data import PortSnapshot
+
+if TYPE_CHECKING:
+    from enovates_modbus.base import RegisterMap
+    from homeassistant.core import CALLBACK_TYPE, HomeAssistant
+
+    from .daemon import PortKey
+
+CALL_TIMEOUT = 10
+FIRST_SNAPSHOT_TIMEOUT = 10
+MAX_RECONNECT_DELAY = 30
+
+
+class DaemonConnection:
+    """
+    Connection to the polling daemon, shared by the ports of a config entry.
+
+    Reconnects with backoff, and resubscribes with the last received seq so the daemon replays the missed snapshots.
+    """
+
+    def __init__(self, hass: HomeAssistant, socket_path: str) -> None:
+        """Initialize the connection."""
+        self.hass = hass
+        self.socket_path = socket_path
+        self.subscribers: dict[PortKey, EnovatesDaemonCoordinator] = {}
+        self._writer: asyncio.StreamWriter | None = None
+        self._calls: dict[int, asyncio.Future[Any]] = {}
+        self._call_ids = itertools.count()
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Start connecting, returns a callback to disconnect."""
+        task = self.hass.async_create_background_task(self._async_run(), name=f"{DOMAIN} daemon connection {self.socket_path}")
+
+        @callback
+        def _stop() -> None:
+            # Not task.cancel itself, unload callbacks must not return anything.
+            task.cancel()
+
+        return _stop
+
+    async def async_call(self, key: PortKey, method: str, args: tuple[Any, ...]) -> Any:
+        """Call a device method through the daemon."""
+        if self._writer is None:
+            msg = f"Not connected to the polling daemon at {self.socket_path}"
+            raise ConnectionError(msg)
+        call_id = next(self._call_ids)
+        self._calls[call_id] = future = self.hass.loop.create_future()
+        try:
+            self._writer.write(encode_message("call", call_id, key, method, args))
+            async with asyncio.timeout(CALL_TIMEOUT):
+                return await future
+        finally:
+            self._calls.pop(call_id, None)
+
+    async def _async_run(self) -> None:
+        delay = 1
+        while True:
+            try:
+                reader, self._writer = await asyncio.open_unix_connection(self.socket_path)
+                for key, coordinator in self.subscribers.items():
+                    coordinator.async_start_replay()
+                    self._writer.write(encode_message("subscribe", key, *coordinator.subscription, coordinator.last_seq))
+                delay = 1
+                while True:
+                    self._handle_message(await read_message(reader))
+            except (OSError, asyncio.IncompleteReadError, DecodeError) as e:
+                LOGGER.info("Polling daemon connection at %s lost: %r", self.socket_path, e)
+            finally:
+                if self._writer is not None:
+                    self._writer.close()
+                    self._writer = None
+                for future in self._calls.values():
+                    if not future.done():
+                        future.set_exception(ConnectionError("Polling daemon connection lost"))
+                for coordinator in self.subscribers.values():
+                    coordinator.async_end_replay()
+                    coordinator.async_set_update_error(UpdateFailed("Polling daemon connection lost"))
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+    @callback
+    def _handle_message(self, message: tuple[Any, ...]) -> None:
+        if message[0] == "snapshot":
+            _, key, seq, sample_time, register_maps, sample_times, failed = message
+            if (coordinator := self.subscribers.get(tuple(key))) is not None:
+                coordinator.async_handle_snapshot(seq, sample_time, register_maps, sample_times, failed)
+        elif message[0] == "replayed":
+            if (coordinator := self.subscribers.get(tuple(message[1]))) is not None:
+                coordinator.async_end_replay()
+        elif message[0] == "result":
+            _, call_id, result, exception = message
+            if (future := self._calls.get(call_id)) is not None and not future.done():
+                if exception is not None:
+                    future.set_exception(exception)
+                else:
+                    future.set_result(result)
+
+
+class _DaemonTransport:
+    """Stand-in for the pymodbus client, which is closed on unload. The daemon owns the connection."""
+
+    def close(self) -> None:
+        """Nothing to close."""
+
+
+class DaemonClient:
+    """EnoOneClient replacement that calls the device through the daemon."""
+
+    def __init__(self, connection: DaemonConnection, key: PortKey) -> None:
+        """Initialize the client."""
+        self.connection = connection
+        self.key = key
+        self.device_id = key[2]
+        self.client = _DaemonTransport()
+
+    def __getattr__(self, name: str) -> Any:
+        """Call a device method through the daemon."""
+        if name not in DEVICE_METHODS:
+            raise AttributeError(name)
+
+        async def _remote(*args: Any) -> Any:
+            return await self.connection.async_call(self.key, name, args)
+
+        return _remote
+
+
+class EnovatesDaemonCoordinator(EnovatesDUCoordinator):
+    """
+    Port coordinator that subscribes to the polling daemon instead of polling.
+
+    The daemon schedules and reads the register maps, every published snapshot is passed on as-is.
+    Refresh requests (e.g. after setting the EMS limit) return the latest snapshot, as the daemon polls every second anyway.
+    Snapshots are handled as ticks of the tick batch, like local refreshes: the snapshots that arrive together are one tick,
+    and so are the snapshots the daemon replays after a reconnect.
+    """
+
+    def __init__(self, *args: Any, connection: DaemonConnection, client: DaemonClient, **kwargs: Any) -> None:
+        """Initialize the coordinator, and subscribe."""
+        super().__init__(*args, client=client, **kwargs)
+        self.connection = connection
+        self.last_seq: int | None = None
+        self.subscription = (
+            {rm_type.__name__: interval.total_seconds() for rm_type, interval in self.refresh_frequency.items()},
+            [[rm_type.__name__ for rm_type in unit] for unit in self._units if len(unit) > 1],
+            {
+                rm_type.__name__: (policy.backoff.total_seconds(), policy.max_backoff and policy.max_backoff.total_seconds())
+                for rm_type, policy in self.retry_policy.items()
+                if policy.backoff is not None and rm_type in self.refresh_frequency
+            },
+        )
+        self._first_snapshot = asyncio.Event()
+        self._latest: PortSnapshot | None = None
+        self._batch_key = object()
+        self._replaying = False
+        self._finish_tick: asyncio.Handle | None = None
+        connection.subscribers[client.key] = self
+
+    @callback
+    def _schedule_refresh(self) -> None:
+        """Nothing to schedule, the daemon polls."""
+
+    async def _async_update_data(self) -> PortSnapshot:
+        if self.data is None:
+            try:
+                async with asyncio.timeout(FIRST_SNAPSHOT_TIMEOUT):
+                    await self._first_snapshot.wait()
+            except TimeoutError as e:
+                raise UpdateFailed(
+                    translation_domain=DOMAIN,
+                    translation_key="daemon_unavailable",
+                    translation_placeholders={"port": str(self.device_id), "socket": self.connection.socket_path},
+                ) from e
+        return self._latest
+
+    @callback
+    def async_handle_snapshot(
+        self,
+        seq: int,
+        sample_time: float,
+        register_maps: dict[type[RegisterMap], RegisterMap],
+        sample_times: dict[type[RegisterMap], float],
+        failed: frozenset[type[RegisterMap]],
+    ) -> None:
+        """Handle a snapshot published by the daemon."""
+        self.last_seq = seq
+        self.refreshes += 1
+        self._version += 1
+        # Convert the unix timestamps to the event loop clock, like locally acquired snapshots.
+        offset = self.hass.loop.time() - time.time()
+        self.sample_time = sample_time + offset
+        self._latest = PortSnapshot(
+            version=self._version,
+            sample_time=self.sample_time,
+            register_maps=register_maps,
+            sample_times={rm_type: t + offset for rm_type, t in sample_times.items()},
+            failed=failed | {rm_type for rm_type in self.refresh_frequency if rm_type not in register_maps},
+        )
+        if not self._first_snapshot.is_set():
+            # The first refresh picks it up.
+            self._first_snapshot.set()
+            return
+        if not self._replaying and self._finish_tick is None:
+            self.tick_batch.async_start(self._batch_key)
+            self._finish_tick = self.hass.loop.call_soon(self._async_finish_tick)
+        self.async_set_updated_data(self._latest)
+
+    @callback
+    def _async_finish_tick(self) -> None:
+        self._finish_tick = None
+        if not self._replaying:
+            self.tick_batch.async_finish(self._batch_key)
+
+    @callback
+    def async_start_replay(self) -> None:
+        """Start a tick for the snapshots the daemon replays on (re)subscribing, until `async_end_replay`."""
+        # The first snapshot is picked up by the first refresh, which is a tick of its own.
+        if self._first_snapshot.is_set():
+            self._replaying = True
+            self.tick_batch.async_start(self._batch_key)
+
+    @callback
+    def async_end_replay(self) -> None:
+        """End the tick of the replayed snapshots."""
+        if self._replaying:
+            self._replaying = False
+            self.tick_batch.async_finish(self._batch_key)
@@ -2,21 +2,48 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
+    from collections.abc import Mapping
+
     from enovates_modbus.base import RegisterMap
     from enovates_modbus.eno_one import EnoOneClient
     from homeassistant.config_entries import ConfigEntry
+    from homeassistant.const import Platform
     from homeassistant.loader import Integration
 
-    from .coordinator import EnovatesDUCoordinator
+    from .coordinator import EnovatesDUCoordinator, EnovatesRegisterMapView
+    from .ems_limit import EMSLimitArbiter
+    from .flight_recorder import FlightRecorder
+    from .totals import Totals
+    from .watchdog import LoopWatchdog
 
 
 type EnovatesConfigEntry = ConfigEntry[EnovatesData]
 
 
+@dataclass(frozen=True, kw_only=True)
+class PortSnapshot:
+    """
+    Register maps of one port.
+
+    Register maps acquired in the same tick (and certainly those in the same group) are coherent.
+    The version increments with every tick, so consumers can tell snapshots apart without comparing the values.
+    """
+
+    version: int
+    sample_time: float
+    register_maps: Mapping[type[RegisterMap], RegisterMap]
+    sample_times: Mapping[type[RegisterMap], float]
+    failed: frozenset[type[RegisterMap]] = frozenset()
+
+    def get[T: RegisterMap](self, register_map: type[T]) -> T:
+        """Get a Register Map from the snapshot."""
+        return self.register_maps[register_map]  # type: ignore[return-value]
+
+
 @dataclass
 class EnovatesData:
     """Data for the Enovates integration."""
@@ -24,8 +51,21 @@ class EnovatesData:
     ems_control: bool
     clients: dict[int, EnoOneClient]
     integration: Integration
-    coordinators: dict[tuple[int, type[RegisterMap]], EnovatesDUCoordinator]
+    coordinators: dict[int, EnovatesDUCoordinator]
+
+    platforms: list[Platform] = field(default_factory=list)
+    """Platforms forwarded on setup, and unloaded on unload."""
+    views: dict[tuple[int, type[RegisterMap]], EnovatesRegisterMapView] = field(default_factory=dict)
+    flight_recorders: dict[int, FlightRecorder] = field(default_factory=dict)
+    watchdog: LoopWatchdog | None = None
+    totals: Totals | None = None
+    ems_limits: EMSLimitArbiter | None = None
+    """All EMS limit writes go through it, with EMS control."""
+
+    def coordinator[T: RegisterMap](self, device_id: int, register_map: type[T]) -> EnovatesRegisterMapView[T]:
+        """Get the coordinator (view) for a Register Map type."""
+        return self.views[(device_id, register_map)]
 
-    def coordinator[T: RegisterMap](self, device_id: int, register_map: type[T]) -> EnovatesDUCoordinator[T]:
-        """Get the coordinator for a Register Map type."""
-        return self.coordinators[(device_id, register_map)]
+    def snapshot(self, device_id: int) -> PortSnapshot:
+        """Get the latest snapshot of a port."""
+        return self.coordinators[device_id].data
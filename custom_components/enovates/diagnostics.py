@@ -0,0 +1,39 @@
+"""Diagnostics support for Enovates."""
+
+from __future__ import annotations
+
+import dataclasses
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.const import CONF_HOST
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+
+    from .data import EnovatesConfigEntry
+
+TO_REDACT = {CONF_HOST}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: EnovatesConfigEntry) -> dict[str, Any]:  # noqa: ARG001 Unused function argument: `hass`
+    """Return diagnostics for a config entry, including the flight recordings."""
+    return {
+        "entry": {
+            "data": async_redact_data(entry.data, TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "ports": {
+            device_id: {
+                "last_update_success": coordinator.last_update_success,
+                "refreshes": coordinator.refreshes,
+                "skipped_ticks": coordinator.skipped_ticks,
+                "failed": sorted(rm_type.__name__ for rm_type in coordinator.data.failed) if coordinator.data else None,
+                "stats": {rm_type.__name__: dataclasses.asdict(stats) for rm_type, stats in coordinator.stats.items()},
+            }
+            for device_id, coordinator in entry.runtime_data.coordinators.items()
+        },
+        "flight_recordings": [
+            recording for flight_recorder in entry.runtime_data.flight_recorders.values() for recording in flight_recorder.recordings
+        ],
+    }
@@ -0,0 +1,71 @@
+"""Arbitration of the EMS limit writes of an entry."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING
+
+from enovates_modbus.eno_one import EMSLimit
+
+if TYPE_CHECKING:
+    from enovates_modbus.eno_one import EnoOneClient
+
+    from .data import EnovatesConfigEntry
+
+NO_LIMIT = -1
+
+
+class EMSLimitArbiter:
+    """
+    The single path for the EMS limit writes to the ports of an entry.
+
+    The number entities, the schedules and the solar surplus control request a desired limit, the latest request wins.
+    The fuse protection caps the limit while tripped, what is written is then the minimum of the cap and the desired limit.
+    Removing the cap writes the desired limit as it is by then, including the requests made while tripped.
+    Writes to a port are serialized, so a request that was already being written can't overwrite a lower cap.
+    Limits are in mA, NO_LIMIT is no limit.
+    """
+
+    def __init__(self, entry: EnovatesConfigEntry) -> None:
+        """Initialize the arbiter."""
+        self.entry = entry
+        self.desired: dict[int, int] = {}
+        self.caps: dict[int, int] = {}
+        self._locks: dict[int, asyncio.Lock] = {port: asyncio.Lock() for port in entry.runtime_data.clients}
+
+    def desired_limit(self, port: int) -> int:
+        """Return the latest requested limit of a port, or the polled limit if there was no request yet."""
+        if (desired := self.desired.get(port)) is not None:
+            return desired
+        return self.entry.runtime_data.snapshot(port).get(EMSLimit).ems_limit
+
+    def limit(self, port: int) -> int:
+        """Return the limit of a port that is to be written, the desired limit capped by the fuse protection."""
+        desired = self.desired_limit(port)
+        if (cap := self.caps.get(port)) is None:
+            return desired
+        return cap if desired == NO_LIMIT else min(cap, desired)
+
+    async def async_request(self, port: int, limit: int) -> None:
+        """Request a limit for a port, and write it (capped while the fuse protection is tripped)."""
+        self.desired[port] = limit
+        await self._async_write(port, self.entry.runtime_data.clients[port])
+
+    async def async_cap(self, port: int, cap: int, client: EnoOneClient) -> None:
+        """Cap the limit of a port, and write it with `client`."""
+        if port not in self.caps:
+            # The polled limit becomes the cap once written, keep the one from before to restore on release.
+            self.desired.setdefault(port, self.desired_limit(port))
+        self.caps[port] = cap
+        await self._async_write(port, client)
+
+    async def async_release(self, port: int, client: EnoOneClient) -> None:
+        """Remove the cap of a port, and write its desired limit with `client`."""
+        async with self._locks[port]:
+            await client.set_ems_limit(self.desired_limit(port))
+            # Only once written, a failed write leaves the port capped.
+            self.caps.pop(port, None)
+
+    async def _async_write(self, port: int, client: EnoOneClient) -> None:
+        async with self._locks[port]:
+            await client.set_ems_limit(self.limit(port))
@@ -3,22 +3,33 @@
 from __future__ import annotations
 
 import dataclasses
+from typing import TYPE_CHECKING, Any
 
 from enovates_modbus.base import RegisterMap
+from homeassistant.core import callback
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity import EntityDescription
-from homeassistant.helpers.update_coordinator import (
-    CoordinatorEntity,
-    DataUpdateCoordinator,
-)
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
+from .const import DOMAIN
+from .coordinator import EnovatesRegisterMapView
 
-class EnovatesEntity(CoordinatorEntity[DataUpdateCoordinator[RegisterMap]]):
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from enovates_modbus.eno_one import Diagnostics
+
+ATTR_DATA_AGE = "data_age"
+
+
+class EnovatesEntity(CoordinatorEntity[EnovatesRegisterMapView[RegisterMap]]):
     """EnovatesEntity class."""
 
     _attr_has_entity_name = True
+    # Changes with every state write, so it would only bloat the recorder's attribute table.
+    _unrecorded_attributes = frozenset({ATTR_DATA_AGE})
 
-    def __init__(self, coordinator: DataUpdateCoordinator[RegisterMap]) -> None:
+    def __init__(self, coordinator: EnovatesRegisterMapView[RegisterMap]) -> None:
         """Initialize."""
         super().__init__(coordinator)
         self._attr_unique_id = coordinator.config_entry.entry_id
@@ -31,6 +42,41 @@ class EnovatesEntity(CoordinatorEntity[DataUpdateCoordinator[RegisterMap]]):
             },
         )
 
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state together with all other updates of the same polling tick."""
+        self.coordinator.coordinator.tick_batch.async_schedule_write(self)
+
+    def _evaluate[R](self, value_fn: Callable[[RegisterMap], R]) -> R:
+        """Evaluate a value function on the data, accounting the cost to the tick."""
+        with self.coordinator.coordinator.tick_batch.cost.measure("value_fn"):
+            return value_fn(self.coordinator.data)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Age of the data in seconds, as of the state write."""
+        if (age := self.coordinator.age) is None:
+            return None
+        return {ATTR_DATA_AGE: round(age, 1)}
+
+    @property
+    def sample_time(self) -> float | None:
+        """Monotonic (event loop clock) acquisition time of the data this entity is based on."""
+        return self.coordinator.sample_time
+
+
+def charger_device_info(diagnostics: Diagnostics) -> DeviceInfo:
+    """Device info of the charger, shared by the entities of all its ports."""
+    return DeviceInfo(
+        identifiers={(DOMAIN, diagnostics.serial_nr)},
+        manufacturer=diagnostics.manufacturer,
+        model="ENO one",
+        name="ENO one",
+        model_id=diagnostics.model_id,
+        serial_number=diagnostics.serial_nr,
+        sw_version=diagnostics.firmware_version,
+    )
+
 
 def transform_entity_descriptions_per_port[T: EntityDescription](ports: list[int], per_port: list[T]) -> dict[int, list[T]]:
     """Transform a list of entity descriptions into their port specific variants, if needed."""
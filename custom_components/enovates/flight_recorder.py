@@ -0,0 +1,199 @@
+"""Fault triggered flight recorder for Enovates."""
+
+from __future__ import annotations
+
+import dataclasses
+import json
+import time
+from collections import deque
+from datetime import timedelta
+from enum import Enum
+from typing import TYPE_CHECKING, Any
+
+from enovates_modbus.eno_one import Measurements, Mode3Details, Mode3State, State
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import DOMAIN, LOGGER
+
+if TYPE_CHECKING:
+    from datetime import datetime
+    from pathlib import Path
+
+    from enovates_modbus.base import RegisterMap
+    from homeassistant.core import CALLBACK_TYPE, HomeAssistant
+
+    from .coordinator import EnovatesDUCoordinator
+    from .data import PortSnapshot
+
+EVENT_FLIGHT_RECORDING = f"{DOMAIN}_flight_recording"
+
+FAULT_STATES = frozenset({Mode3State.E, Mode3State.F})
+
+# Register maps that are recorded, the ones that are also boosted during a recording are the high-rate ones.
+RECORDED_REGISTER_MAPS: tuple[type[RegisterMap], ...] = (State, Measurements, Mode3Details)
+BOOSTED_REGISTER_MAPS: tuple[type[RegisterMap], ...] = (Mode3Details, Measurements)
+
+
+def _serialize(register_map: RegisterMap) -> dict[str, Any]:
+    values = {field.name: getattr(register_map, field.name) for field in dataclasses.fields(register_map)}
+    return {name: value.name if isinstance(value, Enum) else value for name, value in values.items()}
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class RecordingWindow:
+    """Samples kept before a trigger, and the window after it in which the high-rate register maps are read at `fast_interval`."""
+
+    pre_trigger: timedelta = timedelta(minutes=1)
+    post_trigger: timedelta = timedelta(minutes=1)
+    fast_interval: timedelta = timedelta(milliseconds=250)
+
+
+DEFAULT_WINDOW = RecordingWindow()
+
+
+class FlightRecorder:
+    """
+    Keeps a pre-trigger buffer of the latest samples of a port, and records around fault events.
+
+    A recording is triggered when the Mode 3 state goes to E or F, or when the load shedding state flips.
+    During the post-trigger window, Mode 3 Details and Measurements are read at the fast interval of the `window`.
+    The pre- and post-trigger samples are then saved to disk, and kept in memory for the diagnostics download.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        coordinator: EnovatesDUCoordinator,
+        directory: Path,
+        window: RecordingWindow = DEFAULT_WINDOW,
+        keep: int = 3,
+    ) -> None:
+        """Initialize the flight recorder."""
+        self.hass = hass
+        self.coordinator = coordinator
+        self.directory = directory
+        self.window = window
+        self.recordings: deque[dict[str, Any]] = deque(maxlen=keep)
+        """Latest recordings, oldest first."""
+
+        self._buffer: deque[tuple[float, PortSnapshot]] = deque()
+        self._last_version: int | None = None
+        self._fault = False
+        self._load_shedding: bool | None = None
+        self._trigger: dict[str, Any] | None = None
+        self._unsub_boost: CALLBACK_TYPE | None = None
+        self._unsub_finish: CALLBACK_TYPE | None = None
+
+    @property
+    def recording(self) -> bool:
+        """Whether a recording is in progress."""
+        return self._trigger is not None
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Start watching the coordinator, returns a callback to stop (discarding a recording in progress)."""
+        unsub = self.coordinator.async_add_listener(self._handle_coordinator_update)
+
+        @callback
+        def _stop() -> None:
+            unsub()
+            self._async_end_capture()
+
+        return _stop
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        snapshot = self.coordinator.data
+        if snapshot is None or snapshot.version == self._last_version:
+            return
+        self._last_version = snapshot.version
+        self._buffer.append((snapshot.sample_time, snapshot))
+        if not self.recording:
+            cutoff = snapshot.sample_time - self.window.pre_trigger.total_seconds()
+            while self._buffer and self._buffer[0][0] < cutoff:
+                self._buffer.popleft()
+
+        reason: str | None = None
+        if Mode3Details not in snapshot.failed:
+            fault = snapshot.get(Mode3Details).state_num in FAULT_STATES
+            if fault and not self._fault:
+                reason = f"mode3_state_{snapshot.get(Mode3Details).state_num.name}"
+            self._fault = fault
+        if State not in snapshot.failed:
+            load_shedding = snapshot.get(State).load_shedding_state
+            if self._load_shedding is not None and load_shedding != self._load_shedding:
+                reason = reason or f"load_shedding_{'on' if load_shedding else 'off'}"
+            self._load_shedding = load_shedding
+
+        if reason is not None and not self.recording:
+            self._async_trigger(reason, snapshot.sample_time)
+
+    @callback
+    def _async_trigger(self, reason: str, sample_time: float) -> None:
+        LOGGER.info("Port %s: flight recorder triggered by %s", self.coordinator.device_id, reason)
+        self._trigger = {"reason": reason, "sample_time": sample_time, "time": time.time()}
+        self._unsub_boost = self.coordinator.async_boost(BOOSTED_REGISTER_MAPS, self.window.fast_interval)
+        self._unsub_finish = async_call_later(self.hass, self.window.post_trigger, self._async_finish)
+
+    @callback
+    def _async_end_capture(self) -> None:
+        if self._unsub_finish is not None:
+            self._unsub_finish()
+            self._unsub_finish = None
+        if self._unsub_boost is not None:
+            self._unsub_boost()
+            self._unsub_boost = None
+        self._trigger = None
+
+    @callback
+    def _async_finish(self, _now: datetime) -> None:
+        self._unsub_finish = None
+        trigger = self._trigger
+        if trigger is None:
+            return
+        self._async_end_capture()
+
+        # Sample times are on the event loop clock, convert them to unix timestamps.
+        offset = time.time() - self.hass.loop.time()
+        recording = {
+            "port": self.coordinator.device_id,
+            "reason": trigger["reason"],
+            "trigger_time": trigger["sample_time"] + offset,
+            "samples": [
+                {
+                    "time": sample_time + offset,
+                    **{
+                        rm_type.__name__: _serialize(snapshot.get(rm_type))
+                        for rm_type in RECORDED_REGISTER_MAPS
+                        if rm_type in snapshot.register_maps and rm_type not in snapshot.failed
+                    },
+                }
+                for sample_time, snapshot in self._buffer
+            ],
+        }
+        self.recordings.append(recording)
+        # Keep the post-trigger samples as pre-trigger buffer for a next recording.
+        cutoff = self.hass.loop.time() - self.window.pre_trigger.total_seconds()
+        while self._buffer and self._buffer[0][0] < cutoff:
+            self._buffer.popleft()
+
+        path = (
+            self.directory
+            / f"flight-port{self.coordinator.device_id}-{time.strftime('%Y%m%dT%H%M%S', time.localtime(trigger['time']))}.json"
+        )
+        self.hass.async_create_task(self._async_write(path, recording))
+        self.hass.bus.async_fire(
+            EVENT_FLIGHT_RECORDING, {"port": self.coordinator.device_id, "reason": trigger["reason"], "path": str(path)}
+        )
+
+    async def _async_write(self, path: Path, recording: dict[str, Any]) -> None:
+        try:
+            await self.hass.async_add_executor_job(self._write, path, recording)
+        except OSError:
+            LOGGER.exception("Failed to save the flight recording to %s", path)
+
+    def _write(self, path: Path, recording: dict[str, Any]) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(recording))
+        LOGGER.info("Flight recording saved to %s", path)
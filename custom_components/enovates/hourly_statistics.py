@@ -0,0 +1,137 @@
+"""Hourly energy and power statistics of a charger, compiled in-process and imported as external statistics."""
+
+from __future__ import annotations
+
+from functools import partial
+from typing import TYPE_CHECKING
+
+from enovates_modbus.eno_one import Measurements
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticData, StatisticMeanType, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics, get_last_statistics
+from homeassistant.const import UnitOfEnergy, UnitOfPower
+from homeassistant.core import callback
+from homeassistant.util import dt as dt_util
+from homeassistant.util import slugify
+from homeassistant.util.unit_conversion import EnergyConverter, PowerConverter
+
+from .const import DOMAIN
+
+if TYPE_CHECKING:
+    from datetime import datetime
+
+    from homeassistant.core import CALLBACK_TYPE, HomeAssistant
+
+    from .coordinator import TickBatch
+    from .data import EnovatesConfigEntry
+
+
+class HourlyStatistics:
+    """
+    Compiles hourly statistics over all ports of a charger, from the snapshots at the end of every tick, without extra reads.
+
+    Energy: the meter reading (sum of Total Charged Energy over the ports) at the end of the hour, and the sum of its increases,
+    continuing from the last imported sum. A meter that went down (e.g. a replaced device) only sets a new baseline.
+    Power: the mean, minimum and maximum of the charging power (summed over the ports) over the samples of the hour.
+    An hour is imported at its first sample of the next hour, so an hour without samples (the device was unreachable) is skipped.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: EnovatesConfigEntry, tick_batch: TickBatch) -> None:
+        """Initialize the statistics, keyed by the serial number of the charger."""
+        self.hass = hass
+        self.entry = entry
+        self.tick_batch = tick_batch
+        object_id = slugify(entry.unique_id or entry.entry_id)
+        self.energy_metadata = StatisticMetaData(
+            has_sum=True,
+            mean_type=StatisticMeanType.NONE,
+            name=f"{entry.title} energy",
+            source=DOMAIN,
+            statistic_id=f"{DOMAIN}:{object_id}_energy",
+            unit_class=EnergyConverter.UNIT_CLASS,
+            unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        )
+        self.power_metadata = StatisticMetaData(
+            has_sum=False,
+            mean_type=StatisticMeanType.ARITHMETIC,
+            name=f"{entry.title} power",
+            source=DOMAIN,
+            statistic_id=f"{DOMAIN}:{object_id}_power",
+            unit_class=PowerConverter.UNIT_CLASS,
+            unit_of_measurement=UnitOfPower.WATT,
+        )
+        self.sum: float = 0  # kWh
+        self.last_energy: float | None = None  # kWh, meter reading that `sum` includes
+        self._hour: datetime | None = None
+        self._energy: float | None = None
+        self._power_sum: float = 0
+        self._power_min: float = 0
+        self._power_max: float = 0
+        self._samples = 0
+
+    async def async_load(self) -> None:
+        """Continue from the last imported energy statistic."""
+        last = await get_instance(self.hass).async_add_executor_job(
+            partial(get_last_statistics, self.hass, 1, self.energy_metadata["statistic_id"], convert_units=True, types={"state", "sum"})
+        )
+        if rows := last.get(self.energy_metadata["statistic_id"]):
+            self.sum = rows[0]["sum"] or 0
+            self.last_energy = rows[0]["state"]
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Start compiling, returns a callback to stop. An hour in progress is not imported."""
+        return self.tick_batch.async_add_tick_listener(self._handle_tick)
+
+    @callback
+    def _handle_tick(self, _costs: dict[str, float]) -> None:
+        power = 0
+        energy = 0
+        for coordinator in self.entry.runtime_data.coordinators.values():
+            snapshot = coordinator.data
+            if snapshot is None or Measurements in snapshot.failed:
+                return
+            measurements = snapshot.get(Measurements)
+            power += measurements.charger_active_power_total
+            energy += measurements.active_energy_import_total / 1000
+
+        if self.last_energy is None:
+            # Nothing imported yet, the first hour counts from the first sample.
+            self.last_energy = energy
+        hour = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+        if hour != self._hour:
+            self._async_import()
+            self._hour = hour
+            self._power_sum = 0
+            self._power_min = self._power_max = power
+            self._samples = 0
+        self._energy = energy
+        self._power_sum += power
+        self._power_min = min(self._power_min, power)
+        self._power_max = max(self._power_max, power)
+        self._samples += 1
+
+    @callback
+    def _async_import(self) -> None:
+        if self._hour is None or self._energy is None or not self._samples:
+            return
+        if self.last_energy is not None and self._energy > self.last_energy:
+            self.sum += self._energy - self.last_energy
+        self.last_energy = self._energy
+        async_add_external_statistics(
+            self.hass,
+            self.energy_metadata,
+            [StatisticData(start=self._hour, state=self._energy, sum=self.sum)],
+        )
+        async_add_external_statistics(
+            self.hass,
+            self.power_metadata,
+            [
+                StatisticData(
+                    start=self._hour,
+                    mean=self._power_sum / self._samples,
+                    min=self._power_min,
+                    max=self._power_max,
+                )
+            ],
+        )
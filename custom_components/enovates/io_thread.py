@@ -0,0 +1,118 @@
+"""Dedicated I/O thread for Enovates Modbus traffic."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import callback
+from homeassistant.util.hass_dict import HassKey
+
+from .const import DEVICE_METHODS, DOMAIN, LOGGER
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Coroutine
+
+    from enovates_modbus.eno_one import EnoOneClient
+    from homeassistant.core import CALLBACK_TYPE, HomeAssistant
+
+DATA_IO_THREAD: HassKey[ModbusIOThread] = HassKey(f"{DOMAIN}_io_thread")
+
+
+class ModbusIOThread:
+    """
+    Background thread with its own event loop, shared by all config entries that use it.
+
+    Modbus framing, timeouts and reconnects then happen on this loop, isolating the Home Assistant loop from their latency.
+    """
+
+    def __init__(self) -> None:
+        """Initialize and start the thread."""
+        self.loop = asyncio.new_event_loop()
+        self.users = 0
+        self._thread = threading.Thread(target=self._run, name=f"{DOMAIN}_modbus_io", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+            self.loop.close()
+
+    async def async_run[R](self, coro: Coroutine[Any, Any, R]) -> R:
+        """Run a coroutine on the I/O loop, and wait for its result. Cancelling the wait cancels the coroutine."""
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self.loop))
+
+    def stop(self) -> None:
+        """Stop the loop and wait for the thread to finish (blocking)."""
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+
+
+@callback
+def async_acquire_io_thread(hass: HomeAssistant) -> tuple[ModbusIOThread, CALLBACK_TYPE]:
+    """Get the shared I/O thread, starting it if needed. Returns the thread and a callback to release it."""
+    if (io_thread := hass.data.get(DATA_IO_THREAD)) is None:
+        hass.data[DATA_IO_THREAD] = io_thread = ModbusIOThread()
+        LOGGER.debug("Started Modbus I/O thread")
+    io_thread.users += 1
+
+    @callback
+    def _release() -> None:
+        io_thread.users -= 1
+        if io_thread.users == 0 and hass.data.get(DATA_IO_THREAD) is io_thread:
+            del hass.data[DATA_IO_THREAD]
+            hass.async_add_executor_job(io_thread.stop)
+
+    return io_thread, _release
+
+
+class _ThreadedTransport:
+    """Stand-in for the pymodbus client, which is closed on unload."""
+
+    def __init__(self, client: ThreadedClient) -> None:
+        self._client = client
+
+    def close(self) -> None:
+        """Close the connection on the I/O loop."""
+        self._client.io_thread.loop.call_soon_threadsafe(self._client.close)
+
+
+class ThreadedClient:
+    """
+    Proxy for EnoOneClient that runs it on the I/O thread.
+
+    The client is created on the I/O loop on first use, as pymodbus binds to the loop it is created on.
+    """
+
+    def __init__(self, io_thread: ModbusIOThread, factory: Callable[[], EnoOneClient], device_id: int) -> None:
+        """Initialize the proxy."""
+        self.io_thread = io_thread
+        self.device_id = device_id
+        self.client = _ThreadedTransport(self)
+        self._factory = factory
+        self._client: EnoOneClient | None = None
+
+    def close(self) -> None:
+        """Close the connection, must be called on the I/O loop."""
+        if self._client is not None:
+            self._client.client.close()
+
+    async def _call(self, name: str, args: tuple[Any, ...]) -> Any:
+        # Runs on the I/O loop.
+        if self._client is None:
+            self._client = self._factory()
+        return await getattr(self._client, name)(*args)
+
+    def __getattr__(self, name: str) -> Any:
+        """Proxy a device method to the I/O thread."""
+        if name not in DEVICE_METHODS:
+            raise AttributeError(name)
+
+        async def _threaded(*args: Any) -> Any:
+            return await self.io_thread.async_run(self._call(name, args))
+
+        return _threaded
@@ -0,0 +1,152 @@
+"""OpenMetrics exposition of the Enovates coordinators."""
+
+from __future__ import annotations
+
+import dataclasses
+import re
+from enum import Enum
+from typing import TYPE_CHECKING
+
+from aiohttp import web
+from homeassistant.components.http import KEY_HASS, HomeAssistantView
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util.hass_dict import HassKey
+
+from .const import CONF_METRICS, DOMAIN, LOGGER
+
+if TYPE_CHECKING:
+    from enovates_modbus.base import RegisterMap
+
+    from .coordinator import EnovatesDUCoordinator
+    from .data import EnovatesConfigEntry
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+DATA_METRICS_VIEW: HassKey[EnovatesMetricsView] = HassKey(f"{DOMAIN}_metrics_view")
+
+
+@callback
+def async_register_view(hass: HomeAssistant) -> None:
+    """Register the metrics view, once. Views can't be unregistered, so it checks the entry options per request."""
+    if DATA_METRICS_VIEW in hass.data:
+        return
+    if hass.http is None:
+        LOGGER.warning("The HTTP integration is not loaded, the metrics endpoint is not available")
+        return
+    hass.data[DATA_METRICS_VIEW] = view = EnovatesMetricsView()
+    hass.http.register_view(view)
+
+
+def _snake_case(name: str) -> str:
+    return re.sub(r"(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])", "_", name).lower()
+
+
+def _escape(value: object) -> str:
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _labels(labels: dict[str, object]) -> str:
+    return ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+
+
+@dataclasses.dataclass(frozen=True)
+class Metric:
+    """Metric family, the suffix is appended to the name of its samples (e.g. `_total` for counters)."""
+
+    name: str
+    metric_type: str
+    help_text: str
+    suffix: str = ""
+
+
+UP = Metric(f"{DOMAIN}_up", "gauge", "Whether the last refresh succeeded")
+REFRESHES = Metric(f"{DOMAIN}_refreshes", "counter", "Completed refreshes", "_total")
+SKIPPED_TICKS = Metric(f"{DOMAIN}_skipped_ticks", "counter", "Ticks skipped because a refresh overran them", "_total")
+READS = Metric(f"{DOMAIN}_reads", "counter", "Register map reads", "_total")
+READ_ERRORS = Metric(f"{DOMAIN}_read_errors", "counter", "Failed register map reads", "_total")
+READ_LATENCY = Metric(f"{DOMAIN}_read_latency_seconds", "counter", "Total duration of register map reads", "_total")
+SAMPLE_AGE = Metric(f"{DOMAIN}_sample_age_seconds", "gauge", "Age of the cached register map")
+
+
+class MetricFamilies:
+    """OpenMetrics text builder, keeps the samples of a metric family together."""
+
+    def __init__(self) -> None:
+        """Initialize the builder."""
+        self._families: dict[str, tuple[Metric, list[str]]] = {}
+
+    def add(self, metric: Metric, labels: dict[str, object], value: float) -> None:
+        """Add a sample to a metric family."""
+        _, samples = self._families.setdefault(metric.name, (metric, []))
+        samples.append(f"{metric.name}{metric.suffix}{{{_labels(labels)}}} {value}")
+
+    def render(self) -> str:
+        """Render all metric families."""
+        lines: list[str] = []
+        for name, (metric, samples) in self._families.items():
+            lines.extend((f"# TYPE {name} {metric.metric_type}", f"# HELP {name} {metric.help_text}", *samples))
+        lines.append("# EOF\n")
+        return "\n".join(lines)
+
+
+def _add_register_map(metrics: MetricFamilies, labels: dict[str, object], rm_type: type[RegisterMap], register_map: RegisterMap) -> None:
+    prefix = f"{DOMAIN}_{_snake_case(rm_type.__name__)}"
+    info: dict[str, object] = {}
+    for field in dataclasses.fields(register_map):
+        value = getattr(register_map, field.name)
+        if isinstance(value, Enum):
+            info[field.name] = value.name
+        elif isinstance(value, bool | int | float):
+            metrics.add(Metric(f"{prefix}_{field.name}", "gauge", f"{rm_type.__name__} {field.name}"), labels, float(value))
+        elif value is not None:
+            info[field.name] = value
+    if info:
+        metrics.add(Metric(prefix, "info", f"{rm_type.__name__} non-numeric values", "_info"), labels | info, 1)
+
+
+def _add_coordinator(metrics: MetricFamilies, entry: EnovatesConfigEntry, coordinator: EnovatesDUCoordinator, now: float) -> None:
+    labels: dict[str, object] = {"entry_id": entry.entry_id, "charger": entry.title, "port": coordinator.device_id}
+    metrics.add(UP, labels, float(coordinator.last_update_success))
+    metrics.add(REFRESHES, labels, coordinator.refreshes)
+    metrics.add(SKIPPED_TICKS, labels, coordinator.skipped_ticks)
+
+    snapshot = coordinator.data
+    for rm_type, stats in coordinator.stats.items():
+        rm_labels = labels | {"register_map": rm_type.__name__}
+        metrics.add(READS, rm_labels, stats.reads)
+        metrics.add(READ_ERRORS, rm_labels, stats.errors)
+        metrics.add(READ_LATENCY, rm_labels, stats.latency)
+        if snapshot is not None and rm_type in snapshot.sample_times:
+            metrics.add(SAMPLE_AGE, rm_labels, now - snapshot.sample_times[rm_type])
+
+    if snapshot is None:
+        return
+    for rm_type, register_map in snapshot.register_maps.items():
+        _add_register_map(metrics, labels, rm_type, register_map)
+
+
+class EnovatesMetricsView(HomeAssistantView):
+    """
+    OpenMetrics endpoint for all Enovates config entries that have it enabled.
+
+    Only the cached coordinator data is rendered, a scrape never causes a Modbus read.
+    """
+
+    url = f"/api/{DOMAIN}/metrics"
+    name = f"api:{DOMAIN}:metrics"
+
+    async def get(self, request: web.Request) -> web.Response:
+        """Render the metrics."""
+        hass = request.app[KEY_HASS]
+        entries: list[EnovatesConfigEntry] = [
+            entry for entry in hass.config_entries.async_loaded_entries(DOMAIN) if entry.options.get(CONF_METRICS)
+        ]
+        if not entries:
+            return web.Response(status=404)
+
+        metrics = MetricFamilies()
+        now = hass.loop.time()
+        for entry in entries:
+            for coordinator in entry.runtime_data.coordinators.values():
+                _add_coordinator(metrics, entry, coordinator, now)
+        return web.Response(body=metrics.render(), headers={"Content-Type": CONTENT_TYPE})
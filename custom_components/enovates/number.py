@@ -19,10 +19,10 @@ from homeassistant.const import (
     EntityCategory,
     UnitOfElectricCurrent,
 )
-from homeassistant.helpers.device_registry import DeviceInfo
 
-from .const import DOMAIN
-from .entity import EnovatesEntity, transform_entity_descriptions_per_port
+from .coordinator import RetryPolicy, async_retry
+from .ems_limit import NO_LIMIT
+from .entity import EnovatesEntity, charger_device_info, transform_entity_descriptions_per_port
 
 if TYPE_CHECKING:
     from collections.abc import Callable
@@ -30,14 +30,18 @@ if TYPE_CHECKING:
     from enovates_modbus.eno_one import EnoOneClient
     from homeassistant.core import HomeAssistant
     from homeassistant.helpers.entity_platform import AddEntitiesCallback
-    from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
+    from .coordinator import EnovatesRegisterMapView
     from .data import EnovatesConfigEntry
+    from .ems_limit import EMSLimitArbiter
 
 
 # Coordinator is used to centralize the data updates
 PARALLEL_UPDATES = 0
 
+# User initiated reads and writes are not superseded by a next tick, so they keep retrying.
+WRITE_RETRY_POLICY = RetryPolicy(retries=2)
+
 
 @dataclass(frozen=True, kw_only=True)
 class EnovatesNumberEntityDescription[T: RegisterMap](NumberEntityDescription):
@@ -45,7 +49,7 @@ class EnovatesNumberEntityDescription[T: RegisterMap](NumberEntityDescription):
 
     rm_type: type[T]
     get_value_fn: Callable[[EnoOneClient], Any]
-    set_value_fn: Callable[[EnoOneClient, float], Any]
+    set_value_fn: Callable[[EMSLimitArbiter, int, float], Any]
     scale: int = 1
 
 
@@ -58,7 +62,7 @@ def _entity_description(ports: list[int]) -> dict[int, list[EnovatesNumberEntity
             rm_type=EMSLimit,
             get_value_fn=lambda api: api.get_ems_limit(),
             # The only valid negative nr is -1.
-            set_value_fn=lambda api, value: api.set_ems_limit(int(value) if value >= 0 else -1),
+            set_value_fn=lambda ems_limits, port, value: ems_limits.async_request(port, int(value) if value >= 0 else NO_LIMIT),
             native_min_value=-1,
             native_max_value=32,
             native_step=0.1,
@@ -76,10 +80,7 @@ async def async_setup_entry(
     entry: EnovatesConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
-    """Set up the number platform."""
-    if not entry.runtime_data.ems_control:
-        return
-
+    """Set up the number platform, only forwarded with EMS control."""
     diagnostics = await entry.runtime_data.clients[1].get_diagnostics()
 
     for device_id, eds in _entity_description(sorted(entry.runtime_data.clients.keys())).items():
@@ -89,6 +90,7 @@ async def async_setup_entry(
                 coordinator=entry.runtime_data.coordinator(device_id, entity_description.rm_type),
                 entity_description=entity_description,
                 client=entry.runtime_data.clients[device_id],
+                port=device_id,
             )
             for entity_description in eds
         )
@@ -105,33 +107,31 @@ class EnovatesNumberEntity[T: RegisterMap](EnovatesEntity, NumberEntity):
     diagnostics: Diagnostics
     entity_description: EnovatesNumberEntityDescription
     client: EnoOneClient
+    ems_limits: EMSLimitArbiter
+    port: int
 
     def __init__(
         self,
         diagnostics: Diagnostics,
-        coordinator: DataUpdateCoordinator[T],
+        coordinator: EnovatesRegisterMapView[T],
         entity_description: EnovatesNumberEntityDescription,
         client: EnoOneClient,
+        port: int,
     ) -> None:
         """Initialize the sensor class."""
         super().__init__(coordinator)
         self.entity_description = entity_description
         self.client = client
+        self.port = port
+        # The number platform is only forwarded with EMS control, which has the arbiter.
+        self.ems_limits = coordinator.config_entry.runtime_data.ems_limits
         self._device_id = diagnostics.serial_nr
         self._attr_unique_id = f"{diagnostics.serial_nr}_{entity_description.key}"
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, diagnostics.serial_nr)},
-            manufacturer=diagnostics.manufacturer,
-            model="ENO one",
-            name="ENO one",
-            model_id=diagnostics.model_id,
-            serial_number=diagnostics.serial_nr,
-            sw_version=diagnostics.firmware_version,
-        )
+        self._attr_device_info = charger_device_info(diagnostics)
 
     async def _read(self) -> None:
         ed = self.entity_description
-        native = await ed.get_value_fn(self.client)
+        native = await async_retry(WRITE_RETRY_POLICY, lambda: ed.get_value_fn(self.client))
         self._attr_native_value = min(ed.native_max_value, max(ed.native_min_value, native / ed.scale))
 
     async def async_added_to_hass(self) -> None:
@@ -142,5 +142,6 @@ class EnovatesNumberEntity[T: RegisterMap](EnovatesEntity, NumberEntity):
     async def async_set_native_value(self, value: float) -> None:
         """Set new value."""
         ed = self.entity_description
-        await ed.set_value_fn(self.client, min(ed.native_max_value, max(ed.native_min_value, value)) * ed.scale)
+        native = min(ed.native_max_value, max(ed.native_min_value, value)) * ed.scale
+        await async_retry(WRITE_RETRY_POLICY, lambda: ed.set_value_fn(self.ems_limits, self.port, native))
         await self._read()
@@ -0,0 +1,129 @@
+"""On-demand profiling of the Enovates polling pipeline."""
+
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import voluptuous as vol
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse, callback
+from homeassistant.exceptions import ServiceValidationError
+
+from .const import DOMAIN, LOGGER
+
+if TYPE_CHECKING:
+    from types import FrameType
+
+SERVICE_PROFILE = "profile"
+ATTR_DURATION = "duration"
+ATTR_MODE = "mode"
+
+MODE_SAMPLING = "sampling"
+MODE_DETERMINISTIC = "deterministic"
+
+SAMPLE_INTERVAL = 0.005
+
+# Stacks with a frame in one of these packages are attributed to the integration.
+INTEGRATION_PACKAGES = (
+    os.sep + os.path.join(*Path(__file__).parent.parts[-2:], ""),  # noqa: PTH118
+    f"{os.sep}enovates_modbus{os.sep}",
+    f"{os.sep}pymodbus{os.sep}",
+)
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_DURATION, default=30): vol.All(vol.Coerce(int), vol.Range(min=1, max=600)),
+        vol.Optional(ATTR_MODE, default=MODE_SAMPLING): vol.In([MODE_SAMPLING, MODE_DETERMINISTIC]),
+    }
+)
+
+
+def _collapse(frame: FrameType | None) -> str | None:
+    """Collapse a stack to `outer;...;inner`, or None if no frame is part of the integration."""
+    names: list[str] = []
+    ours = False
+    while frame is not None:
+        code = frame.f_code
+        ours = ours or any(package in code.co_filename for package in INTEGRATION_PACKAGES)
+        names.append(f"{code.co_qualname} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names)) if ours else None
+
+
+def sample_thread(thread_id: int, duration: float, interval: float = SAMPLE_INTERVAL) -> tuple[Counter[str], int]:
+    """Sample the stacks of a thread (blocking), returns the integration's collapsed stacks and the total number of samples."""
+    stacks: Counter[str] = Counter()
+    samples = 0
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        frame = sys._current_frames().get(thread_id)  # noqa: SLF001 There is no public API for this
+        samples += 1
+        if (stack := _collapse(frame)) is not None:
+            stacks[stack] += 1
+        del frame
+        time.sleep(interval)
+    return stacks, samples
+
+
+def _write_collapsed(path: Path, stacks: Counter[str]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("".join(f"{stack} {count}\n" for stack, count in stacks.most_common()))
+
+
+def _write_pstats(path: Path, profiler: cProfile.Profile) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(path)
+
+
+async def async_profile(hass: HomeAssistant, duration: int, mode: str) -> dict[str, str | int]:
+    """Profile the event loop for `duration` seconds, and write the result to the config directory."""
+    directory = Path(hass.config.path(DOMAIN))
+    timestamp = time.strftime("%Y%m%dT%H%M%S")
+
+    if mode == MODE_SAMPLING:
+        # The event loop keeps running while another thread samples its stacks, so the overhead is small.
+        stacks, samples = await hass.async_add_executor_job(sample_thread, threading.get_ident(), duration)
+        path = directory / f"profile-{timestamp}.collapsed"
+        await hass.async_add_executor_job(_write_collapsed, path, stacks)
+        return {"path": str(path), "samples": samples, "integration_samples": stacks.total()}
+
+    # Deterministic profiling of everything that runs on the event loop, with significant overhead.
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        await asyncio.sleep(duration)
+    finally:
+        profiler.disable()
+    path = directory / f"profile-{timestamp}.pstats"
+    await hass.async_add_executor_job(_write_pstats, path, profiler)
+    return {"path": str(path)}
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the profile service."""
+    lock = asyncio.Lock()
+
+    async def _async_handle_profile(call: ServiceCall) -> ServiceResponse:
+        if lock.locked():
+            raise ServiceValidationError(translation_domain=DOMAIN, translation_key="profile_running")
+        async with lock:
+            LOGGER.info("Profiling for %s seconds (%s)", call.data[ATTR_DURATION], call.data[ATTR_MODE])
+            result = await async_profile(hass, call.data[ATTR_DURATION], call.data[ATTR_MODE])
+            LOGGER.info("Profile saved to %s", result["path"])
+        return result
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE,
+        _async_handle_profile,
+        schema=PROFILE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
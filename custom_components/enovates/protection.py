@@ -0,0 +1,121 @@
+"""Main fuse protection, a fast loop on the installation currents that lowers the EMS limit."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING
+
+from enovates_modbus.eno_one import Measurements
+from homeassistant.core import callback
+from pymodbus.exceptions import ModbusException
+
+from .const import DOMAIN, LOGGER
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+    from enovates_modbus.eno_one import EnoOneClient
+    from homeassistant.core import CALLBACK_TYPE, HomeAssistant
+
+    from .data import EnovatesConfigEntry
+
+# Update in docs if changed!
+PROTECTION_INTERVAL = 0.25  # s
+RELEASE_MARGIN = 2000  # mA below the rating
+RELEASE_TIME = 60  # s
+
+
+class FuseProtection:
+    """
+    Reads the installation currents every PROTECTION_INTERVAL, and lowers the EMS limits as soon as a phase exceeds the rating.
+
+    It uses its own connections, so its reads and writes don't queue behind the regular polling.
+    The installation currents are the same on every port, they are read from port 1. When tripped, the overshoot is split evenly
+    over the ports and the EMS limit of each port is capped to what it draws minus its share, but never raised, see `EMSLimitArbiter`.
+    The caps are removed once all phases stayed RELEASE_MARGIN below the rating for RELEASE_TIME, which writes the desired EMS limits.
+    A failed read or write is simply repeated at the next tick.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: EnovatesConfigEntry,
+        clients: Mapping[int, EnoOneClient],
+        rating: int,
+    ) -> None:
+        """Initialize the protection, `rating` in mA per phase."""
+        self.hass = hass
+        self.entry = entry
+        self.clients = clients
+        self.rating = rating
+        self.trips = 0
+        self.tripped = False
+        self.limits: dict[int, int] = {}  # mA, caps written since the trip
+        self._below_since: float | None = None
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Start protecting, returns a callback to stop (and close the connections)."""
+        task = self.entry.async_create_background_task(self.hass, self._async_run(), name=f"{DOMAIN} fuse protection {self.entry.title}")
+        return task.cancel
+
+    async def _async_run(self) -> None:
+        loop = self.hass.loop
+        next_tick = loop.time()
+        try:
+            while True:
+                try:
+                    measurements = await self.clients[1].fetch(Measurements)
+                    await self.async_check(measurements, loop.time())
+                except (ConnectionError, ModbusException) as e:
+                    LOGGER.debug("Fuse protection of %s failed: %r", self.entry.title, e)
+                # Fixed rate, ticks that were overrun are skipped.
+                next_tick += PROTECTION_INTERVAL
+                next_tick = max(next_tick, loop.time())
+                await asyncio.sleep(next_tick - loop.time())
+        finally:
+            for client in self.clients.values():
+                client.client.close()
+
+    async def async_check(self, measurements: Measurements, now: float) -> None:
+        """Check the installation currents, and lower or restore the EMS limits."""
+        peak = max(measurements.installation_current_l1, measurements.installation_current_l2, measurements.installation_current_l3)
+        if peak > self.rating:
+            self._below_since = None
+            await self._async_lower(measurements, peak - self.rating)
+        elif self.tripped:
+            if peak > self.rating - RELEASE_MARGIN:
+                self._below_since = None
+            elif self._below_since is None:
+                self._below_since = now
+            elif now - self._below_since >= RELEASE_TIME:
+                await self._async_release()
+
+    async def _async_lower(self, measurements: Measurements, overshoot: int) -> None:
+        ed = self.entry.runtime_data
+        if not self.tripped:
+            self.trips += 1
+            self.tripped = True
+            LOGGER.warning(
+                "Installation current of %s is %s mA over the main fuse rating of %s mA, lowering the EMS limit",
+                self.entry.title,
+                overshoot,
+                self.rating,
+            )
+        share = overshoot / len(self.clients)
+        for port, client in self.clients.items():
+            # The fresh measurements for port 1, the latest polled ones for the other port.
+            drawn = measurements if port == 1 else ed.snapshot(port).get(Measurements)
+            limit = max(0, int(max(drawn.current_l1, drawn.current_l2, drawn.current_l3) - share))
+            if port in self.limits and limit >= self.limits[port]:
+                continue
+            await ed.ems_limits.async_cap(port, limit, client)
+            self.limits[port] = limit
+
+    async def _async_release(self) -> None:
+        for port, client in self.clients.items():
+            await self.entry.runtime_data.ems_limits.async_release(port, client)
+        LOGGER.info("Installation current of %s is below the main fuse rating again, restored the EMS limit", self.entry.title)
+        self.tripped = False
+        self.limits = {}
+        self._below_since = None
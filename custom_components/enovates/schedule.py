@@ -0,0 +1,232 @@
+"""Time-of-use schedules of the EMS limit, for all Enovates chargers."""
+
+from __future__ import annotations
+
+import asyncio
+from bisect import bisect_right
+from datetime import timedelta
+from itertools import chain
+from typing import TYPE_CHECKING, Any
+
+import voluptuous as vol
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import HomeAssistant, ServiceCall, callback
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.event import async_track_point_in_time
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from homeassistant.util.hass_dict import HassKey
+from pymodbus.exceptions import ModbusException
+
+from .const import CONF_EMS_CONTROL, DOMAIN, LOGGER
+from .coordinator import RetryPolicy, async_retry
+
+if TYPE_CHECKING:
+    from datetime import datetime
+
+    from homeassistant.core import CALLBACK_TYPE
+
+    from .data import EnovatesConfigEntry
+
+SERVICE_SET_SCHEDULE = "set_schedule"
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_SET_POINTS = "set_points"
+ATTR_TIME = "time"
+ATTR_LIMIT = "limit"
+ATTR_PORT = "port"
+ATTR_WEEKDAYS = "weekdays"
+
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+DAY = 24 * 60 * 60
+WEEK = 7 * DAY
+
+STORAGE_KEY = f"{DOMAIN}.schedules"
+STORAGE_VERSION = 1
+
+DATA_SCHEDULE_ENGINE: HassKey[ScheduleEngine] = HassKey(f"{DOMAIN}_schedule_engine")
+
+# Scheduled writes are not superseded by a next tick, so they are retried like user initiated writes.
+WRITE_RETRY_POLICY = RetryPolicy(retries=2)
+
+SET_POINT_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_TIME): cv.time,
+        # A, -1 is no limit.
+        vol.Required(ATTR_LIMIT): vol.All(vol.Coerce(float), vol.Range(min=-1, max=32)),
+        vol.Optional(ATTR_PORT): vol.In([1, 2]),
+        vol.Optional(ATTR_WEEKDAYS, default=list(WEEKDAYS)): vol.All(cv.ensure_list, [vol.In(WEEKDAYS)]),
+    }
+)
+
+SET_SCHEDULE_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Required(ATTR_SET_POINTS): vol.All(cv.ensure_list, [SET_POINT_SCHEMA]),
+    }
+)
+
+type Port = tuple[str, int]
+"""Entry id and port."""
+
+type Write = tuple[str, int, int]
+"""Entry id, port and EMS limit (mA) of a scheduled write."""
+
+
+def _second_of_week(now: datetime) -> float:
+    return now.weekday() * DAY + now.hour * 3600 + now.minute * 60 + now.second + now.microsecond / 1e6
+
+
+class ScheduleEngine:
+    """
+    Applies the EMS limit set-points of all config entries, with a single timer.
+
+    The set-points of the loaded entries are kept on a week wheel: the sorted seconds of the week that have set-points,
+    with the writes due at each of them. Only the next boundary is scheduled, so the cost doesn't grow with the number of
+    set-points or chargers, and all writes due at a boundary are done together.
+    Schedules are stored per config entry, as they were given to the service.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the engine."""
+        self.hass = hass
+        self.store: Store[dict[str, list[dict[str, Any]]]] = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self.schedules: dict[str, list[dict[str, Any]]] = {}
+        self.entries: dict[str, EnovatesConfigEntry] = {}
+        self.wheel: dict[int, dict[Port, int]] = {}
+        self.boundaries: list[int] = []
+        self._unsub_timer: CALLBACK_TYPE | None = None
+
+    async def async_load(self) -> None:
+        """Load the stored schedules."""
+        self.schedules = await self.store.async_load() or {}
+
+    @callback
+    def async_add_entry(self, entry: EnovatesConfigEntry) -> CALLBACK_TYPE:
+        """Apply the schedule of a loaded entry, starting with the set-points that are in effect now."""
+        self.entries[entry.entry_id] = entry
+        self._async_rebuild()
+        self._async_write(self._current_writes(entry.entry_id))
+
+        @callback
+        def _remove() -> None:
+            del self.entries[entry.entry_id]
+            self._async_rebuild()
+
+        return _remove
+
+    async def async_set_schedule(self, entry_id: str, set_points: list[dict[str, Any]]) -> None:
+        """Replace the schedule of an entry, and store it."""
+        if set_points:
+            self.schedules[entry_id] = [
+                {**set_point, ATTR_TIME: set_point[ATTR_TIME].isoformat()} for set_point in sorted(set_points, key=lambda s: s[ATTR_TIME])
+            ]
+        else:
+            self.schedules.pop(entry_id, None)
+        await self.store.async_save(self.schedules)
+        self._async_rebuild()
+        if entry_id in self.entries:
+            self._async_write(self._current_writes(entry_id))
+
+    async def async_remove_schedule(self, entry_id: str) -> None:
+        """Forget the schedule of a removed entry."""
+        if self.schedules.pop(entry_id, None) is not None:
+            await self.store.async_save(self.schedules)
+
+    @callback
+    def _async_rebuild(self) -> None:
+        wheel: dict[int, dict[Port, int]] = {}
+        for entry_id, entry in self.entries.items():
+            for set_point in self.schedules.get(entry_id, []):
+                time = dt_util.parse_time(set_point[ATTR_TIME])
+                limit = round(set_point[ATTR_LIMIT] * 1000) if set_point[ATTR_LIMIT] >= 0 else -1
+                ports = [set_point[ATTR_PORT]] if ATTR_PORT in set_point else sorted(entry.runtime_data.clients)
+                for weekday in set_point[ATTR_WEEKDAYS]:
+                    boundary = WEEKDAYS.index(weekday) * DAY + time.hour * 3600 + time.minute * 60 + time.second
+                    # A later set-point for the same port and time overrides an earlier one.
+                    wheel.setdefault(boundary, {}).update({(entry_id, port): limit for port in ports})
+        self.wheel = wheel
+        self.boundaries = sorted(wheel)
+        self._async_schedule()
+
+    @callback
+    def _async_schedule(self) -> None:
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+        if not self.boundaries:
+            return
+        now = dt_util.now()
+        second = _second_of_week(now)
+        index = bisect_right(self.boundaries, second)
+        boundary = self.boundaries[index % len(self.boundaries)]
+        delay = (boundary - second) % WEEK or WEEK
+        self._unsub_timer = async_track_point_in_time(self.hass, self._handle_boundary, now + timedelta(seconds=delay))
+
+    @callback
+    def _handle_boundary(self, now: datetime) -> None:
+        self._unsub_timer = None
+        # The boundary that is due, also if the timer fired a bit late.
+        second = _second_of_week(dt_util.as_local(now))
+        boundary = self.boundaries[(bisect_right(self.boundaries, second) - 1) % len(self.boundaries)]
+        self._async_write([(entry_id, port, limit) for (entry_id, port), limit in self.wheel[boundary].items()])
+        self._async_schedule()
+
+    def _current_writes(self, entry_id: str) -> list[Write]:
+        """Return the writes of the latest set-point of each port of an entry, going back up to a week."""
+        index = bisect_right(self.boundaries, _second_of_week(dt_util.now()))
+        remaining = set(self.entries[entry_id].runtime_data.clients)
+        writes: list[Write] = []
+        for boundary in chain(reversed(self.boundaries[:index]), reversed(self.boundaries[index:])):
+            for (write_entry_id, port), limit in self.wheel[boundary].items():
+                if write_entry_id == entry_id and port in remaining:
+                    remaining.discard(port)
+                    writes.append((entry_id, port, limit))
+            if not remaining:
+                break
+        return writes
+
+    @callback
+    def _async_write(self, writes: list[Write]) -> None:
+        if writes:
+            self.hass.async_create_background_task(self._async_write_all(writes), name=f"{DOMAIN} scheduled EMS limits")
+
+    async def _async_write_all(self, writes: list[Write]) -> None:
+        """Do the writes due at a boundary concurrently, the ports of an entry in order."""
+        per_entry: dict[str, list[Write]] = {}
+        for write in writes:
+            per_entry.setdefault(write[0], []).append(write)
+        await asyncio.gather(*(self._async_write_entry(entry_writes) for entry_writes in per_entry.values()))
+
+    async def _async_write_entry(self, writes: list[Write]) -> None:
+        for entry_id, port, limit in writes:
+            if (entry := self.entries.get(entry_id)) is None:
+                return
+            ems_limits = entry.runtime_data.ems_limits
+            try:
+                await async_retry(
+                    WRITE_RETRY_POLICY, lambda ems_limits=ems_limits, port=port, limit=limit: ems_limits.async_request(port, limit)
+                )
+            except (ConnectionError, ModbusException) as e:
+                LOGGER.warning("Failed to set the scheduled EMS limit of %s port %s to %s mA: %r", entry.title, port, limit, e)
+
+
+async def async_setup_schedules(hass: HomeAssistant) -> None:
+    """Load the schedules and register the set_schedule service."""
+    hass.data[DATA_SCHEDULE_ENGINE] = engine = ScheduleEngine(hass)
+    await engine.async_load()
+
+    async def _async_handle_set_schedule(call: ServiceCall) -> None:
+        entry: EnovatesConfigEntry | None = hass.config_entries.async_get_entry(call.data[ATTR_CONFIG_ENTRY_ID])
+        if entry is None or entry.domain != DOMAIN or entry.state is not ConfigEntryState.LOADED:
+            raise ServiceValidationError(translation_domain=DOMAIN, translation_key="entry_not_loaded")
+        if not entry.data[CONF_EMS_CONTROL]:
+            raise ServiceValidationError(translation_domain=DOMAIN, translation_key="ems_control_required")
+        for set_point in call.data[ATTR_SET_POINTS]:
+            if set_point.get(ATTR_PORT, 1) not in entry.runtime_data.clients:
+                raise ServiceValidationError(
+                    translation_domain=DOMAIN, translation_key="invalid_port", translation_placeholders={"port": str(set_point[ATTR_PORT])}
+                )
+        await engine.async_set_schedule(entry.entry_id, call.data[ATTR_SET_POINTS])
+
+    hass.services.async_register(DOMAIN, SERVICE_SET_SCHEDULE, _async_handle_set_schedule, schema=SET_SCHEDULE_SCHEMA)
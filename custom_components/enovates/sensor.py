@@ -2,8 +2,10 @@
 
 from __future__ import annotations
 
+import dataclasses
 from dataclasses import dataclass
-from typing import TYPE_CHECKING, Any
+from datetime import timedelta
+from typing import TYPE_CHECKING, Any, Literal
 
 from enovates_modbus.base import RegisterMap
 from enovates_modbus.eno_one import (
@@ -20,6 +22,7 @@ from enovates_modbus.eno_one import (
     TransactionToken,
 )
 from homeassistant.components.sensor import (
+    RestoreSensor,
     SensorDeviceClass,
     SensorEntity,
     SensorEntityDescription,
@@ -32,20 +35,26 @@ from homeassistant.const import (
     UnitOfElectricPotential,
     UnitOfEnergy,
     UnitOfPower,
+    UnitOfTime,
 )
-from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.core import callback
+from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
 
-from .const import DOMAIN
-from .entity import EnovatesEntity, transform_entity_descriptions_per_port
+from .const import CONF_AGGREGATE_WINDOW, CONF_PHASE_ENERGY, CONF_SITE_TOTALS, CONF_STALENESS_BUDGET, DEFAULT_STALENESS_BUDGET, DOMAIN
+from .entity import EnovatesEntity, charger_device_info, transform_entity_descriptions_per_port
+from .telemetry import EnergyIntegrator, TelemetryAggregator
+from .totals import SIGNALS, async_get_site_totals
 
 if TYPE_CHECKING:
     from collections.abc import Callable
 
     from homeassistant.core import HomeAssistant
     from homeassistant.helpers.entity_platform import AddEntitiesCallback
-    from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
+    from .coordinator import EnovatesRegisterMapView
     from .data import EnovatesConfigEntry
+    from .totals import Totals
+    from .watchdog import LoopWatchdog
 
 
 # Coordinator is used to centralize the data updates
@@ -62,9 +71,128 @@ class EnovatesSensorEntityDescription[T: RegisterMap](SensorEntityDescription):
     device_id: int | None = None
 
 
+@dataclass(frozen=True, kw_only=True)
+class EnovatesAggregateSensorEntityDescription(EnovatesSensorEntityDescription[Measurements]):
+    """Enovates aggregate sensor entity description."""
+
+    source_key: str
+    stat: Literal["mean", "min", "max"]
+
+
+@dataclass(frozen=True, kw_only=True)
+class EnovatesEnergySensorEntityDescription(EnovatesSensorEntityDescription[Measurements]):
+    """Enovates integrated energy sensor entity description."""
+
+    source_key: str
+
+
+@dataclass(frozen=True, kw_only=True)
+class EnovatesTotalSensorEntityDescription(SensorEntityDescription):
+    """Enovates total sensor entity description."""
+
+    source_key: str
+    site: bool = False
+
+
+# Sensors that get aggregate variants, if enabled. They must be based on Measurements.
+AGGREGATED_SENSORS = (
+    "charger_active_power_total",
+    "current_l1",
+    "current_l2",
+    "current_l3",
+    "voltage_l1",
+    "voltage_l2",
+    "voltage_l3",
+)
+
+
+def _aggregate_entity_descriptions(
+    per_port: list[EnovatesSensorEntityDescription], window: int
+) -> list[EnovatesAggregateSensorEntityDescription]:
+    return [
+        EnovatesAggregateSensorEntityDescription(
+            **{
+                **{f.name: getattr(ed, f.name) for f in dataclasses.fields(ed)},
+                "key": f"{ed.key}_{stat}",
+                "translation_key": f"{ed.translation_key}_{stat}",
+                "translation_placeholders": {**(ed.translation_placeholders or {}), "window": str(window)},
+            },
+            source_key=ed.key,
+            stat=stat,
+        )
+        for ed in per_port
+        if ed.key in AGGREGATED_SENSORS
+        for stat in ("mean", "min", "max")
+    ]
+
+
+# Power sensors that get an energy variant integrated from their samples, if enabled. They must be based on Measurements.
+INTEGRATED_SENSORS = (
+    "charger_active_power_l1",
+    "charger_active_power_l2",
+    "charger_active_power_l3",
+)
+
+
+def _energy_entity_descriptions(per_port: list[EnovatesSensorEntityDescription]) -> list[EnovatesEnergySensorEntityDescription]:
+    return [
+        EnovatesEnergySensorEntityDescription(
+            **{
+                **{f.name: getattr(ed, f.name) for f in dataclasses.fields(ed)},
+                "key": ed.key.replace("_power_", "_energy_"),
+                "translation_key": ed.translation_key.replace("_power", "_energy"),
+                # Unlike the per-second power, the energy is published once per minute and useful to keep.
+                "entity_category": None,
+                "entity_registry_enabled_default": True,
+                "state_class": SensorStateClass.TOTAL_INCREASING,
+                "device_class": SensorDeviceClass.ENERGY,
+                "native_unit_of_measurement": UnitOfEnergy.WATT_HOUR,
+                "suggested_unit_of_measurement": UnitOfEnergy.KILO_WATT_HOUR,
+                "suggested_display_precision": 2,
+            },
+            source_key=ed.key,
+        )
+        for ed in per_port
+        if ed.key in INTEGRATED_SENSORS
+    ]
+
+
+def _total_entity_descriptions(
+    per_port: list[EnovatesSensorEntityDescription], *, site: bool
+) -> list[EnovatesTotalSensorEntityDescription]:
+    return [
+        EnovatesTotalSensorEntityDescription(
+            **{
+                # Only the base fields, a total is not read from a register map.
+                **{f.name: getattr(ed, f.name) for f in dataclasses.fields(ed) if f.name not in {"rm_type", "value_fn", "device_id"}},
+                **(
+                    {
+                        "key": f"site_{ed.key}",
+                        "translation_key": f"site_{ed.translation_key}",
+                        # The site total of a counter starts from zero, see Totals.
+                        "state_class": SensorStateClass.TOTAL_INCREASING if SIGNALS[ed.key].counter else ed.state_class,
+                    }
+                    if site
+                    else {}
+                ),
+            },
+            source_key=ed.key,
+            site=site,
+        )
+        for ed in per_port
+        if ed.key in SIGNALS
+    ]
+
+
 def _entity_descriptions(
-    ports: list[int], *, ems_control: bool
-) -> tuple[list[EnovatesSensorEntityDescription], dict[int, list[EnovatesSensorEntityDescription]]]:
+    ports: list[int], *, ems_control: bool, aggregate_window: int = 0, site_totals: bool = False, phase_energy: bool = False
+) -> tuple[
+    list[EnovatesSensorEntityDescription],
+    dict[int, list[EnovatesSensorEntityDescription]],
+    dict[int, list[EnovatesAggregateSensorEntityDescription]],
+    list[EnovatesTotalSensorEntityDescription],
+    dict[int, list[EnovatesEnergySensorEntityDescription]],
+]:
     shared = [
         EnovatesSensorEntityDescription[APIVersion](
             entity_category=EntityCategory.DIAGNOSTIC,
@@ -442,16 +570,36 @@ def _entity_descriptions(
             )
         )
 
-    return shared, transform_entity_descriptions_per_port(ports, per_port)
+    aggregates = _aggregate_entity_descriptions(per_port, aggregate_window) if aggregate_window else []
+    energy = _energy_entity_descriptions(per_port) if phase_energy else []
+    # A charger with a single port doesn't need totals, the per-port sensors are the same.
+    totals = _total_entity_descriptions(per_port, site=False) if len(ports) > 1 else []
+    if site_totals:
+        totals += _total_entity_descriptions(per_port, site=True)
+
+    return (
+        shared,
+        transform_entity_descriptions_per_port(ports, per_port),
+        transform_entity_descriptions_per_port(ports, aggregates),
+        totals,
+        transform_entity_descriptions_per_port(ports, energy),
+    )
 
 
 async def async_setup_entry(
-    hass: HomeAssistant,  # noqa: ARG001 Unused function argument: `hass`
+    hass: HomeAssistant,
     entry: EnovatesConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up the sensor platform."""
-    shared, per_port = _entity_descriptions(sorted(entry.runtime_data.clients.keys()), ems_control=entry.runtime_data.ems_control)
+    aggregate_window = int(entry.options.get(CONF_AGGREGATE_WINDOW, 0))
+    shared, per_port, aggregates, totals, energy = _entity_descriptions(
+        sorted(entry.runtime_data.clients.keys()),
+        ems_control=entry.runtime_data.ems_control,
+        aggregate_window=aggregate_window,
+        site_totals=entry.options.get(CONF_SITE_TOTALS, False),
+        phase_energy=entry.options.get(CONF_PHASE_ENERGY, False),
+    )
 
     diagnostics = await entry.runtime_data.clients[1].get_diagnostics()
 
@@ -474,6 +622,55 @@ async def async_setup_entry(
             for ed in eds
         )
 
+    if entry.runtime_data.watchdog is not None:
+        async_add_entities([EnovatesWatchdogSensor(diagnostics=diagnostics, watchdog=entry.runtime_data.watchdog)])
+
+    for device_id, eds in aggregates.items():
+        if not eds:
+            continue
+        aggregator = TelemetryAggregator(
+            hass,
+            entry.runtime_data.coordinators[device_id],
+            signals={ed.source_key: ed.value_fn for ed in eds},
+            window=timedelta(minutes=aggregate_window),
+        )
+        entry.async_on_unload(aggregator.async_start())
+        async_add_entities(
+            EnovatesAggregateSensor(
+                diagnostics=diagnostics,
+                aggregator=aggregator,
+                entity_description=ed,
+            )
+            for ed in eds
+        )
+
+    for device_id, eds in energy.items():
+        integrator = EnergyIntegrator(
+            hass,
+            entry.runtime_data.coordinators[device_id],
+            signals={ed.source_key: ed.value_fn for ed in eds},
+            # Values are considered current within the staleness budget, longer gaps are not integrated.
+            max_gap=timedelta(seconds=entry.options.get(CONF_STALENESS_BUDGET, DEFAULT_STALENESS_BUDGET)),
+        )
+        entry.async_on_unload(integrator.async_start())
+        async_add_entities(
+            EnovatesEnergySensor(
+                diagnostics=diagnostics,
+                integrator=integrator,
+                entity_description=ed,
+            )
+            for ed in eds
+        )
+
+    async_add_entities(
+        EnovatesTotalSensor(
+            diagnostics=diagnostics,
+            totals=async_get_site_totals(hass) if ed.site else entry.runtime_data.totals,
+            entity_description=ed,
+        )
+        for ed in totals
+    )
+
 
 class EnovatesSensor[T: RegisterMap](EnovatesEntity, SensorEntity):
     """Enovates Sensor class."""
@@ -483,7 +680,7 @@ class EnovatesSensor[T: RegisterMap](EnovatesEntity, SensorEntity):
     def __init__(
         self,
         diagnostics: Diagnostics,
-        coordinator: DataUpdateCoordinator[T],
+        coordinator: EnovatesRegisterMapView[T],
         entity_description: EnovatesSensorEntityDescription,
     ) -> None:
         """Initialize the sensor class."""
@@ -491,17 +688,174 @@ class EnovatesSensor[T: RegisterMap](EnovatesEntity, SensorEntity):
         self.entity_description = entity_description
         self._device_id = diagnostics.serial_nr
         self._attr_unique_id = f"{diagnostics.serial_nr}_{entity_description.key}"
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, diagnostics.serial_nr)},
-            manufacturer=diagnostics.manufacturer,
-            model="ENO one",
-            name="ENO one",
-            model_id=diagnostics.model_id,
-            serial_number=diagnostics.serial_nr,
-            sw_version=diagnostics.firmware_version,
-        )
+        self._attr_device_info = charger_device_info(diagnostics)
 
     @property
     def native_value(self) -> Any:
         """Return the native value of the sensor."""
-        return self.entity_description.value_fn(self.coordinator.data)
+        return self._evaluate(self.entity_description.value_fn)
+
+
+class EnovatesAggregateSensor(SensorEntity):
+    """Enovates aggregate sensor class, published at a low rate by a TelemetryAggregator."""
+
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+
+    entity_description: EnovatesAggregateSensorEntityDescription
+
+    def __init__(
+        self,
+        diagnostics: Diagnostics,
+        aggregator: TelemetryAggregator,
+        entity_description: EnovatesAggregateSensorEntityDescription,
+    ) -> None:
+        """Initialize the aggregate sensor class."""
+        self.entity_description = entity_description
+        self.aggregator = aggregator
+        self._window = aggregator.windows[entity_description.source_key]
+        self._attr_unique_id = f"{diagnostics.serial_nr}_{entity_description.key}"
+        self._attr_device_info = charger_device_info(diagnostics)
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to the aggregator."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self.aggregator.async_add_listener(self._handle_aggregator_update))
+
+    @callback
+    def _handle_aggregator_update(self) -> None:
+        self.async_write_ha_state()
+
+    @property
+    def available(self) -> bool:
+        """Return True if there are samples in the window."""
+        return len(self._window) > 0
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the aggregate of the samples in the window."""
+        return getattr(self._window, self.entity_description.stat)
+
+
+class EnovatesEnergySensor(RestoreSensor):
+    """Enovates energy sensor class, integrated from the power samples and published at a low rate by an EnergyIntegrator."""
+
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+
+    entity_description: EnovatesEnergySensorEntityDescription
+
+    def __init__(
+        self,
+        diagnostics: Diagnostics,
+        integrator: EnergyIntegrator,
+        entity_description: EnovatesEnergySensorEntityDescription,
+    ) -> None:
+        """Initialize the energy sensor class."""
+        self.entity_description = entity_description
+        self.integrator = integrator
+        self._attr_unique_id = f"{diagnostics.serial_nr}_{entity_description.key}"
+        self._attr_device_info = charger_device_info(diagnostics)
+
+    async def async_added_to_hass(self) -> None:
+        """Continue from the last energy, and subscribe to the integrator."""
+        await super().async_added_to_hass()
+        if (last_data := await self.async_get_last_sensor_data()) is not None and last_data.native_value is not None:
+            self.integrator.async_restore(self.entity_description.source_key, float(last_data.native_value))
+        self.async_on_remove(self.integrator.async_add_listener(self._handle_integrator_update))
+
+    @callback
+    def _handle_integrator_update(self) -> None:
+        self.async_write_ha_state()
+
+    @property
+    def native_value(self) -> float:
+        """Return the energy integrated so far."""
+        return self.integrator.energy[self.entity_description.source_key]
+
+
+class EnovatesTotalSensor(SensorEntity):
+    """Enovates total sensor class, the sum over the ports of a charger or over all chargers of the site."""
+
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+
+    entity_description: EnovatesTotalSensorEntityDescription
+
+    def __init__(
+        self,
+        diagnostics: Diagnostics,
+        totals: Totals,
+        entity_description: EnovatesTotalSensorEntityDescription,
+    ) -> None:
+        """Initialize the total sensor class."""
+        self.entity_description = entity_description
+        self.totals = totals
+        if entity_description.site:
+            # Only one config entry can provide the site totals, enforced by the options flow.
+            self._attr_unique_id = entity_description.key
+            self._attr_device_info = DeviceInfo(
+                identifiers={(DOMAIN, "site")},
+                entry_type=DeviceEntryType.SERVICE,
+                manufacturer="Enovates",
+                name="Enovates site",
+            )
+        else:
+            self._attr_unique_id = f"{diagnostics.serial_nr}_{entity_description.key}"
+            self._attr_device_info = charger_device_info(diagnostics)
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to the totals."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self.totals.async_add_listener(self._handle_totals_update))
+
+    @callback
+    def _handle_totals_update(self) -> None:
+        self.async_write_ha_state()
+
+    @property
+    def available(self) -> bool:
+        """Return True if the total could be computed from all ports."""
+        return self.totals.values[self.entity_description.source_key] is not None
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the total."""
+        return self.totals.values[self.entity_description.source_key]
+
+
+class EnovatesWatchdogSensor(SensorEntity):
+    """Enovates event loop cost sensor, published at a low rate by the LoopWatchdog."""
+
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+
+    entity_description = SensorEntityDescription(
+        key="tick_cost",
+        translation_key="tick_cost",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+    )
+
+    def __init__(self, diagnostics: Diagnostics, watchdog: LoopWatchdog) -> None:
+        """Initialize the watchdog sensor class."""
+        self.watchdog = watchdog
+        self._attr_unique_id = f"{diagnostics.serial_nr}_{self.entity_description.key}"
+        self._attr_device_info = charger_device_info(diagnostics)
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to the watchdog."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self.watchdog.async_add_listener(self.async_write_ha_state))
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the mean event loop time per tick."""
+        return self.watchdog.summary["mean"]
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the breakdown per category, and the event loop lag."""
+        return {key: value for key, value in self.watchdog.summary.items() if key != "mean"}
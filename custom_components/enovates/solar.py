@@ -0,0 +1,138 @@
+"""Solar surplus charging, controlling the EMS limit from a grid export sensor."""
+
+from __future__ import annotations
+
+import math
+from datetime import timedelta
+from typing import TYPE_CHECKING
+
+from enovates_modbus.eno_one import Measurements, State
+from homeassistant.const import ATTR_UNIT_OF_MEASUREMENT, STATE_UNAVAILABLE, STATE_UNKNOWN, UnitOfPower
+from homeassistant.core import callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.util.unit_conversion import PowerConverter
+from pymodbus.exceptions import ModbusException
+
+from .const import DOMAIN, LOGGER
+
+if TYPE_CHECKING:
+    import asyncio
+    from datetime import datetime
+
+    from homeassistant.core import CALLBACK_TYPE, HomeAssistant
+
+    from .data import EnovatesConfigEntry
+
+# Update in docs if changed!
+CONTROL_INTERVAL = timedelta(seconds=10)
+SMOOTHING_TIME = timedelta(minutes=1)  # Time constant of the moving average
+MIN_CURRENT = 6000  # mA, the Mode 3 minimum
+HYSTERESIS = 1000  # mA
+DEADBAND = 500  # mA
+NOMINAL_VOLTAGE = 230  # V
+
+
+class SurplusController:
+    """
+    Sets the EMS limit of the ports to the solar surplus, measured by a grid export sensor (negative while importing).
+
+    The surplus is the export plus what the charger draws now, smoothed with an exponentially weighted moving average.
+    Every `interval` it is converted to a current per phase (with the number of phases of the device), split evenly over the ports,
+    and only written when it changed by at least DEADBAND.
+    Charging starts once the surplus allows MIN_CURRENT + HYSTERESIS, and pauses (limit 0) once it drops below MIN_CURRENT - HYSTERESIS.
+    In between, a charging port gets at least MIN_CURRENT.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: EnovatesConfigEntry,
+        sensor: str,
+        interval: timedelta = CONTROL_INTERVAL,
+        smoothing: timedelta = SMOOTHING_TIME,
+    ) -> None:
+        """Initialize the controller, `sensor` is the entity id of the grid export sensor."""
+        self.hass = hass
+        self.entry = entry
+        self.sensor = sensor
+        self.interval = interval
+        self.alpha = 1 - math.exp(-interval / smoothing)
+        self.surplus: float | None = None  # W, smoothed
+        self.charging = False
+        self.limits: dict[int, int] = {}  # mA, last written per port
+        self._task: asyncio.Task[None] | None = None
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Start controlling, returns a callback to stop (cancelling a write in progress)."""
+        unsub = async_track_time_interval(self.hass, self._handle_interval, self.interval)
+
+        @callback
+        def _stop() -> None:
+            unsub()
+            if self._task is not None:
+                self._task.cancel()
+
+        return _stop
+
+    @callback
+    def _handle_interval(self, _now: datetime | None = None) -> None:
+        # A step that is still writing to a slow device is not stacked up.
+        if self._task is not None and not self._task.done():
+            return
+        self._task = self.entry.async_create_background_task(self.hass, self.async_step(), name=f"{DOMAIN} surplus control")
+
+    async def async_step(self) -> None:
+        """Update the surplus, and write the EMS limits that changed."""
+        if (export := self._export()) is None or (charger_power := self._charger_power()) is None:
+            return
+        surplus = export + charger_power
+        self.surplus = surplus if self.surplus is None else self.surplus + self.alpha * (surplus - self.surplus)
+
+        state = self.entry.runtime_data.snapshot(1).get(State)
+        voltage = self.entry.runtime_data.snapshot(1).get(Measurements).voltage_l1 or NOMINAL_VOLTAGE
+        ems_limits = self.entry.runtime_data.ems_limits
+        ports = self.entry.runtime_data.clients
+        target = min(self.surplus / (voltage * max(state.number_of_phases, 1)) * 1000 / len(ports), state.max_amp_per_phase * 1000)
+        if target >= MIN_CURRENT + HYSTERESIS:
+            self.charging = True
+        elif target < MIN_CURRENT - HYSTERESIS:
+            self.charging = False
+        limit = max(MIN_CURRENT, int(target)) if self.charging else 0
+
+        for port in ports:
+            last = self.limits.get(port)
+            if last is not None and (limit == 0) == (last == 0) and abs(limit - last) < DEADBAND:
+                continue
+            try:
+                await ems_limits.async_request(port, limit)
+            except (ConnectionError, ModbusException) as e:
+                # Superseded by the next step, which writes again since the limit wasn't recorded.
+                LOGGER.debug("Failed to set the EMS limit of port %s to %s mA: %r", port, limit, e)
+                continue
+            self.limits[port] = limit
+
+    def _export(self) -> float | None:
+        """Grid export in W, None if unknown."""
+        state = self.hass.states.get(self.sensor)
+        if state is None or state.state in (STATE_UNKNOWN, STATE_UNAVAILABLE):
+            return None
+        try:
+            return PowerConverter.convert(
+                float(state.state),
+                state.attributes.get(ATTR_UNIT_OF_MEASUREMENT, UnitOfPower.WATT),
+                UnitOfPower.WATT,
+            )
+        except (ValueError, HomeAssistantError):
+            return None
+
+    def _charger_power(self) -> float | None:
+        """Power drawn by all ports in W, from their latest snapshots, None if unknown."""
+        power = 0
+        for coordinator in self.entry.runtime_data.coordinators.values():
+            snapshot = coordinator.data
+            if snapshot is None or Measurements in snapshot.failed or State in snapshot.failed:
+                return None
+            power += snapshot.get(Measurements).charger_active_power_total
+        return power
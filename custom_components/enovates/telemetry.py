@@ -0,0 +1,219 @@
+"""In-process aggregation of Enovates telemetry."""
+
+from __future__ import annotations
+
+from collections import deque
+from datetime import timedelta
+from typing import TYPE_CHECKING
+
+from enovates_modbus.eno_one import Measurements
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_track_time_interval
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Mapping
+    from datetime import datetime
+
+    from homeassistant.core import CALLBACK_TYPE, HomeAssistant
+
+    from .coordinator import EnovatesDUCoordinator
+
+
+class SlidingWindow:
+    """
+    Time based sliding window over samples, with O(1) (amortized) mean, min and max.
+
+    Min and max are tracked with monotonic deques, the mean with a running sum.
+    """
+
+    def __init__(self, duration: float) -> None:
+        """Initialize the window, `duration` in seconds."""
+        self.duration = duration
+        self._samples: deque[tuple[float, float]] = deque()
+        self._min: deque[tuple[float, float]] = deque()
+        self._max: deque[tuple[float, float]] = deque()
+        self._sum: float = 0
+
+    def __len__(self) -> int:
+        """Return the number of samples in the window."""
+        return len(self._samples)
+
+    def add(self, t: float, value: float) -> None:
+        """Add a sample, `t` must not be older than the previous sample."""
+        self._samples.append((t, value))
+        self._sum += value
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((t, value))
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((t, value))
+        self.expire(t)
+
+    def expire(self, now: float) -> None:
+        """Drop the samples that are no longer within the window at time `now`."""
+        cutoff = now - self.duration
+        while self._samples and self._samples[0][0] <= cutoff:
+            self._sum -= self._samples.popleft()[1]
+        while self._min and self._min[0][0] <= cutoff:
+            self._min.popleft()
+        while self._max and self._max[0][0] <= cutoff:
+            self._max.popleft()
+
+    @property
+    def mean(self) -> float | None:
+        """Mean of the samples in the window."""
+        return self._sum / len(self._samples) if self._samples else None
+
+    @property
+    def min(self) -> float | None:
+        """Minimum of the samples in the window."""
+        return self._min[0][1] if self._min else None
+
+    @property
+    def max(self) -> float | None:
+        """Maximum of the samples in the window."""
+        return self._max[0][1] if self._max else None
+
+
+class TelemetryAggregator:
+    """
+    Aggregates Measurements signals of one port over a sliding window.
+
+    Every new Measurements sample of the coordinator is added, regardless of whether it changed,
+    but listeners are only called once per `publish_interval`.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        coordinator: EnovatesDUCoordinator,
+        signals: Mapping[str, Callable[[Measurements], float]],
+        window: timedelta,
+        publish_interval: timedelta = timedelta(minutes=1),
+    ) -> None:
+        """Initialize the aggregator."""
+        self.hass = hass
+        self.coordinator = coordinator
+        self.signals = signals
+        self.publish_interval = publish_interval
+        self.windows = {key: SlidingWindow(window.total_seconds()) for key in signals}
+        self._listeners: list[CALLBACK_TYPE] = []
+        self._last_sample_time: float | None = None
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Start aggregating and publishing, returns a callback to stop."""
+        unsubs = [
+            self.coordinator.async_add_listener(self._handle_coordinator_update),
+            async_track_time_interval(self.hass, self._publish, self.publish_interval),
+        ]
+
+        @callback
+        def _stop() -> None:
+            for unsub in unsubs:
+                unsub()
+
+        return _stop
+
+    @callback
+    def async_add_listener(self, update_callback: CALLBACK_TYPE) -> CALLBACK_TYPE:
+        """Listen for published aggregates."""
+        self._listeners.append(update_callback)
+        return lambda: self._listeners.remove(update_callback)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        snapshot = self.coordinator.data
+        if snapshot is None or Measurements in snapshot.failed:
+            return
+        sample_time = snapshot.sample_times[Measurements]
+        if sample_time == self._last_sample_time:
+            return
+        self._last_sample_time = sample_time
+        measurements = snapshot.get(Measurements)
+        for key, value_fn in self.signals.items():
+            self.windows[key].add(sample_time, value_fn(measurements))
+
+    @callback
+    def _publish(self, _now: datetime | None = None) -> None:
+        now = self.hass.loop.time()
+        for window in self.windows.values():
+            window.expire(now)
+        for update_callback in list(self._listeners):
+            update_callback()
+
+
+class EnergyIntegrator:
+    """
+    Integrates Measurements power signals of one port into energy, with the trapezoidal rule.
+
+    Every new Measurements sample is integrated at its own sample time, so skipped ticks and slow reads don't skew the energy.
+    Intervals longer than `max_gap` (e.g. while the device is unreachable) are not integrated, the power in between is unknown.
+    Listeners are only called once per `publish_interval`.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        coordinator: EnovatesDUCoordinator,
+        signals: Mapping[str, Callable[[Measurements], float]],
+        max_gap: timedelta,
+        publish_interval: timedelta = timedelta(minutes=1),
+    ) -> None:
+        """Initialize the integrator, signals in W."""
+        self.hass = hass
+        self.coordinator = coordinator
+        self.signals = signals
+        self.max_gap = max_gap.total_seconds()
+        self.publish_interval = publish_interval
+        self.energy: dict[str, float] = dict.fromkeys(signals, 0.0)  # Wh
+        self._listeners: list[CALLBACK_TYPE] = []
+        self._last_sample: tuple[float, dict[str, float]] | None = None
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Start integrating and publishing, returns a callback to stop."""
+        unsubs = [
+            self.coordinator.async_add_listener(self._handle_coordinator_update),
+            async_track_time_interval(self.hass, self._publish, self.publish_interval),
+        ]
+
+        @callback
+        def _stop() -> None:
+            for unsub in unsubs:
+                unsub()
+
+        return _stop
+
+    @callback
+    def async_add_listener(self, update_callback: CALLBACK_TYPE) -> CALLBACK_TYPE:
+        """Listen for published energy."""
+        self._listeners.append(update_callback)
+        return lambda: self._listeners.remove(update_callback)
+
+    @callback
+    def async_restore(self, key: str, energy: float) -> None:
+        """Continue from the energy restored after a restart, in Wh."""
+        self.energy[key] += energy
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        snapshot = self.coordinator.data
+        if snapshot is None or Measurements in snapshot.failed:
+            return
+        sample_time = snapshot.sample_times[Measurements]
+        if self._last_sample is not None and sample_time == self._last_sample[0]:
+            return
+        measurements = snapshot.get(Measurements)
+        power = {key: value_fn(measurements) for key, value_fn in self.signals.items()}
+        if self._last_sample is not None and (dt := sample_time - self._last_sample[0]) <= self.max_gap:
+            last_power = self._last_sample[1]
+            for key, value in power.items():
+                self.energy[key] += (last_power[key] + value) / 2 * dt / 3600
+        self._last_sample = (sample_time, power)
+
+    @callback
+    def _publish(self, _now: datetime | None = None) -> None:
+        for update_callback in list(self._listeners):
+            update_callback()
@@ -0,0 +1,179 @@
+"""Totals over the ports of a charger, and over all Enovates chargers of the site."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import TYPE_CHECKING, Any
+
+from enovates_modbus.eno_one import CurrentOffered, Measurements
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.util.hass_dict import HassKey
+
+from .const import DOMAIN
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Mapping
+    from datetime import datetime
+
+    from enovates_modbus.base import RegisterMap
+    from homeassistant.core import CALLBACK_TYPE, HomeAssistant
+
+    from .coordinator import EnovatesDUCoordinator
+
+DATA_SITE_TOTALS: HassKey[SiteTotals] = HassKey(f"{DOMAIN}_site_totals")
+SITE_UPDATE_INTERVAL = timedelta(seconds=1)
+
+
+@dataclass(frozen=True, kw_only=True)
+class Signal:
+    """A per-port value that is totalled."""
+
+    rm_type: type[RegisterMap]
+    value_fn: Callable[[Any], float]
+    counter: bool = False
+    """Whether the value is a monotonic counter, see `Totals`."""
+
+
+# Keys match the per-port sensors they total.
+SIGNALS: dict[str, Signal] = {
+    "charger_active_power_total": Signal(rm_type=Measurements, value_fn=lambda data: data.charger_active_power_total),
+    "active_energy_import_total": Signal(rm_type=Measurements, value_fn=lambda data: data.active_energy_import_total, counter=True),
+    "active_current_offered": Signal(rm_type=CurrentOffered, value_fn=lambda data: data.active_current_offered),
+}
+
+
+class Totals:
+    """
+    Sums signals over port coordinators, from their latest snapshots, without extra reads.
+
+    Recomputed on `async_update`, listeners are only called when a total changed.
+    A total is unavailable (None) while its register map is unavailable on any of the ports, so partial sums are never published.
+
+    With `accumulate_counters`, counter signals are totalled as the sum of their increases since each port was added,
+    so chargers that are added, reloaded or removed don't make the total jump.
+    """
+
+    def __init__(self, signals: Mapping[str, Signal], *, accumulate_counters: bool = False) -> None:
+        """Initialize the totals."""
+        self.signals = signals
+        self.accumulate_counters = accumulate_counters
+        self.values: dict[str, float | None] = dict.fromkeys(signals)
+        self._sources: dict[str, list[EnovatesDUCoordinator]] = {}
+        self._accumulated: dict[str, float] = dict.fromkeys(signals, 0)
+        self._last_counts: dict[tuple[str, EnovatesDUCoordinator], float] = {}
+        self._listeners: list[CALLBACK_TYPE] = []
+
+    @callback
+    def async_add_source(self, key: str, coordinators: Iterable[EnovatesDUCoordinator]) -> CALLBACK_TYPE:
+        """Include the ports of a charger, returns a callback to remove them again."""
+        self._sources[key] = ports = list(coordinators)
+        self.async_update()
+
+        @callback
+        def _remove() -> None:
+            del self._sources[key]
+            for name in self.signals:
+                for coordinator in ports:
+                    self._last_counts.pop((name, coordinator), None)
+            self.async_update()
+
+        return _remove
+
+    @callback
+    def async_add_listener(self, update_callback: CALLBACK_TYPE) -> CALLBACK_TYPE:
+        """Listen for changed totals."""
+        self._listeners.append(update_callback)
+        return lambda: self._listeners.remove(update_callback)
+
+    @callback
+    def async_update(self) -> None:
+        """Recompute the totals from the latest snapshots."""
+        values = {name: self._total(name, signal) for name, signal in self.signals.items()}
+        if values == self.values:
+            return
+        self.values = values
+        for update_callback in list(self._listeners):
+            update_callback()
+
+    def _total(self, name: str, signal: Signal) -> float | None:
+        port_values: list[tuple[EnovatesDUCoordinator, float]] = []
+        for coordinator in (coordinator for ports in self._sources.values() for coordinator in ports):
+            snapshot = coordinator.data
+            if not coordinator.last_update_success or snapshot is None or signal.rm_type not in snapshot.register_maps:
+                return None
+            if signal.rm_type in snapshot.failed and coordinator.is_stale(signal.rm_type):
+                return None
+            port_values.append((coordinator, signal.value_fn(snapshot.get(signal.rm_type))))
+        if not port_values:
+            return None
+        if not (signal.counter and self.accumulate_counters):
+            return sum(value for _, value in port_values)
+
+        for coordinator, value in port_values:
+            last = self._last_counts.get((name, coordinator))
+            # A counter that went down was reset (or replaced), it only sets a new baseline.
+            if last is not None and value > last:
+                self._accumulated[name] += value - last
+            self._last_counts[(name, coordinator)] = value
+        return self._accumulated[name]
+
+
+class SiteTotals(Totals):
+    """
+    Totals over all chargers of the site, with accumulated counters.
+
+    Recomputed every SITE_UPDATE_INTERVAL while chargers are included and the site sensors listen, instead of at the end of
+    every charger's tick, so the site sensors are written at the same rate however many chargers there are.
+    """
+
+    def __init__(self, hass: HomeAssistant, signals: Mapping[str, Signal]) -> None:
+        """Initialize the site totals."""
+        super().__init__(signals, accumulate_counters=True)
+        self.hass = hass
+        self._unsub_interval: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_add_source(self, key: str, coordinators: Iterable[EnovatesDUCoordinator]) -> CALLBACK_TYPE:
+        """Include the ports of a charger, returns a callback to remove them again."""
+        return self._async_scheduled(super().async_add_source(key, coordinators))
+
+    @callback
+    def async_add_listener(self, update_callback: CALLBACK_TYPE) -> CALLBACK_TYPE:
+        """Listen for changed totals."""
+        return self._async_scheduled(super().async_add_listener(update_callback))
+
+    @callback
+    def _async_scheduled(self, remove: CALLBACK_TYPE) -> CALLBACK_TYPE:
+        """Update the interval after an addition, and after its removal by the returned callback."""
+        self._async_update_interval()
+
+        @callback
+        def _remove() -> None:
+            remove()
+            self._async_update_interval()
+
+        return _remove
+
+    @callback
+    def _async_update_interval(self) -> None:
+        # Without listeners (site totals are disabled on every entry) nothing is recomputed.
+        active = bool(self._sources and self._listeners)
+        if active and self._unsub_interval is None:
+            self._unsub_interval = async_track_time_interval(self.hass, self._handle_interval, SITE_UPDATE_INTERVAL)
+        elif not active and self._unsub_interval is not None:
+            self._unsub_interval()
+            self._unsub_interval = None
+
+    @callback
+    def _handle_interval(self, _now: datetime) -> None:
+        self.async_update()
+
+
+@callback
+def async_get_site_totals(hass: HomeAssistant) -> SiteTotals:
+    """Get the totals over all chargers, shared by all config entries."""
+    if (totals := hass.data.get(DATA_SITE_TOTALS)) is None:
+        hass.data[DATA_SITE_TOTALS] = totals = SiteTotals(hass, SIGNALS)
+    return totals
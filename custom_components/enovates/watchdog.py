@@ -0,0 +1,158 @@
+"""Self-monitoring of the event loop cost of the Enovates integration."""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import callback
+from homeassistant.helpers import issue_registry as ir
+from homeassistant.helpers.event import async_track_time_interval
+
+from .const import DOMAIN, LOGGER
+
+if TYPE_CHECKING:
+    from datetime import datetime
+
+    from homeassistant.core import CALLBACK_TYPE, HomeAssistant
+
+    from .coordinator import TickBatch
+    from .data import EnovatesConfigEntry
+
+CATEGORIES = ("update", "listeners", "state_writes", "value_fn")
+
+
+@dataclass(frozen=True, kw_only=True)
+class WatchdogPolicy:
+    """Tick budget of the watchdog, and how it is enforced."""
+
+    budget: float
+    """Event loop time per tick, in seconds."""
+    window: int = 60
+    """Number of latest ticks (and lag probes) that are considered."""
+    threshold: int = 10
+    """Number of ticks in the window over budget that raise the repair issue."""
+    lag_interval: float = 1
+    publish_interval: timedelta = timedelta(minutes=1)
+
+
+class LoopWatchdog:
+    """
+    Tracks the event loop time spent per tick, and the event loop lag.
+
+    A repair issue is raised when at least `threshold` of the last `window` ticks exceeded the `budget` (see WatchdogPolicy),
+    and removed again once none of them did.
+    A summary is published to listeners every `publish_interval`.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: EnovatesConfigEntry, tick_batch: TickBatch, policy: WatchdogPolicy) -> None:
+        """Initialize the watchdog."""
+        self.hass = hass
+        self.entry = entry
+        self.tick_batch = tick_batch
+        self.policy = policy
+        self.ticks: deque[dict[str, float]] = deque(maxlen=policy.window)
+        self.lags: deque[float] = deque(maxlen=policy.window)
+        self.issue_id = f"tick_budget_exceeded_{entry.entry_id}"
+        self.issue_raised = False
+        self._listeners: list[CALLBACK_TYPE] = []
+
+    @staticmethod
+    def total(costs: dict[str, float]) -> float:
+        """Total cost of a tick, value_fn is part of the other categories."""
+        return sum(seconds for category, seconds in costs.items() if category != "value_fn")
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Start monitoring, returns a callback to stop (and remove the issue)."""
+        unsubs = [
+            self.tick_batch.async_add_tick_listener(self._handle_tick),
+            async_track_time_interval(self.hass, self._publish, self.policy.publish_interval),
+        ]
+        probe: list[CALLBACK_TYPE] = []
+
+        @callback
+        def _schedule_probe() -> None:
+            expected = self.hass.loop.time() + self.policy.lag_interval
+            probe[:] = [self.hass.loop.call_at(expected, _probe, expected).cancel]
+
+        @callback
+        def _probe(expected: float) -> None:
+            self.lags.append(max(0.0, self.hass.loop.time() - expected))
+            _schedule_probe()
+
+        _schedule_probe()
+
+        @callback
+        def _stop() -> None:
+            for unsub in [*unsubs, *probe]:
+                unsub()
+            ir.async_delete_issue(self.hass, DOMAIN, self.issue_id)
+
+        return _stop
+
+    @callback
+    def async_add_listener(self, update_callback: CALLBACK_TYPE) -> CALLBACK_TYPE:
+        """Listen for published summaries."""
+        self._listeners.append(update_callback)
+        return lambda: self._listeners.remove(update_callback)
+
+    @callback
+    def _handle_tick(self, costs: dict[str, float]) -> None:
+        self.ticks.append(costs)
+        over_budget = self.over_budget
+        if over_budget >= self.policy.threshold and not self.issue_raised:
+            self.issue_raised = True
+            LOGGER.warning(
+                "%s: %d of the last %d ticks took more than %.0f ms of event loop time",
+                self.entry.title,
+                over_budget,
+                len(self.ticks),
+                self.policy.budget * 1000,
+            )
+            ir.async_create_issue(
+                self.hass,
+                DOMAIN,
+                self.issue_id,
+                is_fixable=False,
+                is_persistent=False,
+                severity=ir.IssueSeverity.WARNING,
+                translation_key="tick_budget_exceeded",
+                translation_placeholders={
+                    "title": self.entry.title,
+                    "budget": f"{self.policy.budget * 1000:.0f}",
+                    "cost": f"{max(map(self.total, self.ticks)) * 1000:.0f}",
+                },
+            )
+        elif over_budget == 0 and self.issue_raised:
+            self.issue_raised = False
+            ir.async_delete_issue(self.hass, DOMAIN, self.issue_id)
+
+    @property
+    def over_budget(self) -> int:
+        """Number of ticks in the window that exceeded the budget."""
+        return sum(self.total(costs) > self.policy.budget for costs in self.ticks)
+
+    @property
+    def summary(self) -> dict[str, Any]:
+        """Summary of the window, in milliseconds."""
+        totals = [self.total(costs) for costs in self.ticks]
+        return {
+            "mean": round(sum(totals) / len(totals) * 1000, 3) if totals else None,
+            "max": round(max(totals) * 1000, 3) if totals else None,
+            "budget": round(self.policy.budget * 1000, 3),
+            "over_budget": self.over_budget,
+            "ticks": len(totals),
+            **{
+                f"{category}_mean": round(sum(costs.get(category, 0) for costs in self.ticks) / len(totals) * 1000, 3) if totals else None
+                for category in CATEGORIES
+            },
+            "loop_lag_max": round(max(self.lags) * 1000, 3) if self.lags else None,
+        }
+
+    @callback
+    def _publish(self, _now: datetime | None = None) -> None:
+        for update_callback in list(self._listeners):
+            update_callback()
@@ -0,0 +1,150 @@
+"""Websocket API for Enovates, for live telemetry that bypasses the state machine."""
+
+from __future__ import annotations
+
+import dataclasses
+import time
+from enum import Enum
+from typing import TYPE_CHECKING, Any
+
+import voluptuous as vol
+from enovates_modbus.eno_one import Measurements, Mode3Details
+from homeassistant.components import websocket_api
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.importlib import async_import_module
+
+from .const import DOMAIN
+
+if TYPE_CHECKING:
+    from enovates_modbus.base import RegisterMap
+
+    from .coordinator import EnovatesDUCoordinator
+
+# Register maps that can be streamed, by the name used in the subscription.
+TELEMETRY_REGISTER_MAPS: dict[str, type[RegisterMap]] = {
+    "measurements": Measurements,
+    "mode3_details": Mode3Details,
+}
+
+
+@callback
+def async_setup(hass: HomeAssistant) -> None:
+    """Register the websocket commands."""
+    websocket_api.async_register_command(hass, ws_subscribe_telemetry)
+    websocket_api.async_register_command(hass, ws_archive)
+
+
+def _serialize(value: Any) -> Any:
+    return value.value if isinstance(value, Enum) else value
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/subscribe_telemetry",
+        vol.Required("entry_id"): str,
+        vol.Optional("port", default=1): vol.All(int, vol.In([1, 2])),
+        vol.Optional("register_maps", default=list(TELEMETRY_REGISTER_MAPS)): vol.All([vol.In(TELEMETRY_REGISTER_MAPS)], vol.Length(min=1)),
+        vol.Optional("fields"): vol.All([str], vol.Length(min=1)),
+        vol.Optional("min_interval", default=0): vol.All(vol.Coerce(float), vol.Range(min=0)),
+    }
+)
+@callback
+def ws_subscribe_telemetry(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]) -> None:
+    """
+    Subscribe to live telemetry frames of one port.
+
+    A frame is sent for every new snapshot, at most once every `min_interval` seconds.
+    Only the selected register maps (and fields, if given) are included, a register map that failed to read is omitted.
+    """
+    entry = hass.config_entries.async_get_entry(msg["entry_id"])
+    if entry is None or entry.domain != DOMAIN or entry.state is not ConfigEntryState.LOADED:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, "Config entry not found or not loaded")
+        return
+
+    coordinator: EnovatesDUCoordinator | None = entry.runtime_data.coordinators.get(msg["port"])
+    if coordinator is None:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, f"Port {msg['port']} not found")
+        return
+
+    selection: dict[str, tuple[type[RegisterMap], list[str]]] = {}
+    requested_fields = set(msg.get("fields", ()))
+    for name in msg["register_maps"]:
+        rm_type = TELEMETRY_REGISTER_MAPS[name]
+        rm_fields = [f.name for f in dataclasses.fields(rm_type)]
+        selection[name] = (rm_type, [f for f in rm_fields if f in requested_fields] if requested_fields else rm_fields)
+        requested_fields.difference_update(rm_fields)
+
+    if requested_fields:
+        connection.send_error(msg["id"], websocket_api.ERR_INVALID_FORMAT, f"Unknown fields: {', '.join(sorted(requested_fields))}")
+        return
+
+    min_interval: float = msg["min_interval"]
+    last_version: int | None = None
+    last_sent: float | None = None
+
+    @callback
+    def forward_snapshot() -> None:
+        nonlocal last_version, last_sent
+        snapshot = coordinator.data
+        if snapshot is None or snapshot.version == last_version:
+            return
+        # Half a tick of tolerance, so a throttle equal to the interval does not drop every other frame.
+        if last_sent is not None and snapshot.sample_time - last_sent < min_interval - 0.5 * coordinator.update_interval.total_seconds():
+            return
+        last_version = snapshot.version
+        last_sent = snapshot.sample_time
+
+        # Sample times are on the event loop clock, which is not meaningful to clients.
+        offset = time.time() - hass.loop.time()
+        frame: dict[str, Any] = {"version": snapshot.version}
+        for name, (rm_type, rm_fields) in selection.items():
+            if rm_type in snapshot.failed or rm_type not in snapshot.register_maps:
+                continue
+            register_map = snapshot.get(rm_type)
+            frame[name] = {f: _serialize(getattr(register_map, f)) for f in rm_fields}
+            frame[name]["sample_time"] = snapshot.sample_times[rm_type] + offset
+        connection.send_message(websocket_api.event_message(msg["id"], frame))
+
+    connection.subscriptions[msg["id"]] = coordinator.async_add_listener(forward_snapshot)
+    connection.send_result(msg["id"])
+    forward_snapshot()
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/archive",
+        vol.Required("entry_id"): str,
+        vol.Optional("port", default=1): vol.All(int, vol.In([1, 2])),
+        vol.Required("start"): vol.Coerce(float),
+        vol.Required("end"): vol.Coerce(float),
+        vol.Optional("fields"): vol.All([str], vol.Length(min=1)),
+    }
+)
+@websocket_api.async_response
+async def ws_archive(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]) -> None:
+    """
+    Read a time range (unix timestamps, inclusive) of the telemetry archive of one port.
+
+    The result has the field names and a row of values per sample, the time first, and whether the rows were truncated.
+    """
+    entry = hass.config_entries.async_get_entry(msg["entry_id"])
+    if entry is None or entry.domain != DOMAIN or entry.state is not ConfigEntryState.LOADED:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, "Config entry not found or not loaded")
+        return
+
+    # Only imported when used, like the archive writer.
+    archive = await async_import_module(hass, f"{__package__}.archive")
+    requested_fields = msg.get("fields", archive.FIELDS)
+    if unknown := set(requested_fields).difference(archive.FIELDS):
+        connection.send_error(msg["id"], websocket_api.ERR_INVALID_FORMAT, f"Unknown fields: {', '.join(sorted(unknown))}")
+        return
+    fields = ["time", *(f for f in archive.FIELDS[1:] if f in requested_fields)]
+
+    records, truncated = await hass.async_add_executor_job(
+        archive.read_archive, archive.archive_path(hass, entry.entry_id, msg["port"]), msg["start"], msg["end"]
+    )
+    connection.send_result(
+        msg["id"],
+        {"fields": fields, "records": [archive.serialize(record, fields) for record in records], "truncated": truncated},
+    )
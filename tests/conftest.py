@@ -3,6 +3,7 @@
 from unittest.mock import PropertyMock, patch
 
 import pytest
+import pytest_socket
 from enovates_modbus.base import RegisterMap
 from enovates_modbus.eno_one import (
     APIVersion,
@@ -33,6 +34,12 @@ def snapshot(snapshot: SnapshotAssertion) -> SnapshotAssertion:
     return snapshot.use_extension(HomeAssistantSnapshotExtension)
 
 
+@pytest.fixture
+def unix_socket_enabled() -> None:
+    """Allow connecting to Unix sockets, which the Home Assistant test plugin blocks by only allowing 127.0.0.1."""
+    pytest_socket.socket_allow_hosts(["127.0.0.1"], allow_unix_socket=True)
+
+
 @pytest.fixture(autouse=True)
 def auto_enable_custom_integrations(enable_custom_integrations):
     return
@@ -56,64 +63,79 @@ def entry(request):
 
 
 @pytest.fixture
-def eno_one_client(entry):
+def register_maps() -> dict[type[RegisterMap], RegisterMap]:
+    """Register maps served by the (mocked) charger."""
+    return {
+        APIVersion: APIVersion(
+            major=1,
+            minor=2,
+        ),
+        State: State(
+            number_of_phases=1,
+            max_amp_per_phase=16,
+            ocpp_state=False,
+            load_shedding_state=False,
+            lock_state=LockState.NO_LOCK_PRESENT,
+            contactor_state=False,
+            led_color=LEDColor.RED,
+        ),
+        Measurements: Measurements(
+            current_l1=6,
+            current_l2=7,
+            current_l3=8,
+            voltage_l1=1,
+            voltage_l2=2,
+            voltage_l3=3,
+            charger_active_power_total=42,
+            charger_active_power_l1=11,
+            charger_active_power_l2=12,
+            charger_active_power_l3=13,
+            installation_current_l1=0,
+            installation_current_l2=0,
+            installation_current_l3=0,
+            active_energy_import_total=9001,
+        ),
+        Mode3Details: Mode3Details(
+            state_num=Mode3State.A1,
+            state_str="A1",
+            pwm_amp=0,
+            pwm=1000,
+            pp=0,
+            CP_pos=12,
+            CP_neg=12,
+        ),
+        EMSLimit: EMSLimit(
+            ems_limit=-1,
+        ),
+        TransactionToken: TransactionToken(
+            transaction_token="B00FC4FE",
+        ),
+        CurrentOffered: CurrentOffered(
+            active_current_offered=0,
+        ),
+        Diagnostics: Diagnostics(
+            manufacturer="Enovates Pytest",
+            vendor_id="eNovates Pytest",
+            serial_nr="7",
+            model_id="foo",
+            firmware_version="bar",
+        ),
+    }
+
+
+@pytest.fixture
+def config_flow_client():
+    """EnoOneClient of the config flow, that probes the charger."""
+    with patch("custom_components.enovates.config_flow.EnoOneClient", autospec=True) as client:
+        # For the .close call of the probe client.
+        client.return_value.client = PropertyMock(spec=AsyncModbusTcpClient)
+        yield client
+
+
+@pytest.fixture
+def eno_one_client(entry, register_maps):
     with patch("custom_components.enovates.EnoOneClient", autospec=True) as client:
-        data = {
-            APIVersion: APIVersion(
-                major=1,
-                minor=2,
-            ),
-            State: State(
-                number_of_phases=1,
-                max_amp_per_phase=16,
-                ocpp_state=False,
-                load_shedding_state=False,
-                lock_state=LockState.NO_LOCK_PRESENT,
-                contactor_state=False,
-                led_color=LEDColor.RED,
-            ),
-            Measurements: Measurements(
-                current_l1=6,
-                current_l2=7,
-                current_l3=8,
-                voltage_l1=1,
-                voltage_l2=2,
-                voltage_l3=3,
-                charger_active_power_total=42,
-                charger_active_power_l1=11,
-                charger_active_power_l2=12,
-                charger_active_power_l3=13,
-                installation_current_l1=0,
-                installation_current_l2=0,
-                installation_current_l3=0,
-                active_energy_import_total=9001,
-            ),
-            Mode3Details: Mode3Details(
-                state_num=Mode3State.A1,
-                state_str="A1",
-                pwm_amp=0,
-                pwm=1000,
-                pp=0,
-                CP_pos=12,
-                CP_neg=12,
-            ),
-            EMSLimit: EMSLimit(
-                ems_limit=-1,
-            ),
-            TransactionToken: TransactionToken(
-                transaction_token="B00FC4FE",
-            ),
-            CurrentOffered: CurrentOffered(
-                active_current_offered=0,
-            ),
-            Diagnostics: Diagnostics(
-                manufacturer="Enovates Pytest",
-                vendor_id="eNovates Pytest",
-                serial_nr="7",
-                model_id="foo",
-                firmware_version="bar",
-            ),
-        }
+        data = register_maps
 
         def fetch[T: RegisterMap](register_map: type[T]) -> T:
             if not entry.data[CONF_EMS_CONTROL] and register_map == TransactionToken:
@@ -0,0 +1,120 @@
+"""Tests for the telemetry archive."""
+
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+from enovates_modbus.eno_one import Measurements, Mode3Details, State
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import HomeAssistant
+
+from custom_components.enovates.archive import (
+    FIELDS,
+    INDEX_ENTRY,
+    TelemetryArchive,
+    decode_chunk,
+    encode_chunk,
+    read_archive,
+    serialize,
+    write_chunk,
+)
+from custom_components.enovates.data import PortSnapshot
+
+
+def _records(start_ms: int, count: int) -> list[tuple[int, ...]]:
+    return [(start_ms + i * 1000, *(i % 7 + field for field in range(len(FIELDS) - 1))) for i in range(count)]
+
+
+def _day_files(timestamp_ms: int) -> list[str]:
+    day = time.strftime("%Y-%m-%d", time.gmtime(timestamp_ms / 1000))
+    return [f"{day}.dat", f"{day}.idx"]
+
+
+def test_chunk_round_trip():
+    """Test that delta encoded chunks decode to the same records, smaller than the raw records."""
+    records = _records(int(time.time() * 1000), 600)
+    chunk = encode_chunk(records)
+    assert decode_chunk(chunk) == records
+    assert len(chunk) < len(records) * len(FIELDS) * 8 / 10
+
+
+def test_read_range(tmp_path: Path):
+    """Test that a range is read from the overlapping chunks only, and truncated to the limit."""
+    start_ms = (int(time.time()) // 86400) * 86400 * 1000
+    records = _records(start_ms, 100)
+    chunk_records = 10
+    for i in range(0, len(records), chunk_records):
+        write_chunk(tmp_path, records[i : i + chunk_records], keep_days=7)
+    index = tmp_path / _day_files(start_ms)[1]
+    assert len(index.read_bytes()) == len(records) // chunk_records * INDEX_ENTRY.size
+
+    result, truncated = read_archive(tmp_path, start_ms / 1000 + 15, start_ms / 1000 + 34)
+    assert result == records[15:35]
+    assert not truncated
+
+    result, truncated = read_archive(tmp_path, start_ms / 1000 + 15, start_ms / 1000 + 34, limit=5)
+    assert result == records[15:20]
+    assert truncated
+
+    assert read_archive(tmp_path, start_ms / 1000 - 86400 * 3, start_ms / 1000 - 86400) == ([], False)
+
+
+def test_retention(tmp_path: Path):
+    """Test that files older than the retention are removed."""
+    now_ms = int(time.time() * 1000)
+    old_ms = now_ms - 10 * 86400 * 1000
+    write_chunk(tmp_path, _records(old_ms, 1), keep_days=30)
+    assert sorted(path.name for path in tmp_path.iterdir()) == _day_files(old_ms)
+    write_chunk(tmp_path, _records(now_ms, 1), keep_days=7)
+    assert sorted(path.name for path in tmp_path.iterdir()) == _day_files(now_ms)
+    assert read_archive(tmp_path, now_ms / 1000 - 11 * 86400, now_ms / 1000)[0] == _records(now_ms, 1)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("entry", [(False, False)], indirect=True)
+async def test_telemetry_archive(eno_one_client: MagicMock, hass: HomeAssistant, tmp_path: Path):
+    """Test that every new sample is archived, in chunks, when Home Assistant stops and when stopped."""
+    fetch = eno_one_client.return_value.fetch.side_effect
+    coordinator = MagicMock()
+    chunk_records = 3
+    archive = TelemetryArchive(hass, coordinator, tmp_path, keep_days=7, chunk_records=chunk_records)
+    start = time.time()
+    stop = archive.async_start()
+    update = coordinator.async_add_listener.call_args[0][0]
+
+    def tick(version: int, sample_time: float, failed: frozenset = frozenset()) -> None:
+        register_maps = {rm_type: fetch(rm_type) for rm_type in (State, Measurements, Mode3Details)}
+        coordinator.data = PortSnapshot(
+            version=version,
+            sample_time=sample_time,
+            register_maps=register_maps,
+            sample_times=dict.fromkeys(register_maps, sample_time),
+            failed=failed,
+        )
+        update()
+
+    now = hass.loop.time()
+    tick(1, now)
+    tick(2, now)  # Same sample
+    tick(3, now + 1, failed=frozenset({Mode3Details}))
+    tick(4, now + 2)
+    tick(5, now + 3)
+    await hass.async_block_till_done()
+    assert len(read_archive(tmp_path, start - 1, start + 10)[0]) == chunk_records
+
+    tick(6, now + 4)
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_STOP)
+    await hass.async_block_till_done()
+    assert len(read_archive(tmp_path, start - 1, start + 10)[0]) == chunk_records + 1
+
+    tick(7, now + 5)
+    stop()
+    await hass.async_block_till_done()
+    records, _ = read_archive(tmp_path, start - 1, start + 10)
+    assert [record[0] - records[0][0] for record in records] == [0, 2000, 3000, 4000, 5000]
+    values = dict(zip(FIELDS[1:], serialize(records[0], list(FIELDS[1:])), strict=True))
+    measurements = fetch(Measurements)
+    assert values["current_l1"] == measurements.current_l1
+    assert values["charger_active_power_total"] == measurements.charger_active_power_total
+    coordinator.async_add_listener.return_value.assert_called_once()
@@ -0,0 +1,86 @@
+"""Tests for record and replay of Modbus traffic."""
+
+import gzip
+import json
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from enovates_modbus.eno_one import Diagnostics, Measurements
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.enovates.capture import MAGIC, CaptureRecord, ReplayLog, TrafficRecorder, read_capture
+from custom_components.enovates.codec import DecodeError
+from custom_components.enovates.const import CONF_CAPTURE
+
+
+@pytest.mark.asyncio
+@patch("custom_components.enovates.PLATFORMS", [Platform.SENSOR])
+@pytest.mark.parametrize("entry", [(True, False)], indirect=True)
+async def test_record_and_replay(
+    eno_one_client: AsyncMock,
+    entry: MockConfigEntry,
+    hass: HomeAssistant,
+    tmp_path: Path,
+):
+    """Test that a captured session can be replayed into the integration."""
+    path = tmp_path / "capture.bin.gz"
+    entry.add_to_hass(hass)
+    hass.config_entries.async_update_entry(entry, options={CONF_CAPTURE: True})
+    with patch("custom_components.enovates.capture.capture_path", return_value=path):
+        await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+    await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+    records = await hass.async_add_executor_job(read_capture, path)
+    assert {(r.device_id, r.method, r.args) for r in records} >= {(1, "fetch", (Measurements,)), (2, "fetch", (Measurements,))}
+    assert any(r.method == "get_diagnostics" and isinstance(r.result, Diagnostics) for r in records)
+
+    log = ReplayLog(records)
+    hass.config_entries.async_update_entry(entry, options={})
+    with patch("custom_components.enovates.EnoOneClient", log.client_factory(speed=0)):
+        await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+    assert entry.state is ConfigEntryState.LOADED
+    assert entry.runtime_data.snapshot(2).get(Measurements) == eno_one_client.return_value.fetch.side_effect(Measurements)
+    assert set(log.clients) == {1, 2}
+
+    await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+def test_restricted_types(tmp_path: Path):
+    """Test that a capture can't load arbitrary types."""
+    payload = json.dumps({"dict": [["result", {"exception": ["os.system", ["true"]]}]]}).encode()
+    path = tmp_path / "evil.bin.gz"
+    with gzip.open(path, "wb") as f:
+        f.write(MAGIC + len(payload).to_bytes(4, "little") + payload)
+
+    with pytest.raises(DecodeError):
+        read_capture(path)
+
+
+@pytest.mark.asyncio
+async def test_recorder_limit(hass: HomeAssistant, tmp_path: Path):
+    """Test that overlapping flushes write whole records, and that recording stops at the size limit."""
+    path = tmp_path / "capture.bin.gz"
+    recorder = TrafficRecorder(hass, path, max_bytes=1)
+    stop = recorder.async_start()
+
+    def record(i: int) -> CaptureRecord:
+        return CaptureRecord(time=i, duration=0, device_id=1, method="fetch", args=(Measurements,), result=i)
+
+    recorder.record(record(0))
+    flush = hass.async_create_task(recorder._async_flush())  # noqa: SLF001
+    stop()
+    await flush
+    await hass.async_block_till_done()
+    recorder.record(record(1))
+
+    assert [r.result for r in await hass.async_add_executor_job(read_capture, path)] == [0]
+    assert not recorder._buffer  # noqa: SLF001
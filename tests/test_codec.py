@@ -0,0 +1,47 @@
+"""Tests for the capture and daemon message encoding."""
+
+import json
+
+import pytest
+from enovates_modbus.eno_one import EMSLimit, LockState, Measurements
+from pymodbus import ModbusException
+
+from custom_components.enovates.codec import DecodeError, dumps, loads
+
+
+def test_round_trip():
+    """Test that the values of captures and daemon messages survive encoding."""
+    ems_limit = EMSLimit(ems_limit=16000)
+    value = ("result", {EMSLimit: ems_limit}, frozenset({Measurements}), LockState.UNLOCKED, [1, 2.5, None, "x"])
+    assert loads(dumps(value)) == value
+
+    error = loads(dumps(ModbusException("timeout")))
+    assert type(error) is ModbusException
+    assert str(error) == str(ModbusException("timeout"))
+
+
+def test_unlisted_exception():
+    """Test that an exception type that is not allowed is encoded as its closest allowed base class."""
+
+    class CustomError(ConnectionError):
+        pass
+
+    error = loads(dumps(CustomError(object())))
+    assert type(error) is ConnectionError
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"exception": ["os.system", ["true"]]},
+        {"register_map_type": "pymodbus.transport.serialtransport.os.getcwd"},
+        {"enum": ["Path", "/"]},
+        {"register_map": ["EMSLimit", {"command": "rm"}]},
+        {"tuple": [], "frozenset": []},
+        "not json",
+    ],
+)
+def test_rejected(data: object):
+    """Test that invalid data and types that are not allowed are rejected."""
+    with pytest.raises(DecodeError):
+        loads(data.encode() if isinstance(data, str) else json.dumps(data).encode())
@@ -14,11 +14,10 @@ from custom_components.enovates.const import DOMAIN
 
 
 @pytest.mark.asyncio
-@patch("custom_components.enovates.config_flow.EnoOneClient", autospec=True)
-async def test_flow_happy(eno_one_client: AsyncMock, hass: HomeAssistant):
+async def test_flow_happy(config_flow_client: AsyncMock, hass: HomeAssistant):
     """Test happy config flow."""
-    eno_one_client.return_value.check_version.return_value = True
-    eno_one_client.return_value.get_diagnostics.return_value = Diagnostics(
+    config_flow_client.return_value.check_version.return_value = True
+    config_flow_client.return_value.get_diagnostics.return_value = Diagnostics(
         manufacturer="Enovates TEST",
         vendor_id="eNovates TEST",
         serial_nr="7",
@@ -44,11 +43,12 @@ async def test_flow_happy(eno_one_client: AsyncMock, hass: HomeAssistant):
             },
         )
 
-    eno_one_client.assert_called_once()
-    eno_one_client.return_value.check_version.assert_called_once()
+    config_flow_client.assert_called_once()
+    config_flow_client.return_value.check_version.assert_called_once()
 
     assert result2["type"] == FlowResultType.CREATE_ENTRY
     assert result2["title"] == "ENO one - 7"
+    config_flow_client.return_value.client.close.assert_called_once()
     assert result2["data"] == {
         "host": "127.0.0.1",
         "port": 502,
@@ -60,10 +60,9 @@ async def test_flow_happy(eno_one_client: AsyncMock, hass: HomeAssistant):
 
 
 @pytest.mark.asyncio
-@patch("custom_components.enovates.config_flow.EnoOneClient", autospec=True)
-async def test_flow_no_connection(eno_one_client: AsyncMock, hass: HomeAssistant):
+async def test_flow_no_connection(config_flow_client: AsyncMock, hass: HomeAssistant):
     """Test no connection config flow."""
-    eno_one_client.return_value.check_version.side_effect = ConnectionError()
+    config_flow_client.return_value.check_version.side_effect = ConnectionError()
 
     result = await hass.config_entries.flow.async_init(DOMAIN, context={"source": SOURCE_USER})
     assert result["type"] == FlowResultType.FORM
@@ -84,21 +83,21 @@ async def test_flow_no_connection(eno_one_client: AsyncMock, hass: HomeAssistant
             },
         )
 
-    eno_one_client.assert_called_once()
-    eno_one_client.return_value.check_version.assert_called_once()
+    config_flow_client.assert_called_once()
+    config_flow_client.return_value.check_version.assert_called_once()
 
     assert result2["type"] == FlowResultType.FORM
     assert result2["errors"] == {"base": "connection"}
+    config_flow_client.return_value.client.close.assert_called_once()
 
     await hass.async_block_till_done()
     assert len(mock_setup_entry.mock_calls) == 0
 
 
 @pytest.mark.asyncio
-@patch("custom_components.enovates.config_flow.EnoOneClient", autospec=True)
-async def test_flow_modbus_error(eno_one_client: AsyncMock, hass: HomeAssistant):
+async def test_flow_modbus_error(config_flow_client: AsyncMock, hass: HomeAssistant):
     """Test modbus error on connect config flow."""
-    eno_one_client.return_value.check_version.side_effect = ModbusException("unit test exception")
+    config_flow_client.return_value.check_version.side_effect = ModbusException("unit test exception")
 
     result = await hass.config_entries.flow.async_init(DOMAIN, context={"source": SOURCE_USER})
     assert result["type"] == FlowResultType.FORM
@@ -119,8 +118,8 @@ async def test_flow_modbus_error(eno_one_client: AsyncMock, hass: HomeAssistant)
             },
         )
 
-    eno_one_client.assert_called_once()
-    eno_one_client.return_value.check_version.assert_called_once()
+    config_flow_client.assert_called_once()
+    config_flow_client.return_value.check_version.assert_called_once()
 
     assert result2["type"] == FlowResultType.FORM
     assert result2["errors"] == {"base": "connection"}
@@ -130,10 +129,9 @@ async def test_flow_modbus_error(eno_one_client: AsyncMock, hass: HomeAssistant)
 
 
 @pytest.mark.asyncio
-@patch("custom_components.enovates.config_flow.EnoOneClient", autospec=True)
-async def test_flow_general_error(eno_one_client: AsyncMock, hass: HomeAssistant):
+async def test_flow_general_error(config_flow_client: AsyncMock, hass: HomeAssistant):
     """Test general exception on connect config flow."""
-    eno_one_client.return_value.check_version.side_effect = Exception()
+    config_flow_client.return_value.check_version.side_effect = Exception()
 
     result = await hass.config_entries.flow.async_init(DOMAIN, context={"source": SOURCE_USER})
     assert result["type"] == FlowResultType.FORM
@@ -154,8 +152,8 @@ async def test_flow_general_error(eno_one_client: AsyncMock, hass: HomeAssistant
             },
         )
 
-    eno_one_client.assert_called_once()
-    eno_one_client.return_value.check_version.assert_called_once()
+    config_flow_client.assert_called_once()
+    config_flow_client.return_value.check_version.assert_called_once()
 
     assert result2["type"] == FlowResultType.FORM
     assert result2["errors"] == {"base": "unknown"}
@@ -165,18 +163,17 @@ async def test_flow_general_error(eno_one_client: AsyncMock, hass: HomeAssistant
 
 
 @pytest.mark.asyncio
-@patch("custom_components.enovates.config_flow.EnoOneClient", autospec=True)
-async def test_flow_ems_control_happy(eno_one_client: AsyncMock, hass: HomeAssistant):
+async def test_flow_ems_control_happy(config_flow_client: AsyncMock, hass: HomeAssistant):
     """Test config flow with EMS control."""
-    eno_one_client.return_value.check_version.return_value = True
-    eno_one_client.return_value.get_diagnostics.return_value = Diagnostics(
+    config_flow_client.return_value.check_version.return_value = True
+    config_flow_client.return_value.get_diagnostics.return_value = Diagnostics(
         manufacturer="Enovates TEST",
         vendor_id="eNovates TEST",
         serial_nr="7",
         model_id="42",
         firmware_version="3.14",
     )
-    eno_one_client.return_value.get_transaction_token.return_value = TransactionToken(transaction_token="TEST")
+    config_flow_client.return_value.get_transaction_token.return_value = TransactionToken(transaction_token="TEST")
 
     result = await hass.config_entries.flow.async_init(DOMAIN, context={"source": SOURCE_USER})
     assert result["type"] == FlowResultType.FORM
@@ -197,8 +194,8 @@ async def test_flow_ems_control_happy(eno_one_client: AsyncMock, hass: HomeAssis
             },
         )
 
-    eno_one_client.assert_called_once()
-    eno_one_client.return_value.check_version.assert_called_once()
+    config_flow_client.assert_called_once()
+    config_flow_client.return_value.check_version.assert_called_once()
 
     assert result2["type"] == FlowResultType.CREATE_ENTRY
     assert result2["title"] == "ENO one - 7"
@@ -213,18 +210,17 @@ async def test_flow_ems_control_happy(eno_one_client: AsyncMock, hass: HomeAssis
 
 
 @pytest.mark.asyncio
-@patch("custom_components.enovates.config_flow.EnoOneClient", autospec=True)
-async def test_flow_ems_control_wrong_device_setting(eno_one_client: AsyncMock, hass: HomeAssistant):
+async def test_flow_ems_control_wrong_device_setting(config_flow_client: AsyncMock, hass: HomeAssistant):
     """Test config flow with EMS on device set to monitoring only."""
-    eno_one_client.return_value.check_version.return_value = True
-    eno_one_client.return_value.get_diagnostics.return_value = Diagnostics(
+    config_flow_client.return_value.check_version.return_value = True
+    config_flow_client.return_value.get_diagnostics.return_value = Diagnostics(
         manufacturer="Enovates TEST",
         vendor_id="eNovates TEST",
         serial_nr="7",
         model_id="42",
         firmware_version="3.14",
     )
-    eno_one_client.return_value.get_transaction_token.side_effect = ModbusException("unittest - read error emulator")
+    config_flow_client.return_value.get_transaction_token.side_effect = ModbusException("unittest - read error emulator")
 
     result = await hass.config_entries.flow.async_init(DOMAIN, context={"source": SOURCE_USER})
     assert result["type"] == FlowResultType.FORM
@@ -245,8 +241,8 @@ async def test_flow_ems_control_wrong_device_setting(eno_one_client: AsyncMock,
             },
         )
 
-    eno_one_client.assert_called_once()
-    eno_one_client.return_value.check_version.assert_called_once()
+    config_flow_client.assert_called_once()
+    config_flow_client.return_value.check_version.assert_called_once()
 
     assert result2["type"] == FlowResultType.FORM
     assert result2["errors"] == {"base": "ems_control_disabled"}
@@ -256,18 +252,17 @@ async def test_flow_ems_control_wrong_device_setting(eno_one_client: AsyncMock,
 
 
 @pytest.mark.asyncio
-@patch("custom_components.enovates.config_flow.EnoOneClient", autospec=True)
-async def test_flow_ems_control_general_error(eno_one_client: AsyncMock, hass: HomeAssistant):
+async def test_flow_ems_control_general_error(config_flow_client: AsyncMock, hass: HomeAssistant):
     """Test config flow with token readout generic exception."""
-    eno_one_client.return_value.check_version.return_value = True
-    eno_one_client.return_value.get_diagnostics.return_value = Diagnostics(
+    config_flow_client.return_value.check_version.return_value = True
+    config_flow_client.return_value.get_diagnostics.return_value = Diagnostics(
         manufacturer="Enovates TEST",
         vendor_id="eNovates TEST",
         serial_nr="7",
         model_id="42",
         firmware_version="3.14",
     )
-    eno_one_client.return_value.get_transaction_token.side_effect = Exception()
+    config_flow_client.return_value.get_transaction_token.side_effect = Exception()
 
     result = await hass.config_entries.flow.async_init(DOMAIN, context={"source": SOURCE_USER})
     assert result["type"] == FlowResultType.FORM
@@ -288,8 +283,8 @@ async def test_flow_ems_control_general_error(eno_one_client: AsyncMock, hass: H
             },
         )
 
-    eno_one_client.assert_called_once()
-    eno_one_client.return_value.check_version.assert_called_once()
+    config_flow_client.assert_called_once()
+    config_flow_client.return_value.check_version.assert_called_once()
 
     assert result2["type"] == FlowResultType.FORM
     assert result2["errors"] == {"base": "unknown"}
@@ -299,8 +294,7 @@ async def test_flow_ems_control_general_error(eno_one_client: AsyncMock, hass: H
 
 
 @pytest.mark.asyncio
-@patch("custom_components.enovates.config_flow.EnoOneClient", autospec=True)
-async def test_duplicate_entry(eno_one_client: AsyncMock, hass: HomeAssistant) -> None:
+async def test_duplicate_entry(config_flow_client: AsyncMock, hass: HomeAssistant) -> None:
     """Test duplicate setup handling."""
     MockConfigEntry(
         domain=DOMAIN,
@@ -314,8 +308,8 @@ async def test_duplicate_entry(eno_one_client: AsyncMock, hass: HomeAssistant) -
         unique_id="7",
     ).add_to_hass(hass)
 
-    eno_one_client.return_value.check_version.return_value = True
-    eno_one_client.return_value.get_diagnostics.return_value = Diagnostics(
+    config_flow_client.return_value.check_version.return_value = True
+    config_flow_client.return_value.get_diagnostics.return_value = Diagnostics(
         manufacturer="Enovates TEST",
         vendor_id="eNovates TEST",
         serial_nr="7",
@@ -341,8 +335,8 @@ async def test_duplicate_entry(eno_one_client: AsyncMock, hass: HomeAssistant) -
             },
         )
 
-    eno_one_client.assert_called_once()
-    eno_one_client.return_value.check_version.assert_called_once()
+    config_flow_client.assert_called_once()
+    config_flow_client.return_value.check_version.assert_called_once()
 
     assert result2["type"] is FlowResultType.ABORT
     assert result2["reason"] == "already_configured"
@@ -351,8 +345,7 @@ async def test_duplicate_entry(eno_one_client: AsyncMock, hass: HomeAssistant) -
 
 
 @pytest.mark.asyncio
-@patch("custom_components.enovates.config_flow.EnoOneClient", autospec=True)
-async def test_reconfigure(eno_one_client: AsyncMock, hass: HomeAssistant):
+async def test_reconfigure(config_flow_client: AsyncMock, hass: HomeAssistant):
     """Test reconfigure flow."""
     entry = MockConfigEntry(
         domain=DOMAIN,
@@ -366,15 +359,15 @@ async def test_reconfigure(eno_one_client: AsyncMock, hass: HomeAssistant):
         unique_id="7",
     )
 
-    eno_one_client.return_value.check_version.return_value = True
-    eno_one_client.return_value.get_diagnostics.return_value = Diagnostics(
+    config_flow_client.return_value.check_version.return_value = True
+    config_flow_client.return_value.get_diagnostics.return_value = Diagnostics(
         manufacturer="Enovates TEST",
         vendor_id="eNovates TEST",
         serial_nr="7",
         model_id="42",
         firmware_version="3.14",
     )
-    eno_one_client.return_value.get_transaction_token.return_value = TransactionToken(transaction_token="TEST")
+    config_flow_client.return_value.get_transaction_token.return_value = TransactionToken(transaction_token="TEST")
 
     with patch(
         "custom_components.enovates.async_setup_entry",
@@ -400,8 +393,8 @@ async def test_reconfigure(eno_one_client: AsyncMock, hass: HomeAssistant):
             },
         )
 
-        eno_one_client.assert_called_once()
-        eno_one_client.return_value.check_version.assert_called_once()
+        config_flow_client.assert_called_once()
+        config_flow_client.return_value.check_version.assert_called_once()
 
         assert result2["type"] == FlowResultType.ABORT
         assert result2["reason"] == "reconfigure_successful"
@@ -410,8 +403,7 @@ async def test_reconfigure(eno_one_client: AsyncMock, hass: HomeAssistant):
 
 
 @pytest.mark.asyncio
-@patch("custom_components.enovates.config_flow.EnoOneClient", autospec=True)
-async def test_reconfigure_wrong_device(eno_one_client: AsyncMock, hass: HomeAssistant) -> None:
+async def test_reconfigure_wrong_device(config_flow_client: AsyncMock, hass: HomeAssistant) -> None:
     """Test reconfiguring into wrong device handling."""
     entry = MockConfigEntry(
         domain=DOMAIN,
@@ -426,8 +418,8 @@ async def test_reconfigure_wrong_device(eno_one_client: AsyncMock, hass: HomeAss
     )
     entry.add_to_hass(hass)
 
-    eno_one_client.return_value.check_version.return_value = True
-    eno_one_client.return_value.get_diagnostics.return_value = Diagnostics(
+    config_flow_client.return_value.check_version.return_value = True
+    config_flow_client.return_value.get_diagnostics.return_value = Diagnostics(
         manufacturer="Enovates TEST",
         vendor_id="eNovates TEST",
         serial_nr="not 7",
@@ -453,18 +445,18 @@ async def test_reconfigure_wrong_device(eno_one_client: AsyncMock, hass: HomeAss
             },
         )
 
-        eno_one_client.assert_called_once()
-        eno_one_client.return_value.check_version.assert_called_once()
+        config_flow_client.assert_called_once()
+        config_flow_client.return_value.check_version.assert_called_once()
 
         assert result2["type"] == FlowResultType.ABORT
         assert result2["reason"] == "wrong_device"
+        config_flow_client.return_value.client.close.assert_called_once()
         await hass.async_block_till_done()
         assert len(mock_setup_entry.mock_calls) == 0
 
 
 @pytest.mark.asyncio
-@patch("custom_components.enovates.config_flow.EnoOneClient", autospec=True)
-async def test_reconfigure_connection_error(eno_one_client: AsyncMock, hass: HomeAssistant) -> None:
+async def test_reconfigure_connection_error(config_flow_client: AsyncMock, hass: HomeAssistant) -> None:
     """Test reconfiguring wrong ip/port."""
     entry = MockConfigEntry(
         domain=DOMAIN,
@@ -479,7 +471,7 @@ async def test_reconfigure_connection_error(eno_one_client: AsyncMock, hass: Hom
     )
     entry.add_to_hass(hass)
 
-    eno_one_client.return_value.check_version.side_effect = ConnectionError()
+    config_flow_client.return_value.check_version.side_effect = ConnectionError()
 
     with patch(
         "custom_components.enovates.async_setup_entry",
@@ -499,8 +491,8 @@ async def test_reconfigure_connection_error(eno_one_client: AsyncMock, hass: Hom
             },
         )
 
-        eno_one_client.assert_called_once()
-        eno_one_client.return_value.check_version.assert_called_once()
+        config_flow_client.assert_called_once()
+        config_flow_client.return_value.check_version.assert_called_once()
 
         assert result2["type"] == FlowResultType.FORM
         assert result2["errors"] == {"base": "connection"}
@@ -510,8 +502,7 @@ async def test_reconfigure_connection_error(eno_one_client: AsyncMock, hass: Hom
 
 
 @pytest.mark.asyncio
-@patch("custom_components.enovates.config_flow.EnoOneClient", autospec=True)
-async def test_reconfigure_generic_error(eno_one_client: AsyncMock, hass: HomeAssistant) -> None:
+async def test_reconfigure_generic_error(config_flow_client: AsyncMock, hass: HomeAssistant) -> None:
     """Test reconfiguring other error."""
     entry = MockConfigEntry(
         domain=DOMAIN,
@@ -526,7 +517,7 @@ async def test_reconfigure_generic_error(eno_one_client: AsyncMock, hass: HomeAs
     )
     entry.add_to_hass(hass)
 
-    eno_one_client.return_value.check_version.side_effect = Exception()
+    config_flow_client.return_value.check_version.side_effect = Exception()
 
     with patch(
         "custom_components.enovates.async_setup_entry",
@@ -546,8 +537,8 @@ async def test_reconfigure_generic_error(eno_one_client: AsyncMock, hass: HomeAs
             },
         )
 
-        eno_one_client.assert_called_once()
-        eno_one_client.return_value.check_version.assert_called_once()
+        config_flow_client.assert_called_once()
+        config_flow_client.return_value.check_version.assert_called_once()
 
         assert result2["type"] == FlowResultType.FORM
         assert result2["errors"] == {"base": "unknown"}
@@ -557,8 +548,7 @@ async def test_reconfigure_generic_error(eno_one_client: AsyncMock, hass: HomeAs
 
 
 @pytest.mark.asyncio
-@patch("custom_components.enovates.config_flow.EnoOneClient", autospec=True)
-async def test_reconfigure_no_ems_control(eno_one_client: AsyncMock, hass: HomeAssistant) -> None:
+async def test_reconfigure_no_ems_control(config_flow_client: AsyncMock, hass: HomeAssistant) -> None:
     """Test reconfiguring with wrong ems setting."""
     entry = MockConfigEntry(
         domain=DOMAIN,
@@ -573,9 +563,9 @@ async def test_reconfigure_no_ems_control(eno_one_client: AsyncMock, hass: HomeA
     )
     entry.add_to_hass(hass)
 
-    eno_one_client.return_value.check_version.return_value = True
-    eno_one_client.return_value.get_transaction_token.side_effect = ModbusException("[unit test] no ems control enabled.")
-    eno_one_client.return_value.get_diagnostics.return_value = Diagnostics(
+    config_flow_client.return_value.check_version.return_value = True
+    config_flow_client.return_value.get_transaction_token.side_effect = ModbusException("[unit test] no ems control enabled.")
+    config_flow_client.return_value.get_diagnostics.return_value = Diagnostics(
         manufacturer="Enovates TEST",
         vendor_id="eNovates TEST",
         serial_nr="7",
@@ -601,8 +591,8 @@ async def test_reconfigure_no_ems_control(eno_one_client: AsyncMock, hass: HomeA
             },
         )
 
-        eno_one_client.assert_called_once()
-        eno_one_client.return_value.check_version.assert_called_once()
+        config_flow_client.assert_called_once()
+        config_flow_client.return_value.check_version.assert_called_once()
 
         assert result2["type"] == FlowResultType.FORM
         assert result2["errors"] == {"base": "ems_control_disabled"}
@@ -612,8 +602,7 @@ async def test_reconfigure_no_ems_control(eno_one_client: AsyncMock, hass: HomeA
 
 
 @pytest.mark.asyncio
-@patch("custom_components.enovates.config_flow.EnoOneClient", autospec=True)
-async def test_reconfigure_ems_check_exception(eno_one_client: AsyncMock, hass: HomeAssistant) -> None:
+async def test_reconfigure_ems_check_exception(config_flow_client: AsyncMock, hass: HomeAssistant) -> None:
     """Test reconfiguring with wrong ems setting."""
     entry = MockConfigEntry(
         domain=DOMAIN,
@@ -628,9 +617,9 @@ async def test_reconfigure_ems_check_exception(eno_one_client: AsyncMock, hass:
     )
     entry.add_to_hass(hass)
 
-    eno_one_client.return_value.check_version.return_value = True
-    eno_one_client.return_value.get_transaction_token.side_effect = Exception()
-    eno_one_client.return_value.get_diagnostics.return_value = Diagnostics(
+    config_flow_client.return_value.check_version.return_value = True
+    config_flow_client.return_value.get_transaction_token.side_effect = Exception()
+    config_flow_client.return_value.get_diagnostics.return_value = Diagnostics(
         manufacturer="Enovates TEST",
         vendor_id="eNovates TEST",
         serial_nr="7",
@@ -656,11 +645,72 @@ async def test_reconfigure_ems_check_exception(eno_one_client: AsyncMock, hass:
             },
         )
 
-        eno_one_client.assert_called_once()
-        eno_one_client.return_value.check_version.assert_called_once()
+        config_flow_client.assert_called_once()
+        config_flow_client.return_value.check_version.assert_called_once()
 
         assert result2["type"] == FlowResultType.FORM
         assert result2["errors"] == {"base": "unknown"}
 
         await hass.async_block_till_done()
         assert len(mock_setup_entry.mock_calls) == 0
+
+
+@pytest.mark.asyncio
+async def test_options_flow(hass: HomeAssistant):
+    """Test options flow."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            "host": "127.0.0.1",
+            "port": 502,
+            "dual_port": False,
+            "ems_control": False,
+        },
+        unique_id="7",
+    )
+    entry.add_to_hass(hass)
+
+    with patch(
+        "custom_components.enovates.async_setup_entry",
+        return_value=True,
+    ):
+        options = {
+            "aggregate_window": "5",
+            "phase_energy": False,
+            "statistics": False,
+            "staleness_budget": 10,
+            "site_totals": False,
+            "surplus_sensor": "sensor.grid_export",
+            "main_fuse": 25,
+            "metrics": False,
+            "capture": False,
+            "flight_recorder": False,
+            "archive_days": 0,
+            "io_thread": False,
+            "tick_budget": 50,
+        }
+        result = await hass.config_entries.options.async_init(entry.entry_id)
+        assert result["type"] == FlowResultType.FORM
+        assert result["step_id"] == "init"
+
+        result2 = await hass.config_entries.options.async_configure(result["flow_id"], options)
+        await hass.async_block_till_done()
+
+    assert result2["type"] == FlowResultType.CREATE_ENTRY
+    assert entry.options == options
+
+
+@pytest.mark.asyncio
+async def test_options_flow_site_totals(hass: HomeAssistant):
+    """Test that only one entry can provide the site totals."""
+    data = {"host": "127.0.0.1", "port": 502, "dual_port": False, "ems_control": False}
+    MockConfigEntry(domain=DOMAIN, data=data, options={"site_totals": True}, unique_id="7").add_to_hass(hass)
+    entry = MockConfigEntry(domain=DOMAIN, data=data, unique_id="8")
+    entry.add_to_hass(hass)
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    result2 = await hass.config_entries.options.async_configure(result["flow_id"], {"site_totals": True})
+
+    assert result2["type"] == FlowResultType.FORM
+    assert result2["errors"] == {"site_totals": "site_totals_provided"}
+    assert entry.options == {}
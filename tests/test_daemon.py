@@ -0,0 +1,134 @@
+"""Tests for the out-of-process polling daemon and its subscribers."""
+
+import asyncio
+import contextlib
+import time
+from pathlib import Path
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from enovates_modbus.eno_one import APIVersion, Measurements
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.enovates.const import CONF_DAEMON_SOCKET
+from custom_components.enovates.daemon import Poller, PollingDaemon, encode_message
+from custom_components.enovates.daemon_client import EnovatesDaemonCoordinator
+
+
+@pytest.mark.asyncio
+@patch("custom_components.enovates.PLATFORMS", [Platform.SENSOR])
+@pytest.mark.parametrize("entry", [(True, False)], indirect=True)
+async def test_daemon(
+    eno_one_client: AsyncMock,
+    entry: MockConfigEntry,
+    hass: HomeAssistant,
+    tmp_path: Path,
+    unix_socket_enabled: None,
+):
+    """Test that the coordinators subscribe to the daemon, device calls go through it, and snapshots are ticks."""
+    socket_path = str(tmp_path / "enovates.sock")
+    daemon = PollingDaemon(socket_path)
+    with patch("custom_components.enovates.daemon.EnoOneClient", eno_one_client):
+        task = hass.async_create_background_task(daemon.serve(), "enovates test daemon")
+        await hass.async_block_till_done()
+
+        entry.add_to_hass(hass)
+        hass.config_entries.async_update_entry(entry, options={CONF_DAEMON_SOCKET: socket_path})
+        await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+    assert entry.state is ConfigEntryState.LOADED
+    measurements = eno_one_client.return_value.fetch.side_effect(Measurements)
+    for device_id in (1, 2):
+        assert isinstance(entry.runtime_data.coordinators[device_id], EnovatesDaemonCoordinator)
+        assert entry.runtime_data.snapshot(device_id).get(Measurements) == measurements
+    keys = {("127.0.0.1", 502, 1), ("127.0.0.1", 502, 2)}
+    assert set(daemon.pollers) == keys
+    # The sensor platform gets the diagnostics through the daemon.
+    eno_one_client.return_value.get_diagnostics.assert_called()
+
+    # The snapshots of both ports that arrive together are one tick, and so are the snapshots replayed after a reconnect.
+    coordinators = entry.runtime_data.coordinators.values()
+    ticks = Mock()
+    unsub = next(iter(coordinators)).tick_batch.async_add_tick_listener(ticks)
+
+    def publish(c: EnovatesDaemonCoordinator, seq: int) -> None:
+        register_maps = dict(c.data.register_maps)
+        c.async_handle_snapshot(seq, time.time(), register_maps, dict.fromkeys(register_maps, time.time()), frozenset())
+
+    for c in coordinators:
+        publish(c, c.last_seq + 1)
+    await hass.async_block_till_done()
+    ticks.assert_called_once()
+    ticks.reset_mock()
+    for c in coordinators:
+        c.async_start_replay()
+    for c in coordinators:
+        for seq in range(c.last_seq + 1, c.last_seq + 4):
+            publish(c, seq)
+    await hass.async_block_till_done()
+    ticks.assert_not_called()
+    for c in coordinators:
+        c.async_end_replay()
+    ticks.assert_called_once()
+    unsub()
+
+    await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+    # Pollers linger after their subscribers are gone, once the daemon has seen the connection close.
+    async with asyncio.timeout(1):
+        while any(poller.idle_since is None for poller in daemon.pollers.values()):  # noqa: ASYNC110 The daemon has no event for it
+            await asyncio.sleep(0.01)
+    assert set(daemon.pollers) == keys
+
+    task.cancel()
+    await hass.async_block_till_done()
+
+
+@pytest.mark.asyncio
+async def test_invalid_message(tmp_path: Path, unix_socket_enabled: None):
+    """Test that the daemon closes a connection that subscribes to something other than a register map."""
+    socket_path = str(tmp_path / "enovates.sock")
+    daemon = PollingDaemon(socket_path)
+    task = asyncio.create_task(daemon.serve())
+    async with asyncio.timeout(1):
+        while not Path(socket_path).exists():  # noqa: ASYNC110 The daemon has no event for it
+            await asyncio.sleep(0.01)
+
+    reader, writer = await asyncio.open_unix_connection(socket_path)
+    writer.write(encode_message("subscribe", ("127.0.0.1", 502, 1), {"EnoOneClient": 1}, [], {}, None))
+    async with asyncio.timeout(1):
+        assert await reader.read() == b""
+    assert not daemon.pollers
+
+    writer.close()
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await task
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("entry", [(False, False)], indirect=True)
+async def test_poller_backoff(eno_one_client: AsyncMock):
+    """Test that a register map with backoff is retried after a doubling delay, and at its refresh frequency once it succeeds."""
+    refresh, backoff, max_backoff = 86400.0, 10.0, 15.0
+    with patch("custom_components.enovates.daemon.EnoOneClient", eno_one_client):
+        poller = Poller(("127.0.0.1", 502, 1), {APIVersion: refresh}, [], {APIVersion: (backoff, max_backoff)}, history=10)
+    unit = (APIVersion,)
+    fetch = eno_one_client.return_value.fetch
+    fetch.side_effect = ConnectionError("[unittest] offline")
+
+    await poller.poll(0)
+    assert poller.next_due[unit] == backoff
+    await poller.poll(backoff)
+    assert poller.next_due[unit] == backoff + max_backoff, "the doubled delay is capped"
+    assert poller.failed == {APIVersion}
+
+    fetch.side_effect = None
+    fetch.return_value = APIVersion(major=1, minor=2)
+    await poller.poll(backoff + max_backoff)
+    assert poller.next_due[unit] == backoff + max_backoff + refresh
+    assert not poller.failed
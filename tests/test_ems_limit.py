@@ -0,0 +1,36 @@
+"""Tests for the EMS limit arbitration."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from custom_components.enovates.data import EnovatesData
+from custom_components.enovates.ems_limit import EMSLimitArbiter
+
+
+@pytest.mark.asyncio
+async def test_cap_during_request():
+    """Test that a request that is being written when the cap is set is followed by the cap, not the other way around."""
+    entry = MagicMock()
+    entry.runtime_data = EnovatesData(ems_control=True, clients={1: AsyncMock()}, integration=MagicMock(), coordinators={})
+    ems_limits = EMSLimitArbiter(entry)
+    written = asyncio.Event()
+
+    async def slow_write(_limit: int) -> None:
+        await written.wait()
+
+    entry.runtime_data.clients[1].set_ems_limit.side_effect = slow_write
+    protection_client = AsyncMock()
+
+    request = asyncio.create_task(ems_limits.async_request(1, 16000))
+    await asyncio.sleep(0)
+    cap = asyncio.create_task(ems_limits.async_cap(1, 8000, protection_client))
+    await asyncio.sleep(0)
+    protection_client.set_ems_limit.assert_not_awaited()
+
+    written.set()
+    await asyncio.gather(request, cap)
+    entry.runtime_data.clients[1].set_ems_limit.assert_awaited_once_with(16000)
+    protection_client.set_ems_limit.assert_awaited_once_with(8000)
+    assert ems_limits.limit(1) == ems_limits.caps[1]
@@ -0,0 +1,62 @@
+"""Tests for the flight recorder."""
+
+import dataclasses
+from datetime import timedelta
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+from enovates_modbus.eno_one import Measurements, Mode3Details, Mode3State, State
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.enovates.data import PortSnapshot
+from custom_components.enovates.flight_recorder import BOOSTED_REGISTER_MAPS, FlightRecorder, RecordingWindow
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("entry", [(False, False)], indirect=True)
+async def test_flight_recorder(eno_one_client: MagicMock, hass: HomeAssistant, tmp_path: Path):
+    """Test that a fault triggers a boosted recording with the pre-trigger samples."""
+    fetch = eno_one_client.return_value.fetch.side_effect
+    coordinator = MagicMock()
+    coordinator.device_id = 1
+    flight_recorder = FlightRecorder(hass, coordinator, tmp_path, RecordingWindow(pre_trigger=timedelta(seconds=2)))
+    stop = flight_recorder.async_start()
+    update = coordinator.async_add_listener.call_args[0][0]
+
+    def tick(version: int, state_num: Mode3State) -> None:
+        register_maps = {rm_type: fetch(rm_type) for rm_type in (State, Measurements, Mode3Details)}
+        register_maps[Mode3Details] = dataclasses.replace(register_maps[Mode3Details], state_num=state_num)
+        coordinator.data = PortSnapshot(
+            version=version,
+            sample_time=float(version),
+            register_maps=register_maps,
+            sample_times=dict.fromkeys(register_maps, float(version)),
+        )
+        update()
+
+    for version in range(5):
+        tick(version, Mode3State.B1)
+    assert not flight_recorder.recording
+    coordinator.async_boost.assert_not_called()
+
+    tick(5, Mode3State.F)
+    assert flight_recorder.recording
+    coordinator.async_boost.assert_called_once_with(BOOSTED_REGISTER_MAPS, flight_recorder.window.fast_interval)
+    tick(6, Mode3State.F)
+
+    async_fire_time_changed(hass, dt_util.utcnow() + flight_recorder.window.post_trigger)
+    await hass.async_block_till_done()
+
+    assert not flight_recorder.recording
+    coordinator.async_boost.return_value.assert_called_once()
+    (recording,) = flight_recorder.recordings
+    assert recording["reason"] == "mode3_state_F"
+    # The samples within 2 seconds before the trigger, the trigger and the sample after.
+    assert [sample["Mode3Details"]["state_num"] for sample in recording["samples"]] == ["B1", "B1", "F", "F"]
+    assert len(list(tmp_path.glob("flight-port1-*.json"))) == 1
+
+    stop()
+    coordinator.async_add_listener.return_value.assert_called_once()
@@ -0,0 +1,60 @@
+"""Tests for the hourly statistics."""
+
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+from enovates_modbus.eno_one import Measurements
+from freezegun.api import FrozenDateTimeFactory
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from custom_components.enovates.data import EnovatesData, PortSnapshot
+from custom_components.enovates.hourly_statistics import HourlyStatistics
+
+
+def _set(coordinator: MagicMock, power: int, energy: int) -> None:
+    coordinator.data = PortSnapshot(
+        version=0,
+        sample_time=0,
+        register_maps={Measurements: MagicMock(charger_active_power_total=power, active_energy_import_total=energy)},
+        sample_times={Measurements: 0},
+    )
+
+
+@pytest.mark.asyncio
+async def test_hourly_statistics(hass: HomeAssistant, freezer: FrozenDateTimeFactory):
+    """Test that an hour is imported at the first sample of the next one, summed over the ports."""
+    ports = {1: MagicMock(), 2: MagicMock()}
+    entry = MagicMock(unique_id="SN-7", title="ENO one")
+    entry.runtime_data = EnovatesData(ems_control=False, clients={}, integration=MagicMock(), coordinators=ports)
+    tick_batch = MagicMock()
+    statistics = HourlyStatistics(hass, entry, tick_batch)
+    assert statistics.energy_metadata["statistic_id"] == "enovates:sn_7_energy"
+    stop = statistics.async_start()
+    tick = tick_batch.async_add_tick_listener.call_args.args[0]
+
+    hour = dt_util.parse_datetime("2026-10-19 12:00:00+00:00")
+    freezer.move_to(hour + timedelta(minutes=10))
+    powers = (1000, 3000, 2000)
+    with patch("custom_components.enovates.hourly_statistics.async_add_external_statistics") as add:
+        for power, energy in zip(powers, (10000, 10500, 11000), strict=True):
+            _set(ports[1], power, energy)
+            _set(ports[2], 0, 5000)
+            tick({})
+        add.assert_not_called()
+
+        freezer.move_to(hour + timedelta(hours=1, seconds=1))
+        tick({})
+
+    (_, energy_metadata, [energy]), (_, _, [power]) = (call.args for call in add.call_args_list)
+    assert energy_metadata["has_sum"]
+    assert energy["start"] == hour
+    assert energy["state"] == pytest.approx(16)
+    assert energy["sum"] == pytest.approx(1)
+    assert power["mean"] == pytest.approx(sum(powers) / len(powers))
+    assert power["min"] == min(powers)
+    assert power["max"] == max(powers)
+
+    stop()
+    tick_batch.async_add_tick_listener.return_value.assert_called_once()
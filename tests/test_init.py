@@ -1,23 +1,90 @@
 """Tests for integration init."""
 
-from unittest.mock import AsyncMock, PropertyMock, patch
+import asyncio
+import subprocess
+import sys
+from datetime import timedelta
+from unittest.mock import AsyncMock, Mock, PropertyMock, patch
 
 import pytest
+from enovates_modbus.base import RegisterMap
 from enovates_modbus.eno_one import (
     APIVersion,
+    Diagnostics,
+    EMSLimit,
     EnoOneClient,
+    Measurements,
+    State,
     TransactionToken,
 )
-from homeassistant.const import CONF_HOST, CONF_PORT
+from homeassistant.const import CONF_HOST, CONF_PORT, Platform
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.update_coordinator import UpdateFailed
 from pymodbus import ModbusException
 from pymodbus.client import AsyncModbusTcpClient
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
+from custom_components.enovates import SNAPSHOT_REGISTER_MAPS, async_unload_entry
 from custom_components.enovates.const import CONF_DUAL_PORT, CONF_EMS_CONTROL
-from custom_components.enovates.coordinator import EnovatesDUCoordinator
-from custom_components.enovates.data import EnovatesData
+from custom_components.enovates.coordinator import EnovatesDUCoordinator, EnovatesRegisterMapView, TickBatch
+from custom_components.enovates.data import EnovatesData, PortSnapshot
+
+# Modules of optional features, imported when the feature is enabled.
+OPTIONAL_MODULES = (
+    "archive",
+    "capture",
+    "daemon",
+    "daemon_client",
+    "flight_recorder",
+    "hourly_statistics",
+    "io_thread",
+    "metrics",
+    "protection",
+    "solar",
+)
+
+
+def test_import_budget():
+    """Test that importing the integration doesn't import the optional features."""
+    script = """
+import sys
+import custom_components.enovates
+print(",".join(sorted(m for m in sys.modules if m.startswith("custom_components.enovates."))))
+"""
+    # In a fresh interpreter, the test session has imported all modules already.
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)  # noqa: S603
+    modules = set(result.stdout.strip().split(","))
+    assert "custom_components.enovates.coordinator" in modules
+    assert not {f"custom_components.enovates.{name}" for name in OPTIONAL_MODULES} & modules
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("entry", [(False, False), (False, True)], indirect=True, ids=lambda e: f"dual_port={e[0]},ems_control={e[1]}")
+async def test_forwarded_platforms(eno_one_client: AsyncMock, entry: MockConfigEntry, hass: HomeAssistant):
+    """Test that the number platform is only forwarded with EMS control."""
+    with (
+        patch.object(hass.config_entries, "async_forward_entry_setups") as forward,
+        patch.object(hass.config_entries.flow, "async_init"),
+    ):
+        entry.add_to_hass(hass)
+        await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+    platforms = forward.call_args.args[1]
+    assert (Platform.NUMBER in platforms) == entry.data[CONF_EMS_CONTROL]
+    assert {Platform.SENSOR, Platform.BINARY_SENSOR} <= set(platforms)
+
+    # A reconfigure changes the data before the reload, the platforms that were set up are unloaded.
+    with (
+        patch.object(hass.config_entries, "async_forward_entry_setups"),
+        patch.object(hass.config_entries, "async_unload_platforms", return_value=True) as unload,
+    ):
+        hass.config_entries.async_update_entry(entry, data={**entry.data, CONF_EMS_CONTROL: not entry.data[CONF_EMS_CONTROL]})
+        await hass.async_block_till_done()
+    assert unload.call_args.args[1] == platforms
+
+    await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
 
 
 @pytest.mark.asyncio
@@ -86,10 +153,14 @@ async def test_init_happy(eno_one_client: AsyncMock, entry: MockConfigEntry, has
     if not ems:
         register_maps.remove(TransactionToken)
 
+    assert ed.coordinators.keys() == device_ids, "there should be exactly one coordinator per port"
     for device_id in device_ids:
+        assert isinstance(ed.coordinators[device_id], EnovatesDUCoordinator), "wrong coordinator type"
         for register_map in register_maps:
             c = ed.coordinator(device_id, register_map)
-            assert isinstance(c, EnovatesDUCoordinator), "wrong coordinator type"
+            assert isinstance(c, EnovatesRegisterMapView), "wrong coordinator type"
+            assert c.coordinator is ed.coordinators[device_id], "view must be on the port's coordinator"
+            assert isinstance(c.data, register_map), "wrong data type"
 
     await hass.config_entries.async_unload(entry.entry_id)
     await hass.async_block_till_done()
@@ -97,3 +168,224 @@ async def test_init_happy(eno_one_client: AsyncMock, entry: MockConfigEntry, has
     assert len(eno_one_client.return_value.client.close.call_args_list) == len(device_ids), (
         "client stop should have been called for every device id"
     )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("entry", [(False, False)], indirect=True, ids=lambda e: f"dual_port={e[0]},ems_control={e[1]}")
+async def test_retry_policy(eno_one_client: AsyncMock, entry: MockConfigEntry, hass: HomeAssistant):
+    """Test that high-rate maps are not retried and static maps back off until they succeed."""
+    with (
+        patch.object(hass.config_entries, "async_forward_entry_setups"),
+        patch.object(hass.config_entries.flow, "async_init"),
+    ):
+        entry.add_to_hass(hass)
+        await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+    c = entry.runtime_data.coordinators[1]
+    fetch = eno_one_client.return_value.fetch
+    happy_fetch = fetch.side_effect
+    fetch.side_effect = ModbusException("[unittest] modbus exception test")
+
+    fetch.reset_mock()
+    await c.async_refresh()
+    # The snapshot group is abandoned at the first failure, then APIVersion, Diagnostics and EMSLimit.
+    reads = (State, APIVersion, Diagnostics, EMSLimit)
+    assert fetch.call_count == len(reads), "register maps must not be retried within a tick"
+    assert c.last_update_success, "only a failing first refresh fails the whole coordinator"
+    assert c.data.failed == set(c.refresh_frequency)
+    assert entry.runtime_data.coordinator(1, Measurements).last_update_success, "a failure within the staleness budget is not unavailable"
+    assert isinstance(entry.runtime_data.coordinator(1, Measurements).data, Measurements), "last value must be kept"
+    with patch.object(hass.loop, "time", return_value=hass.loop.time() + 11):
+        assert not entry.runtime_data.coordinator(1, Measurements).last_update_success, "a stale register map is unavailable"
+        assert entry.runtime_data.coordinator(1, Diagnostics).last_update_success, "static register maps have a longer budget"
+
+    now = hass.loop.time()
+    assert c.next_due[Measurements] - now == pytest.approx(1, abs=0.5), "high-rate maps skip to their next tick"
+    assert c.next_due[Diagnostics] - now == pytest.approx(10, abs=0.5), "static maps back off"
+    await c.async_refresh()
+    assert c.next_due[Diagnostics] - hass.loop.time() == pytest.approx(20, abs=0.5), "backoff must double"
+
+    fetch.side_effect = happy_fetch
+    await c.async_refresh()
+    assert not c.data.failed
+    assert entry.runtime_data.coordinator(1, Diagnostics).last_update_success
+    assert c.next_due[Diagnostics] - hass.loop.time() == pytest.approx(timedelta(days=1).total_seconds(), abs=0.5), (
+        "regular frequency must be restored after a success"
+    )
+
+    await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("entry", [(False, False)], indirect=True, ids=lambda e: f"dual_port={e[0]},ems_control={e[1]}")
+async def test_fixed_rate_schedule(eno_one_client: AsyncMock, entry: MockConfigEntry, hass: HomeAssistant):
+    """Test that refreshes stay on a fixed-rate grid and overrun ticks are skipped and counted."""
+    with (
+        patch.object(hass.config_entries, "async_forward_entry_setups"),
+        patch.object(hass.config_entries.flow, "async_init"),
+    ):
+        entry.add_to_hass(hass)
+        await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+    c = entry.runtime_data.coordinators[1]
+    assert c.sample_time is not None, "the first refresh must have recorded an acquisition time"
+
+    start = 100.0
+    with patch.object(hass.loop, "call_at") as call_at:
+        with patch.object(hass.loop, "time", return_value=start):
+            c._schedule_refresh()  # noqa: SLF001
+        assert call_at.call_args.args[0] == start + 1
+
+        # A read started on tick 101 that only finished at 103.5 overran the ticks at 102 and 103.
+        overrun = (start + 2, start + 3)
+        with patch.object(hass.loop, "time", return_value=start + 3.5):
+            c._last_tick = start + 1  # noqa: SLF001
+            c._schedule_refresh()  # noqa: SLF001
+        assert call_at.call_args.args[0] == start + 4, "the grid must not drift with read latency"
+        assert c.skipped_ticks == len(overrun)
+
+        # A read that finishes within its interval does not skip anything.
+        with patch.object(hass.loop, "time", return_value=start + 4.2):
+            c._last_tick = start + 4  # noqa: SLF001
+            c._schedule_refresh()  # noqa: SLF001
+        assert call_at.call_args.args[0] == start + 5
+        assert c.skipped_ticks == len(overrun)
+
+    await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("entry", [(True, False)], indirect=True, ids=lambda e: f"dual_port={e[0]},ems_control={e[1]}")
+async def test_port_snapshot(eno_one_client: AsyncMock, entry: MockConfigEntry, hass: HomeAssistant):
+    """Test that the live register maps of a port are acquired together, as one versioned snapshot."""
+    with (
+        patch.object(hass.config_entries, "async_forward_entry_setups"),
+        patch.object(hass.config_entries.flow, "async_init"),
+    ):
+        entry.add_to_hass(hass)
+        await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+    ed = entry.runtime_data
+    c = ed.coordinators[1]
+    first = ed.snapshot(1)
+    assert isinstance(first, PortSnapshot)
+    assert set(first.register_maps) == set(c.refresh_frequency)
+    assert first.get(Measurements) is ed.coordinator(1, Measurements).data
+    assert {first.sample_times[rm_type] for rm_type in SNAPSHOT_REGISTER_MAPS} == {first.sample_times[State]}, (
+        "the snapshot group must be acquired together"
+    )
+
+    # A scheduled tick only reads what is due.
+    fetch = eno_one_client.return_value.fetch
+    fetch.reset_mock()
+    c.next_due.update(dict.fromkeys(SNAPSHOT_REGISTER_MAPS, 0))
+    c._scheduled = True  # noqa: SLF001
+    await c.async_refresh()
+    assert {call.args[0] for call in fetch.call_args_list} == set(SNAPSHOT_REGISTER_MAPS), "one acquisition per tick"
+    assert ed.snapshot(1).version == first.version + 1
+    assert ed.snapshot(1).get(Diagnostics) is first.get(Diagnostics), "register maps that were not due are kept"
+    assert ed.snapshot(2).version == 1, "ports are versioned independently"
+
+    # A failure on any register map in the group must not produce a partial update.
+    happy_fetch = fetch.side_effect
+    changed_state = Mock(spec=State)
+
+    def measurements_fail(rm_type: type[RegisterMap]) -> RegisterMap:
+        if rm_type is Measurements:
+            raise ModbusException("[unittest] modbus exception test")
+        return changed_state if rm_type is State else happy_fetch(rm_type)
+
+    fetch.side_effect = measurements_fail
+    await c.async_refresh()
+    assert ed.snapshot(1).get(State) is first.get(State)
+    assert set(SNAPSHOT_REGISTER_MAPS) <= ed.snapshot(1).failed
+
+    listener = Mock()
+    unsub = ed.coordinator(1, Diagnostics).async_add_listener(listener)
+    fetch.side_effect = happy_fetch
+    await c.async_refresh()
+    assert listener.call_count == 0, "unchanged register maps must not notify their listeners"
+    unsub()
+
+    listener = Mock()
+    unsub = ed.coordinator(1, State).async_add_listener(listener)
+    fetch.side_effect = measurements_fail
+    await c.async_refresh()
+    assert listener.call_count == 0, "a failure within the staleness budget must not change the availability"
+    with patch.object(hass.loop, "time", return_value=hass.loop.time() + 11):
+        await c.async_refresh()
+    assert listener.call_count == 1, "availability changed once stale"
+    unsub()
+
+    await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("entry", [(False, False)], indirect=True, ids=lambda e: f"dual_port={e[0]},ems_control={e[1]}")
+async def test_unload_cancels_reads(eno_one_client: AsyncMock, entry: MockConfigEntry, hass: HomeAssistant):
+    """Test that unload cancels a read in progress, and closes the clients even if the platforms fail to unload."""
+    with (
+        patch.object(hass.config_entries, "async_forward_entry_setups"),
+        patch.object(hass.config_entries.flow, "async_init"),
+    ):
+        entry.add_to_hass(hass)
+        await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+    started = asyncio.Event()
+
+    async def hang(_rm_type: type[RegisterMap]) -> RegisterMap:
+        started.set()
+        await asyncio.Event().wait()
+
+    eno_one_client.return_value.fetch.side_effect = hang
+    refresh = hass.async_create_task(entry.runtime_data.coordinators[1].async_refresh())
+    await started.wait()
+
+    with patch.object(hass.config_entries, "async_unload_platforms", return_value=False):
+        assert not await async_unload_entry(hass, entry)
+    assert refresh.done(), "the read in progress must be cancelled"
+    eno_one_client.return_value.client.close.assert_called_once()
+
+    await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_tick_batch(hass: HomeAssistant):
+    """Test that state writes during the ticks of a charger are deferred and flushed once per entity."""
+    batch = TickBatch(hass)
+    port_1, port_2 = object(), object()
+    entity_a, entity_b = Mock(), Mock()
+
+    batch.async_schedule_write(entity_a)
+    assert entity_a.async_write_ha_state.call_count == 1, "writes outside of a tick must not be deferred"
+    entity_a.reset_mock()
+
+    batch.async_start(port_1)
+    batch.async_start(port_2)
+    batch.async_schedule_write(entity_a)
+    batch.async_schedule_write(entity_b)
+    batch.async_schedule_write(entity_a)
+    batch.async_finish(port_1)
+    assert entity_a.async_write_ha_state.call_count == 0, "writes must wait for all ports of the tick"
+    batch.async_finish(port_2)
+    assert entity_a.async_write_ha_state.call_count == 1, "writes must be flushed once per entity"
+    assert entity_b.async_write_ha_state.call_count == 1
+
+    # A port that hangs must not hold back the writes forever.
+    entity_b.reset_mock()
+    with patch.object(hass.loop, "call_later") as call_later:
+        batch.async_start(port_1)
+        batch.async_schedule_write(entity_b)
+    delay, flush = call_later.call_args.args
+    assert delay == batch.max_delay
+    flush()
+    assert entity_b.async_write_ha_state.call_count == 1
+    batch.async_finish(port_1)
+    assert entity_b.async_write_ha_state.call_count == 1, "flushed writes must not be repeated"
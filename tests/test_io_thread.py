@@ -0,0 +1,48 @@
+"""Tests for the Modbus I/O thread."""
+
+import threading
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from enovates_modbus.base import RegisterMap
+from enovates_modbus.eno_one import Measurements
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.enovates.const import CONF_IO_THREAD
+from custom_components.enovates.io_thread import DATA_IO_THREAD, ThreadedClient
+
+
+@pytest.mark.asyncio
+@patch("custom_components.enovates.PLATFORMS", [Platform.SENSOR])
+@pytest.mark.parametrize("entry", [(True, False)], indirect=True)
+async def test_io_thread(eno_one_client: AsyncMock, entry: MockConfigEntry, hass: HomeAssistant):
+    """Test that the clients run on the I/O thread, and the thread stops on unload."""
+    fetch = eno_one_client.return_value.fetch.side_effect
+    threads: set[str] = set()
+
+    def fetch_on_thread(register_map: type[RegisterMap]) -> RegisterMap:
+        threads.add(threading.current_thread().name)
+        return fetch(register_map)
+
+    eno_one_client.return_value.fetch.side_effect = fetch_on_thread
+
+    entry.add_to_hass(hass)
+    hass.config_entries.async_update_entry(entry, options={CONF_IO_THREAD: True})
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert entry.state is ConfigEntryState.LOADED
+    assert all(isinstance(client, ThreadedClient) for client in entry.runtime_data.clients.values())
+    assert threads == {"enovates_modbus_io"}
+    assert entry.runtime_data.snapshot(2).get(Measurements) == fetch(Measurements)
+    io_thread = hass.data[DATA_IO_THREAD]
+
+    await hass.config_entries.async_unload(entry.entry_id)
+    # The thread is stopped by an executor job, which is a background task when unloading from the test.
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    assert DATA_IO_THREAD not in hass.data
+    assert io_thread.loop.is_closed()
@@ -0,0 +1,69 @@
+"""Tests for the OpenMetrics endpoint."""
+
+from http import HTTPStatus
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant
+from homeassistant.setup import async_setup_component
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pytest_homeassistant_custom_component.typing import ClientSessionGenerator
+
+from custom_components.enovates.const import CONF_METRICS
+from custom_components.enovates.metrics import Metric, MetricFamilies
+
+
+def test_metric_families():
+    """Test that samples are grouped per family and labels are escaped."""
+    a, b = Metric("a", "gauge", "A"), Metric("b", "counter", "B", "_total")
+    metrics = MetricFamilies()
+    metrics.add(a, {"x": 'q"\\'}, 1)
+    metrics.add(b, {}, 2)
+    metrics.add(a, {"x": "y"}, 3)
+
+    assert metrics.render().splitlines() == [
+        "# TYPE a gauge",
+        "# HELP a A",
+        'a{x="q\\"\\\\"} 1',
+        'a{x="y"} 3',
+        "# TYPE b counter",
+        "# HELP b B",
+        "b_total{} 2",
+        "# EOF",
+    ]
+
+
+@pytest.mark.asyncio
+@patch("custom_components.enovates.PLATFORMS", [Platform.SENSOR])
+@pytest.mark.parametrize("entry", [(True, False)], indirect=True)
+async def test_metrics_view(eno_one_client: AsyncMock, entry: MockConfigEntry, hass: HomeAssistant, hass_client: ClientSessionGenerator):
+    """Test that the endpoint renders cached data without reading from the device."""
+    assert await async_setup_component(hass, "http", {})
+    entry.add_to_hass(hass)
+    hass.config_entries.async_update_entry(entry, options={CONF_METRICS: True})
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    fetch_calls = eno_one_client.return_value.fetch.call_count
+    client = await hass_client()
+    resp = await client.get("/api/enovates/metrics")
+    assert resp.status == HTTPStatus.OK
+    assert resp.headers["Content-Type"].startswith("application/openmetrics-text")
+    body = await resp.text()
+    assert eno_one_client.return_value.fetch.call_count == fetch_calls
+
+    assert body.endswith("# EOF\n")
+    labels = f'entry_id="{entry.entry_id}",charger="{entry.title}"'
+    assert f'enovates_measurements_current_l1{{{labels},port="1"}} 6.0' in body
+    assert f'enovates_measurements_current_l1{{{labels},port="2"}} 6.0' in body
+    assert f'enovates_reads_total{{{labels},port="1",register_map="Measurements"}}' in body
+    assert 'serial_nr="7"' in body
+
+    hass.config_entries.async_update_entry(entry, options={CONF_METRICS: False})
+    await hass.async_block_till_done()
+    resp = await client.get("/api/enovates/metrics")
+    assert resp.status == HTTPStatus.NOT_FOUND
+
+    await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
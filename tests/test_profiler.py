@@ -0,0 +1,33 @@
+"""Tests for the profile service."""
+
+import sys
+from pathlib import Path
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.setup import async_setup_component
+
+from custom_components.enovates.const import DOMAIN
+from custom_components.enovates.profiler import SERVICE_PROFILE, _collapse
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["sampling", "deterministic"])
+async def test_profile_service(hass: HomeAssistant, mode: str):
+    """Test that the profile service writes a profile to the config directory."""
+    assert await async_setup_component(hass, DOMAIN, {})
+
+    response = await hass.services.async_call(DOMAIN, SERVICE_PROFILE, {"duration": 1, "mode": mode}, blocking=True, return_response=True)
+
+    path = Path(response["path"])
+    assert path.parent == Path(hass.config.path(DOMAIN))
+    assert await hass.async_add_executor_job(path.is_file)
+    if mode == "sampling":
+        assert response["samples"] > 0
+
+
+def test_collapse():
+    """Test that only stacks involving the integration are kept."""
+    assert _collapse(None) is None
+    # The stack of this test does not involve the integration's package.
+    assert _collapse(sys._getframe()) is None  # noqa: SLF001
@@ -0,0 +1,91 @@
+"""Tests for the main fuse protection."""
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from enovates_modbus.eno_one import EMSLimit, Measurements
+
+from custom_components.enovates.data import EnovatesData, PortSnapshot
+from custom_components.enovates.ems_limit import NO_LIMIT, EMSLimitArbiter
+from custom_components.enovates.protection import RELEASE_TIME, FuseProtection
+
+
+def _measurements(installation: int, drawn: int) -> MagicMock:
+    return MagicMock(
+        installation_current_l1=installation,
+        installation_current_l2=0,
+        installation_current_l3=0,
+        current_l1=drawn,
+        current_l2=drawn,
+        current_l3=drawn,
+    )
+
+
+PORT_1_LIMIT = 20000
+
+
+@pytest.fixture
+def protection() -> FuseProtection:
+    """Protection of a dual port charger with a 25 A main fuse, port 1 is limited to 20 A, port 2 draws 10 A."""
+    entry = MagicMock()
+    entry.runtime_data = EnovatesData(ems_control=True, clients={1: AsyncMock(), 2: AsyncMock()}, integration=MagicMock(), coordinators={})
+    protection_clients = {1: AsyncMock(), 2: AsyncMock()}
+    for port, limit in ((1, PORT_1_LIMIT), (2, NO_LIMIT)):
+        entry.runtime_data.coordinators[port] = coordinator = MagicMock()
+        coordinator.data = PortSnapshot(
+            version=0,
+            sample_time=0,
+            register_maps={EMSLimit: EMSLimit(ems_limit=limit), Measurements: _measurements(0, 10000)},
+            sample_times={EMSLimit: 0, Measurements: 0},
+        )
+
+        async def _poll_written(limit: int, register_maps: dict = coordinator.data.register_maps) -> None:
+            register_maps[EMSLimit] = EMSLimit(ems_limit=limit)
+
+        # The next poll reads back what was written.
+        entry.runtime_data.clients[port].set_ems_limit.side_effect = _poll_written
+        protection_clients[port].set_ems_limit.side_effect = _poll_written
+    entry.runtime_data.ems_limits = EMSLimitArbiter(entry)
+    return FuseProtection(MagicMock(), entry, protection_clients, rating=25000)
+
+
+@pytest.mark.asyncio
+async def test_fuse_protection(protection: FuseProtection):
+    """Test that the EMS limits are lowered right away, only lowered further, and the desired limits restored after the release time."""
+    port_1, port_2 = protection.clients[1].set_ems_limit, protection.clients[2].set_ems_limit
+    ems_limits = protection.entry.runtime_data.ems_limits
+
+    await protection.async_check(_measurements(24000, 16000), 0)
+    port_1.assert_not_awaited()
+
+    # 4 A over, split over the ports.
+    await protection.async_check(_measurements(29000, 16000), 0.25)
+    port_1.assert_awaited_once_with(14000)
+    port_2.assert_awaited_once_with(8000)
+    assert protection.trips == 1
+
+    # The car hasn't reacted yet, nothing new to write.
+    port_1.reset_mock()
+    await protection.async_check(_measurements(29000, 16000), 0.5)
+    port_1.assert_not_awaited()
+
+    # Other writers are capped while tripped.
+    polled_2 = protection.entry.runtime_data.clients[2].set_ems_limit
+    await ems_limits.async_request(2, 16000)
+    polled_2.assert_awaited_once_with(8000)
+    await ems_limits.async_request(2, 6000)
+    polled_2.assert_awaited_with(6000)
+
+    # Below the rating, but not below the release margin.
+    await protection.async_check(_measurements(24000, 14000), 1)
+    await protection.async_check(_measurements(20000, 14000), 2)
+    await protection.async_check(_measurements(20000, 14000), 2 + RELEASE_TIME - 1)
+    port_1.assert_not_awaited()
+
+    # The limit from before the trip is restored, not the polled cap, and on port 2 the limit requested while tripped.
+    await protection.async_check(_measurements(20000, 14000), 2 + RELEASE_TIME)
+    port_1.assert_awaited_with(PORT_1_LIMIT)
+    port_2.assert_awaited_with(6000)
+    assert not protection.tripped
+    await ems_limits.async_request(2, 16000)
+    polled_2.assert_awaited_with(16000)
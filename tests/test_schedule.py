@@ -0,0 +1,74 @@
+"""Tests for the time-of-use schedules."""
+
+from typing import Any
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from freezegun.api import FrozenDateTimeFactory
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ServiceValidationError
+from pytest_homeassistant_custom_component.common import MockConfigEntry, async_fire_time_changed
+
+from custom_components.enovates import async_remove_entry
+from custom_components.enovates.const import DOMAIN
+from custom_components.enovates.schedule import DATA_SCHEDULE_ENGINE, SERVICE_SET_SCHEDULE, STORAGE_KEY
+
+
+@pytest.mark.asyncio
+@patch("custom_components.enovates.PLATFORMS", [Platform.SENSOR])
+@pytest.mark.parametrize("entry", [(True, True)], indirect=True, ids=lambda e: f"dual_port={e[0]},ems_control={e[1]}")
+async def test_schedule(
+    eno_one_client: AsyncMock,
+    entry: MockConfigEntry,
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    hass_storage: dict[str, Any],
+):
+    """Test that the set-point in effect is applied, the next boundary fires, and the schedule is stored."""
+    await hass.config.async_set_time_zone("UTC")
+    freezer.move_to("2026-10-19 12:00:00+00:00")  # A Monday
+    set_ems_limit = eno_one_client.return_value.set_ems_limit
+
+    entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    set_points = [
+        {"time": "11:00", "limit": 16},
+        {"time": "13:00", "limit": 0, "weekdays": ["mon"]},
+        {"time": "13:00", "limit": 8, "port": 2, "weekdays": ["mon"]},
+    ]
+    await hass.services.async_call(
+        DOMAIN,
+        SERVICE_SET_SCHEDULE,
+        {"config_entry_id": entry.entry_id, "set_points": set_points},
+        blocking=True,
+    )
+    await hass.async_block_till_done()
+    assert [call.args[0] for call in set_ems_limit.await_args_list] == [16000, 16000]
+    assert len(hass_storage[STORAGE_KEY]["data"][entry.entry_id]) == len(set_points)
+
+    # Both ports are written at the same boundary, one timer for the whole schedule.
+    engine = hass.data[DATA_SCHEDULE_ENGINE]
+    assert len(engine.boundaries) == 7 + 1
+    set_ems_limit.reset_mock()
+    freezer.move_to("2026-10-19 13:00:00+00:00")
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    assert sorted(call.args[0] for call in set_ems_limit.await_args_list) == [0, 8000]
+
+    with pytest.raises(ServiceValidationError):
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_SET_SCHEDULE,
+            {"config_entry_id": "not-an-entry", "set_points": []},
+            blocking=True,
+        )
+
+    await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+    assert engine.boundaries == []
+
+    await async_remove_entry(hass, entry)
+    assert entry.entry_id not in hass_storage[STORAGE_KEY]["data"]
@@ -5,10 +5,13 @@ from unittest.mock import AsyncMock, patch
 import pytest
 from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.device_registry import DeviceRegistry
 from homeassistant.helpers.entity_registry import EntityRegistry
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
-from custom_components.enovates.const import CONF_DUAL_PORT
+from custom_components.enovates.const import CONF_AGGREGATE_WINDOW, CONF_DUAL_PORT, CONF_PHASE_ENERGY, CONF_SITE_TOTALS, DOMAIN
+from custom_components.enovates.totals import SIGNALS
 
 
 @pytest.mark.asyncio
@@ -29,7 +32,96 @@ async def test_entities(eno_one_client: AsyncMock, entry: MockConfigEntry, hass:
     await hass.async_block_till_done()
 
     assert len(entity_registry.async_device_ids()) == 1
-    assert len(entity_registry.entities) == len(device_ids) * 23 + 10
+    # A dual port charger also has the 3 totals over its ports.
+    assert len(entity_registry.entities) == len(device_ids) * 23 + 11 + (3 if dual else 0)
+
+    await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+@pytest.mark.asyncio
+@patch("custom_components.enovates.PLATFORMS", [Platform.SENSOR])
+@pytest.mark.parametrize(
+    "entry",
+    [(False, False), (True, False)],
+    indirect=True,
+    ids=lambda e: f"dual_port={e[0]},ems_control={e[1]}",
+)
+async def test_aggregate_entities(eno_one_client: AsyncMock, entry: MockConfigEntry, hass: HomeAssistant, entity_registry: EntityRegistry):
+    """Test that aggregate entities get registered if enabled in the options."""
+    dual = entry.data[CONF_DUAL_PORT]
+    device_ids = {1, 2} if dual else {1}
+
+    entry.add_to_hass(hass)
+    hass.config_entries.async_update_entry(entry, options={CONF_AGGREGATE_WINDOW: "5"})
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    # 7 aggregated sensors, with 3 statistics each.
+    assert len(entity_registry.entities) == len(device_ids) * (23 + 7 * 3) + 11 + (3 if dual else 0)
+
+    await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+@pytest.mark.asyncio
+@patch("custom_components.enovates.PLATFORMS", [Platform.SENSOR])
+@pytest.mark.parametrize("entry", [(True, False)], indirect=True, ids=lambda e: f"dual_port={e[0]},ems_control={e[1]}")
+async def test_total_entities(
+    eno_one_client: AsyncMock,
+    entry: MockConfigEntry,
+    hass: HomeAssistant,
+    device_registry: DeviceRegistry,
+    entity_registry: EntityRegistry,
+):
+    """Test the totals over the ports of the charger, and over the site if enabled in the options."""
+    entry.add_to_hass(hass)
+    hass.config_entries.async_update_entry(entry, options={CONF_SITE_TOTALS: True})
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    # The site totals are on their own device.
+    site = device_registry.async_get_device(identifiers={(DOMAIN, "site")})
+    assert len(er.async_entries_for_device(entity_registry, site.id)) == len(SIGNALS)
+    assert len(entity_registry.entities) == 2 * 23 + 11 + 3 + 3
+
+    def state(unique_id: str) -> float:
+        return float(hass.states.get(entity_registry.async_get_entity_id(Platform.SENSOR, DOMAIN, unique_id)).state)
+
+    port_power = state("7_charger_active_power_total_1")
+    assert state("7_charger_active_power_total") == pytest.approx(2 * port_power)
+    assert state("site_charger_active_power_total") == pytest.approx(2 * port_power)
+    # The site energy counts from setup.
+    assert state("site_active_energy_import_total") == 0
+
+    await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+@pytest.mark.asyncio
+@patch("custom_components.enovates.PLATFORMS", [Platform.SENSOR])
+@pytest.mark.parametrize(
+    "entry",
+    [(False, False), (True, False)],
+    indirect=True,
+    ids=lambda e: f"dual_port={e[0]},ems_control={e[1]}",
+)
+async def test_phase_energy_entities(
+    eno_one_client: AsyncMock, entry: MockConfigEntry, hass: HomeAssistant, entity_registry: EntityRegistry
+):
+    """Test that per-phase energy entities get registered if enabled in the options."""
+    dual = entry.data[CONF_DUAL_PORT]
+    device_ids = {1, 2} if dual else {1}
+
+    entry.add_to_hass(hass)
+    hass.config_entries.async_update_entry(entry, options={CONF_PHASE_ENERGY: True})
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    # Energy for 3 phases.
+    assert len(entity_registry.entities) == len(device_ids) * (23 + 3) + 11 + (3 if dual else 0)
+    unique_id = "7_charger_active_energy_l1_1" if dual else "7_charger_active_energy_l1"
+    assert float(hass.states.get(entity_registry.async_get_entity_id(Platform.SENSOR, DOMAIN, unique_id)).state) == 0
 
     await hass.config_entries.async_unload(entry.entry_id)
     await hass.async_block_till_done()
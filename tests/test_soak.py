@@ -0,0 +1,279 @@
+"""
+Soak test of the integration against a stand-in ENO one, over hours of virtual time.
+
+Reloads, reconfigure flows, connection drops and EMS writes are repeated in cycles, and memory (tracemalloc),
+open file descriptors, asyncio tasks and open charger connections must not grow over the cycles.
+The default run is short, set ENOVATES_SOAK_HOURS for a long one:
+
+    ENOVATES_SOAK_HOURS=6 pytest tests/test_soak.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gc
+import os
+import tracemalloc
+from datetime import timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+from unittest.mock import patch
+
+import pytest
+from enovates_modbus.base import RegisterMap
+from enovates_modbus.eno_one import Diagnostics, EMSLimit, TransactionToken
+from homeassistant.components.number import ATTR_VALUE, SERVICE_SET_VALUE
+from homeassistant.config_entries import SOURCE_RECONFIGURE, ConfigEntryState
+from homeassistant.const import ATTR_ENTITY_ID, Platform
+from homeassistant.data_entry_flow import FlowResultType
+from pytest_homeassistant_custom_component.common import MockConfigEntry, async_fire_time_changed
+
+from custom_components.enovates import async_reload_entry
+from custom_components.enovates.const import DOMAIN
+
+if TYPE_CHECKING:
+    from freezegun.api import FrozenDateTimeFactory
+    from homeassistant.core import HomeAssistant
+
+SOAK_HOURS = float(os.environ.get("ENOVATES_SOAK_HOURS", "0.25"))
+
+# Virtual minutes per cycle of events, see test_soak.
+CYCLE_MINUTES = 5
+
+# Growth allowed between the end of the first cycle and the end of the run.
+MAX_MEMORY_GROWTH = 256 * 1024
+MAX_FD_GROWTH = 0
+MAX_TASK_GROWTH = 0
+
+
+class StandInTransport:
+    """Quacks like the pymodbus client of an EnoOneClient, with a real TCP connection to the stand-in charger."""
+
+    def __init__(self, charger: StandInCharger) -> None:
+        """Initialize the transport, it connects on the first request."""
+        self.charger = charger
+        self.reader: asyncio.StreamReader | None = None
+        self.writer: asyncio.StreamWriter | None = None
+        self.lock = asyncio.Lock()
+
+    @property
+    def connected(self) -> bool:
+        """Whether the connection is open."""
+        return self.writer is not None
+
+    async def request(self) -> None:
+        """One request/response exchange, reconnecting first if needed, and one at a time like pymodbus does."""
+        async with self.lock:
+            if self.writer is None:
+                self.reader, self.writer = await asyncio.open_connection("127.0.0.1", self.charger.port)
+            try:
+                self.writer.write(b"?\n")
+                response = await self.reader.readline()
+            except ConnectionError:
+                self.close()
+                raise
+            if not response:
+                self.close()
+                raise ConnectionError("[soak] connection dropped by the stand-in charger")
+
+    def close(self) -> None:
+        """Close the connection."""
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+
+class StandInClient:
+    """Quacks like EnoOneClient, serving the register maps of the stand-in charger."""
+
+    def __init__(self, charger: StandInCharger, device_id: int) -> None:
+        """Initialize the client of a port."""
+        self.charger = charger
+        self.device_id = device_id
+        self.client = StandInTransport(charger)
+
+    async def fetch[T: RegisterMap](self, rm_type: type[T]) -> T:
+        """Read a register map."""
+        await self.client.request()
+        return self.charger.register_maps[rm_type]
+
+    async def check_version(self) -> bool:
+        """Check the API version, always supported."""
+        await self.client.request()
+        return True
+
+    async def get_diagnostics(self) -> Diagnostics:
+        """Read the diagnostics."""
+        return await self.fetch(Diagnostics)
+
+    async def get_transaction_token(self) -> TransactionToken:
+        """Read the transaction token."""
+        return await self.fetch(TransactionToken)
+
+    async def get_ems_limit(self) -> int:
+        """Read the EMS limit."""
+        return (await self.fetch(EMSLimit)).ems_limit
+
+    async def set_ems_limit(self, value: int) -> None:
+        """Write the EMS limit."""
+        await self.client.request()
+        self.charger.register_maps[EMSLimit] = EMSLimit(ems_limit=value)
+        self.charger.ems_writes += 1
+
+
+class StandInCharger:
+    """Local TCP server standing in for an ENO one, answers every request line."""
+
+    def __init__(self, register_maps: dict[type[RegisterMap], RegisterMap]) -> None:
+        """Initialize the charger, it serves a copy of the register maps."""
+        self.register_maps = dict(register_maps)
+        self.clients: list[StandInClient] = []
+        self.connections: set[asyncio.StreamWriter] = set()
+        self.ems_writes = 0
+        self.server: asyncio.Server | None = None
+        self.port = 0
+
+    async def start(self) -> None:
+        """Start listening on a free port."""
+        self.server = await asyncio.start_server(self._handle_connection, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        """Drop all connections and stop listening."""
+        self.drop()
+        self.server.close()
+        await self.server.wait_closed()
+
+    def client(self, host: str, port: int, device_id: int, **kwargs: Any) -> StandInClient:  # noqa: ARG002
+        """EnoOneClient replacement."""
+        client = StandInClient(self, device_id)
+        self.clients.append(client)
+        return client
+
+    def drop(self) -> None:
+        """Drop all connections, like a charger reboot or a network outage."""
+        for writer in list(self.connections):
+            writer.close()
+
+    @property
+    def open_transports(self) -> int:
+        """Number of clients with an open connection."""
+        return sum(client.client.connected for client in self.clients)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections.add(writer)
+        try:
+            while await reader.readline():
+                writer.write(b"ok\n")
+        except ConnectionError:
+            pass
+        finally:
+            self.connections.discard(writer)
+            writer.close()
+
+
+def _open_fds() -> int | None:
+    fd_dir = Path("/proc/self/fd")
+    return len(list(fd_dir.iterdir())) if fd_dir.exists() else None
+
+
+async def _advance(hass: HomeAssistant, freezer: FrozenDateTimeFactory, seconds: int) -> None:
+    """Advance virtual time, tick by tick."""
+    for _ in range(seconds):
+        freezer.tick(timedelta(seconds=1))
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+
+
+async def _measure(hass: HomeAssistant) -> dict[str, int | None]:
+    await hass.async_block_till_done()
+    # Let closed transports finish closing.
+    await asyncio.sleep(0)
+    gc.collect()
+    return {
+        "memory": tracemalloc.get_traced_memory()[0],
+        "fds": _open_fds(),
+        "tasks": len(asyncio.all_tasks()),
+    }
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("entry", [(True, True)], indirect=True)
+async def test_soak(
+    entry: MockConfigEntry,
+    register_maps: dict[type[RegisterMap], RegisterMap],
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    socket_enabled: None,
+):
+    """Run the integration for SOAK_HOURS of virtual time, and check that it does not leak."""
+    charger = StandInCharger(register_maps)
+    await charger.start()
+    entry.add_to_hass(hass)
+    hass.config_entries.async_update_entry(entry, unique_id=register_maps[Diagnostics].serial_nr)
+
+    async def _cycle() -> None:
+        await _advance(hass, freezer, 60)
+
+        charger.drop()
+        await _advance(hass, freezer, 60)
+        assert not any(c.data.failed for c in entry.runtime_data.coordinators.values()), "the ports must recover from a drop"
+
+        for state in hass.states.async_all(Platform.NUMBER):
+            await hass.services.async_call(
+                Platform.NUMBER,
+                SERVICE_SET_VALUE,
+                {ATTR_ENTITY_ID: state.entity_id, ATTR_VALUE: 10},
+                blocking=True,
+            )
+        await _advance(hass, freezer, 60)
+
+        await async_reload_entry(hass, entry)
+        await hass.async_block_till_done()
+        assert entry.state is ConfigEntryState.LOADED
+        await _advance(hass, freezer, 60)
+
+        result = await hass.config_entries.flow.async_init(DOMAIN, context={"source": SOURCE_RECONFIGURE, "entry_id": entry.entry_id})
+        result = await hass.config_entries.flow.async_configure(result["flow_id"], dict(entry.data))
+        assert result["type"] == FlowResultType.ABORT
+        assert result["reason"] == "reconfigure_successful"
+        await hass.async_block_till_done()
+        assert entry.state is ConfigEntryState.LOADED
+        await _advance(hass, freezer, 60)
+
+        assert charger.open_transports == len(entry.runtime_data.clients), "only the clients of the loaded entry may be connected"
+
+    tracemalloc.start()
+    try:
+        with (
+            patch("custom_components.enovates.EnoOneClient", charger.client),
+            patch("custom_components.enovates.config_flow.EnoOneClient", charger.client),
+        ):
+            await hass.config_entries.async_setup(entry.entry_id)
+            await hass.async_block_till_done()
+
+            # The first cycle warms up caches and lazily created objects.
+            await _cycle()
+            baseline = await _measure(hass)
+            baseline_snapshot = tracemalloc.take_snapshot()
+
+            cycles = max(1, round(SOAK_HOURS * 60 / CYCLE_MINUTES) - 1)
+            for _ in range(cycles):
+                await _cycle()
+            final = await _measure(hass)
+            final_snapshot = tracemalloc.take_snapshot()
+
+            assert charger.ems_writes == (cycles + 1) * len(entry.runtime_data.clients)
+
+            await hass.config_entries.async_unload(entry.entry_id)
+            await hass.async_block_till_done()
+            assert charger.open_transports == 0, "unload must close all clients"
+    finally:
+        tracemalloc.stop()
+        await charger.stop()
+
+    top = "\n".join(map(str, final_snapshot.compare_to(baseline_snapshot, "lineno")[:10]))
+    assert final["memory"] - baseline["memory"] <= MAX_MEMORY_GROWTH, f"memory grew over {cycles} cycles, top growth:\n{top}"
+    if baseline["fds"] is not None:
+        assert final["fds"] - baseline["fds"] <= MAX_FD_GROWTH, "file descriptors leaked"
+    assert final["tasks"] - baseline["tasks"] <= MAX_TASK_GROWTH, "tasks leaked"
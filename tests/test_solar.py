@@ -0,0 +1,83 @@
+"""Tests for solar surplus charging."""
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from enovates_modbus.eno_one import Measurements, State
+from homeassistant.const import ATTR_UNIT_OF_MEASUREMENT, STATE_UNAVAILABLE, UnitOfPower
+from homeassistant.core import HomeAssistant
+
+from custom_components.enovates.data import EnovatesData, PortSnapshot
+from custom_components.enovates.ems_limit import EMSLimitArbiter
+from custom_components.enovates.solar import SurplusController
+
+SENSOR = "sensor.grid_export"
+
+
+@pytest.fixture
+def controller(hass: HomeAssistant) -> SurplusController:
+    """Create a controller of a single port, three phase charger, without smoothing."""
+    coordinator = MagicMock()
+    entry = MagicMock()
+    entry.runtime_data = EnovatesData(
+        ems_control=True,
+        clients={1: AsyncMock()},
+        integration=MagicMock(),
+        coordinators={1: coordinator},
+    )
+    entry.runtime_data.ems_limits = EMSLimitArbiter(entry)
+    controller = SurplusController(hass, entry, SENSOR)
+    controller.alpha = 1
+    _set_charger_power(controller, 0)
+    return controller
+
+
+def _set_charger_power(controller: SurplusController, power: float) -> None:
+    controller.entry.runtime_data.coordinators[1].data = PortSnapshot(
+        version=0,
+        sample_time=0,
+        register_maps={
+            State: MagicMock(number_of_phases=3, max_amp_per_phase=16),
+            Measurements: MagicMock(charger_active_power_total=power, voltage_l1=230),
+        },
+        sample_times={State: 0, Measurements: 0},
+    )
+
+
+@pytest.mark.asyncio
+async def test_surplus_control(controller: SurplusController, hass: HomeAssistant):
+    """Test the hysteresis around the Mode 3 minimum, and that small changes are not written."""
+    set_ems_limit = controller.entry.runtime_data.clients[1].set_ems_limit
+
+    # 6.5 A is not enough to start.
+    hass.states.async_set(SENSOR, str(230 * 3 * 6.5), {ATTR_UNIT_OF_MEASUREMENT: UnitOfPower.WATT})
+    await controller.async_step()
+    set_ems_limit.assert_awaited_once_with(0)
+
+    # 8 A is, also in kW.
+    hass.states.async_set(SENSOR, str(230 * 3 * 8 / 1000), {ATTR_UNIT_OF_MEASUREMENT: UnitOfPower.KILO_WATT})
+    await controller.async_step()
+    assert set_ems_limit.await_args.args[0] == pytest.approx(8000, abs=1)
+
+    # The charger now draws the 8 A, the export is a bit lower: within the deadband.
+    set_ems_limit.reset_mock()
+    _set_charger_power(controller, 230 * 3 * 8)
+    hass.states.async_set(SENSOR, "-100", {ATTR_UNIT_OF_MEASUREMENT: UnitOfPower.WATT})
+    await controller.async_step()
+    set_ems_limit.assert_not_awaited()
+
+    # A cloud: above the stop threshold, the minimum is kept.
+    hass.states.async_set(SENSOR, str(-230 * 3 * 2.5), {ATTR_UNIT_OF_MEASUREMENT: UnitOfPower.WATT})
+    await controller.async_step()
+    set_ems_limit.assert_awaited_with(6000)
+
+    # Below the stop threshold.
+    hass.states.async_set(SENSOR, str(-230 * 3 * 4), {ATTR_UNIT_OF_MEASUREMENT: UnitOfPower.WATT})
+    await controller.async_step()
+    set_ems_limit.assert_awaited_with(0)
+
+    # Unknown export, nothing is written.
+    set_ems_limit.reset_mock()
+    hass.states.async_set(SENSOR, STATE_UNAVAILABLE)
+    await controller.async_step()
+    set_ems_limit.assert_not_awaited()
@@ -0,0 +1,90 @@
+"""Tests for telemetry aggregation."""
+
+from datetime import timedelta
+from unittest.mock import MagicMock
+
+import pytest
+from enovates_modbus.eno_one import Measurements
+from homeassistant.core import HomeAssistant
+
+from custom_components.enovates.data import PortSnapshot
+from custom_components.enovates.telemetry import EnergyIntegrator, SlidingWindow
+
+
+def test_sliding_window():
+    """Test the sliding window statistics and expiry."""
+    window = SlidingWindow(10)
+    assert len(window) == 0
+    assert window.mean is None
+    assert window.min is None
+    assert window.max is None
+
+    values = [5, 3, 8, 1, 4]
+    for t, v in enumerate(values):
+        window.add(t, v)
+
+    assert len(window) == len(values)
+    assert window.mean == sum(values) / len(values)
+    assert window.min == min(values)
+    assert window.max == max(values)
+
+    # Drops the samples at t=0..3
+    window.expire(13)
+    assert len(window) == 1
+    assert window.mean == values[-1]
+    assert window.min == values[-1]
+    assert window.max == values[-1]
+
+    late = 2
+    window.add(20, late)
+    assert len(window) == 1
+    assert window.min == late
+    assert window.max == late
+
+
+@pytest.mark.asyncio
+async def test_energy_integrator(hass: HomeAssistant):
+    """Test the trapezoidal integration at the sample times, and that gaps are not integrated."""
+    coordinator = MagicMock()
+    integrator = EnergyIntegrator(
+        hass,
+        coordinator,
+        signals={"power": lambda data: data.charger_active_power_l1},
+        max_gap=timedelta(seconds=10),
+    )
+    stop = integrator.async_start()
+    update = coordinator.async_add_listener.call_args[0][0]
+
+    def sample(t: float, power: float, *, failed: bool = False) -> None:
+        coordinator.data = PortSnapshot(
+            version=0,
+            sample_time=t,
+            register_maps={Measurements: MagicMock(charger_active_power_l1=power)},
+            sample_times={Measurements: t},
+            failed=frozenset({Measurements}) if failed else frozenset(),
+        )
+        update()
+
+    sample(0, 1000)
+    assert integrator.energy["power"] == 0
+
+    # 2 kW on average for 1.8 s.
+    sample(1.8, 3000)
+    assert integrator.energy["power"] == pytest.approx(2000 * 1.8 / 3600)
+
+    # The same sample again, or a failed read, adds nothing.
+    sample(1.8, 3000)
+    sample(2.8, 0, failed=True)
+    assert integrator.energy["power"] == pytest.approx(2000 * 1.8 / 3600)
+
+    # The power during a gap is unknown.
+    sample(100, 3000)
+    assert integrator.energy["power"] == pytest.approx(2000 * 1.8 / 3600)
+    sample(101, 3000)
+    assert integrator.energy["power"] == pytest.approx((2000 * 1.8 + 3000) / 3600)
+
+    integrator.async_restore("power", 5000)
+    assert integrator.energy["power"] == pytest.approx(5000 + (2000 * 1.8 + 3000) / 3600)
+
+    stop()
+    coordinator.async_add_listener.return_value.assert_called_once()
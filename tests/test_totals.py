@@ -0,0 +1,127 @@
+"""Tests for totals over ports and chargers."""
+
+from unittest.mock import MagicMock
+
+import pytest
+from enovates_modbus.eno_one import Measurements
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.enovates.data import PortSnapshot
+from custom_components.enovates.totals import SITE_UPDATE_INTERVAL, Signal, SiteTotals, Totals
+
+SIGNALS = {
+    "power": Signal(rm_type=Measurements, value_fn=lambda data: data.charger_active_power_total),
+    "energy": Signal(rm_type=Measurements, value_fn=lambda data: data.active_energy_import_total, counter=True),
+}
+
+
+def _port(power: int, energy: int) -> MagicMock:
+    """Coordinator stand-in with a snapshot of the given values."""
+    coordinator = MagicMock(last_update_success=True)
+    coordinator.is_stale.return_value = False
+    _set(coordinator, power, energy)
+    return coordinator
+
+
+def _set(coordinator: MagicMock, power: int, energy: int, *, failed: bool = False) -> None:
+    measurements = MagicMock(charger_active_power_total=power, active_energy_import_total=energy)
+    coordinator.data = PortSnapshot(
+        version=0,
+        sample_time=0,
+        register_maps={Measurements: measurements},
+        sample_times={Measurements: 0},
+        failed=frozenset({Measurements}) if failed else frozenset(),
+    )
+
+
+def test_totals():
+    """Test the sums, that listeners are only called on changes, and that partial sums are never published."""
+    ports = [_port(100, 1000), _port(200, 2000)]
+    totals = Totals(SIGNALS)
+    listener = MagicMock()
+    totals.async_add_listener(listener)
+    remove = totals.async_add_source("charger", ports)
+
+    assert totals.values == {"power": 300, "energy": 3000}
+    listener.assert_called_once()
+    listener.reset_mock()
+
+    totals.async_update()
+    listener.assert_not_called()
+
+    _set(ports[0], 150, 1000)
+    totals.async_update()
+    assert totals.values == {"power": 350, "energy": 3000}
+    listener.assert_called_once()
+
+    # A failed read keeps the last value until it is stale.
+    _set(ports[1], 200, 2000, failed=True)
+    totals.async_update()
+    assert totals.values == {"power": 350, "energy": 3000}
+    ports[1].is_stale.return_value = True
+    totals.async_update()
+    assert totals.values == {"power": None, "energy": None}
+
+    remove()
+    assert totals.values == {"power": None, "energy": None}
+
+
+def test_totals_accumulate_counters():
+    """Test that accumulated counters don't jump when chargers are added or removed."""
+    first, second = _port(100, 1000), _port(200, 5000)
+    totals = Totals(SIGNALS, accumulate_counters=True)
+    totals.async_add_source("first", [first])
+    assert totals.values == {"power": 100, "energy": 0}
+
+    increases = [10, 5, 3]
+    _set(first, 100, 1000 + increases[0])
+    totals.async_update()
+    assert totals.values["energy"] == sum(increases[:1])
+
+    remove_second = totals.async_add_source("second", [second])
+    assert totals.values == {"power": 300, "energy": sum(increases[:1])}
+
+    _set(second, 200, 5000 + increases[1])
+    totals.async_update()
+    assert totals.values["energy"] == sum(increases[:2])
+
+    remove_second()
+    assert totals.values == {"power": 100, "energy": sum(increases[:2])}
+
+    # A counter reset only sets a new baseline.
+    _set(first, 100, 0)
+    totals.async_update()
+    _set(first, 100, increases[2])
+    totals.async_update()
+    assert totals.values["energy"] == sum(increases)
+
+
+@pytest.mark.asyncio
+async def test_site_totals(hass: HomeAssistant):
+    """Test that the site totals are recomputed at their own interval, not on the ticks of the chargers, while listened to."""
+    port = _port(100, 1000)
+    totals = SiteTotals(hass, SIGNALS)
+    remove = totals.async_add_source("charger", [port])
+    _set(port, 150, 1000)
+    async_fire_time_changed(hass, dt_util.utcnow() + SITE_UPDATE_INTERVAL)
+    await hass.async_block_till_done()
+    assert totals.values == {"power": 100, "energy": 0}
+
+    listener = MagicMock()
+    remove_listener = totals.async_add_listener(listener)
+    await hass.async_block_till_done()
+    listener.assert_not_called()
+
+    async_fire_time_changed(hass, dt_util.utcnow() + SITE_UPDATE_INTERVAL)
+    await hass.async_block_till_done()
+    listener.assert_called_once()
+    assert totals.values == {"power": 150, "energy": 0}
+
+    remove_listener()
+    _set(port, 200, 1000)
+    async_fire_time_changed(hass, dt_util.utcnow() + SITE_UPDATE_INTERVAL * 2)
+    await hass.async_block_till_done()
+    assert totals.values == {"power": 150, "energy": 0}
+    remove()
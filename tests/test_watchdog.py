@@ -0,0 +1,48 @@
+"""Tests for the event loop watchdog."""
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import issue_registry as ir
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.enovates.const import DOMAIN
+from custom_components.enovates.coordinator import TickBatch
+from custom_components.enovates.watchdog import LoopWatchdog, WatchdogPolicy
+
+
+@pytest.mark.asyncio
+async def test_watchdog_issue(hass: HomeAssistant, issue_registry: ir.IssueRegistry):
+    """Test that a repair issue is raised when ticks exceed the budget, and removed when they no longer do."""
+    entry = MockConfigEntry(domain=DOMAIN, title="ENO one test")
+    tick_batch = TickBatch(hass)
+    policy = WatchdogPolicy(budget=0.01, window=5, threshold=2)
+    watchdog = LoopWatchdog(hass, entry, tick_batch, policy)
+    stop = watchdog.async_start()
+
+    def tick(update: float, value_fn: float = 0) -> None:
+        tick_batch.async_start("port")
+        tick_batch.cost.add("update", update)
+        tick_batch.cost.add("value_fn", value_fn)
+        tick_batch.async_finish("port")
+
+    tick(0.02)
+    assert issue_registry.async_get_issue(DOMAIN, watchdog.issue_id) is None
+    # value_fn is part of the other categories, so it doesn't count towards the total.
+    tick(0.005, value_fn=0.02)
+    assert issue_registry.async_get_issue(DOMAIN, watchdog.issue_id) is None
+    tick(0.02)
+    assert issue_registry.async_get_issue(DOMAIN, watchdog.issue_id) is not None
+
+    summary = watchdog.summary
+    assert summary["ticks"] == len(watchdog.ticks)
+    assert summary["over_budget"] == policy.threshold
+    assert summary["max"] == pytest.approx(20, abs=1)
+    assert summary["value_fn_mean"] == pytest.approx(20 / 3, abs=1)
+
+    for _ in range(policy.window - 1):
+        tick(0.001)
+    assert issue_registry.async_get_issue(DOMAIN, watchdog.issue_id) is not None
+    tick(0.001)
+    assert issue_registry.async_get_issue(DOMAIN, watchdog.issue_id) is None
+
+    stop()
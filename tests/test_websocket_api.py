@@ -0,0 +1,98 @@
+"""Tests for the websocket API."""
+
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from enovates_modbus.eno_one import Measurements
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pytest_homeassistant_custom_component.typing import WebSocketGenerator
+
+from custom_components.enovates.archive import FIELDS, archive_path, write_chunk
+from custom_components.enovates.const import DOMAIN
+
+
+@pytest.mark.asyncio
+@patch("custom_components.enovates.PLATFORMS", [Platform.SENSOR])
+@pytest.mark.parametrize("entry", [(False, False)], indirect=True)
+async def test_subscribe_telemetry(
+    eno_one_client: AsyncMock,
+    entry: MockConfigEntry,
+    hass: HomeAssistant,
+    hass_ws_client: WebSocketGenerator,
+):
+    """Test that a subscription gets frames with only the selected fields."""
+    entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    client = await hass_ws_client(hass)
+    await client.send_json_auto_id(
+        {
+            "type": f"{DOMAIN}/subscribe_telemetry",
+            "entry_id": entry.entry_id,
+            "register_maps": ["measurements"],
+            "fields": ["current_l1", "charger_active_power_total"],
+        }
+    )
+    msg = await client.receive_json()
+    assert msg["success"]
+
+    msg = await client.receive_json()
+    frame = msg["event"]
+    assert set(frame) == {"version", "measurements"}
+    measurements = eno_one_client.return_value.fetch.side_effect(Measurements)
+    assert frame["measurements"]["current_l1"] == measurements.current_l1
+    assert frame["measurements"]["charger_active_power_total"] == measurements.charger_active_power_total
+    assert set(frame["measurements"]) == {"current_l1", "charger_active_power_total", "sample_time"}
+
+    await client.send_json_auto_id(
+        {
+            "type": f"{DOMAIN}/subscribe_telemetry",
+            "entry_id": entry.entry_id,
+            "fields": ["not_a_field"],
+        }
+    )
+    msg = await client.receive_json()
+    assert not msg["success"]
+
+    await client.send_json_auto_id({"type": f"{DOMAIN}/subscribe_telemetry", "entry_id": entry.entry_id, "port": 2})
+    msg = await client.receive_json()
+    assert not msg["success"]
+    assert msg["error"]["code"] == "not_found"
+
+    await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+@pytest.mark.asyncio
+@patch("custom_components.enovates.PLATFORMS", [Platform.SENSOR])
+@pytest.mark.parametrize("entry", [(False, False)], indirect=True)
+async def test_archive(eno_one_client: AsyncMock, entry: MockConfigEntry, hass: HomeAssistant, hass_ws_client: WebSocketGenerator):
+    """Test that the archive command returns the rows of the selected fields."""
+    entry.add_to_hass(hass)
+    await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    now = time.time()
+    records = [(int(now * 1000), 0, 1, *(0,) * (len(FIELDS) - 3))]
+    await hass.async_add_executor_job(write_chunk, archive_path(hass, entry.entry_id, 1), records, 7)
+
+    client = await hass_ws_client(hass)
+    await client.send_json_auto_id(
+        {"type": f"{DOMAIN}/archive", "entry_id": entry.entry_id, "start": now - 1, "end": now + 1, "fields": ["current_l2"]}
+    )
+    msg = await client.receive_json()
+    assert msg["success"]
+    assert msg["result"] == {"fields": ["time", "current_l2"], "records": [[int(now * 1000) / 1000, 1]], "truncated": False}
+
+    await client.send_json_auto_id(
+        {"type": f"{DOMAIN}/archive", "entry_id": entry.entry_id, "start": now, "end": now, "fields": ["state_str"]}
+    )
+    msg = await client.receive_json()
+    assert not msg["success"]
+
+    await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()